@@ -64,6 +64,7 @@ class UserViewSet(
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
+    cursor_ordering = ("id",)
 
     def perform_destroy(self, instance):
         instance.is_active = False
@@ -0,0 +1,40 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from apps.organizations.models import Membership, Organization, Structure
+
+
+@pytest.fixture
+def user():
+    return get_user_model().objects.create_user(email="user@example.com", password="passw0rd!")
+
+
+@pytest.fixture
+def org():
+    return Organization.objects.create(name="Organisation", slug="org")
+
+
+@pytest.fixture
+def ul(org):
+    return Structure.objects.create(organization=org, level="LOCAL", name="UL 01")
+
+
+@pytest.fixture
+def role():
+    """
+    Role of `user` on `ul`; override in a module to test another one.
+    """
+    return Membership.Role.REFERENT
+
+
+@pytest.fixture
+def membership(user, ul, role):
+    return Membership.objects.create(user=user, structure=ul, role=role)
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
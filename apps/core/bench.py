@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Headroom applied when budgets are regenerated from a run. Latency budgets
+# bound the median: a p95 over a few dozen samples is one GC pause away from
+# failing, and sub-50 ms medians are mostly noise of the machine.
+LATENCY_HEADROOM = 3.0
+MIN_LATENCY_BUDGET_MS = 50.0
+MEMORY_HEADROOM = 1.5
+METRICS = ("queries", "p50_ms", "peak_kib")
+
+
+@dataclass
+class Measurement:
+    name: str
+    method: str
+    path: str
+    status: int
+    p50_ms: float
+    p95_ms: float
+    queries: int
+    peak_kib: float
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile.
+    """
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _drain(response) -> None:
+    if getattr(response, "streaming", False):
+        for _chunk in response.streaming_content:
+            pass
+
+
+def measure(name, method, path, call, repeat=20, warmup=2) -> Measurement:
+    """
+    Time `call(i)` `repeat` times, then count its queries and its peak
+    allocation on two extra runs (tracemalloc and query capture would skew
+    the timings). Streaming responses are consumed inside the timing.
+    """
+    for i in range(warmup):
+        _drain(call(i))
+    samples = []
+    for i in range(warmup, warmup + repeat):
+        started = time.perf_counter()
+        response = call(i)
+        _drain(response)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = call(warmup + repeat)
+        _drain(response)
+    # Read now: the next request resets connection.queries.
+    queries = len(ctx.captured_queries)
+    tracemalloc.start()
+    try:
+        _drain(call(warmup + repeat + 1))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measurement(
+        name=name,
+        method=method,
+        path=path,
+        status=response.status_code,
+        p50_ms=round(percentile(samples, 50), 2),
+        p95_ms=round(percentile(samples, 95), 2),
+        queries=queries,
+        peak_kib=round(peak / 1024, 1),
+    )
+
+
+def load_budgets(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def budget_from(measurement: Measurement) -> dict:
+    """
+    Budget for a fresh baseline: query counts are exact, the median latency
+    and memory get headroom for noisy CI machines.
+    """
+    return {
+        "queries": measurement.queries,
+        "p50_ms": round(max(measurement.p50_ms * LATENCY_HEADROOM, MIN_LATENCY_BUDGET_MS), 1),
+        "peak_kib": round(measurement.peak_kib * MEMORY_HEADROOM, 1),
+    }
+
+
+def regressions(measurement: Measurement, budget: dict, metrics=METRICS) -> list[str]:
+    """
+    Budget overruns among `metrics`; "queries" alone does not depend on the machine.
+    """
+    problems = []
+    if "queries" in metrics and measurement.queries > budget["queries"]:
+        problems.append(f"{measurement.queries} queries > {budget['queries']}")
+    if "p50_ms" in metrics and measurement.p50_ms > budget["p50_ms"]:
+        problems.append(f"p50 {measurement.p50_ms} ms > {budget['p50_ms']} ms")
+    if "peak_kib" in metrics and measurement.peak_kib > budget["peak_kib"]:
+        problems.append(f"peak {measurement.peak_kib} KiB > {budget['peak_kib']} KiB")
+    return problems
+
+
+def write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def results_payload(measurements: list[Measurement]) -> dict:
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": [asdict(measurement) for measurement in measurements],
+    }
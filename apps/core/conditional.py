@@ -0,0 +1,122 @@
+import hashlib
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def etag_for(data) -> str:
+    """
+    Strong ETag of a serialized payload (stable key order).
+    """
+    raw = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return quote_etag(hashlib.sha256(raw.encode()).hexdigest())
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag in etags
+
+
+def is_not_modified(request, etag: str, last_modified=None) -> bool:
+    """
+    RFC 9110 evaluation: If-None-Match wins over If-Modified-Since.
+    """
+    if request.headers.get("If-None-Match"):
+        return etag_matches(request, etag)
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return bool(last_modified and since and int(last_modified.timestamp()) <= since)
+
+
+def with_validators(response, etag: str, last_modified=None):
+    """
+    Attach validators; responses are private and must be revalidated, so
+    clients keep them but always ask again with If-None-Match.
+    """
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def not_modified_response(etag: str, last_modified=None) -> Response:
+    return with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+
+
+def conditional_response(request, data, etag: str | None = None) -> Response:
+    """
+    200 with the payload, or an empty 304 when the client already has it.
+    """
+    etag = etag or etag_for(data)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    return with_validators(Response(data), etag)
+
+
+class ConditionalGetMixin:
+    """
+    ETag on list and retrieve, driven by `updated_at`; Last-Modified on
+    retrieve only.
+
+    Lists are fingerprinted with max(updated_at) and count() over the filtered
+    queryset (one aggregate query), details with the object's `updated_at`;
+    the request path (filters, cursor) and the user are part of the ETag. A
+    matching request gets a 304 before anything is serialized. A deletion
+    lowers the count but not max(updated_at), so lists send no Last-Modified
+    and ignore If-Modified-Since.
+
+    Relations nested by `?expand=` add their own max(updated_at); when one of
+    them has no `updated_at` the response is served without validators.
+    """
+
+    def _expanded_relations(self, model) -> list[str] | None:
+        names = list(getattr(self, "expand", ()))
+        for name in names:
+            try:
+                model._meta.get_field(name).related_model._meta.get_field("updated_at")
+            except FieldDoesNotExist:
+                return None
+        return names
+
+    def _validators(self, request, stamps, *state):
+        last_modified = max(filter(None, stamps), default=None)
+        parts = (request.get_full_path(), request.user.pk, *stamps, *state)
+        return etag_for([str(part) for part in parts]), last_modified
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        expanded = self._expanded_relations(queryset.model)
+        if expanded is None:
+            return super().list(request, *args, **kwargs)
+        state = queryset.aggregate(
+            last_modified=Max("updated_at"),
+            count=Count("pk"),
+            **{f"{name}_updated_at": Max(f"{name}__updated_at") for name in expanded},
+        )
+        stamps = [state["last_modified"], *(state[f"{name}_updated_at"] for name in expanded)]
+        etag, _ = self._validators(request, stamps, state["count"])
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+        return with_validators(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        expanded = self._expanded_relations(type(instance))
+        if expanded is None:
+            return Response(self.get_serializer(instance).data)
+        related = [getattr(instance, name) for name in expanded]
+        stamps = [instance.updated_at, *(obj.updated_at if obj else None for obj in related)]
+        etag, last_modified = self._validators(request, stamps, instance.pk)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        serializer = self.get_serializer(instance)
+        return with_validators(Response(serializer.data), etag, last_modified)
@@ -0,0 +1,169 @@
+from contextlib import contextmanager
+from itertools import batched
+
+from django.db import connections, router
+from django.db.models import Q
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=None):
+    """
+    `bulk_create(update_conflicts=True)` that works on every backend.
+
+    MySQL's ON DUPLICATE KEY UPDATE applies to any unique key and rejects
+    `unique_fields`; SQLite/PostgreSQL need them to build ON CONFLICT (...).
+    """
+    connection = connections[router.db_for_write(model)]
+    if not connection.features.supports_update_conflicts_with_target:
+        unique_fields = None
+    return model.objects.bulk_create(
+        objs,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=update_fields,
+    )
+
+
+def _adapters(model_fields, ops):
+    """
+    `(position, kind, adapter)` for each date or decimal column.
+    """
+    adapters = []
+    for index, field in enumerate(model_fields):
+        kind = field.get_internal_type()
+        if kind == "DateTimeField":
+            adapters.append((index, kind, ops.adapt_datetimefield_value))
+        elif kind == "DateField":
+            adapters.append((index, kind, ops.adapt_datefield_value))
+        elif kind == "DecimalField":
+            adapters.append(
+                (
+                    index,
+                    (kind, field.max_digits, field.decimal_places),
+                    lambda value, field=field: ops.adapt_decimalfield_value(
+                        value, field.max_digits, field.decimal_places
+                    ),
+                )
+            )
+    return adapters
+
+
+def insert_rows(model, fields, rows, batch_size=5000):
+    """
+    Plain `INSERT ... VALUES` of raw tuples through `executemany`.
+
+    For bulk loads where bulk_create is the bottleneck: no model instances,
+    no `auto_now` overrides (historical timestamps are kept as given) and no
+    primary keys returned. Date and decimal values go through the backend
+    adapters once per distinct value and type in a chunk (created_at and
+    updated_at given the same value cost one call); everything else must
+    already be a database value. Returns the number of rows written.
+    """
+    connection = connections[router.db_for_write(model)]
+    qn = connection.ops.quote_name
+    model_fields = [model._meta.get_field(name) for name in fields]
+    adapters = _adapters(model_fields, connection.ops)
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        qn(model._meta.db_table),
+        ", ".join(qn(field.column) for field in model_fields),
+        ", ".join(["%s"] * len(model_fields)),
+    )
+    written = 0
+    with connection.cursor() as cursor:
+        for chunk in batched(rows, batch_size):
+            if adapters:
+                chunk = [list(row) for row in chunk]
+                cache = {}
+                for index, kind, adapt in adapters:
+                    seen = cache.setdefault(kind, {})
+                    for row in chunk:
+                        value = row[index]
+                        if value not in seen:
+                            seen[value] = adapt(value)
+                        row[index] = seen[value]
+            cursor.executemany(sql, chunk)
+            written += len(chunk)
+    return written
+
+
+@contextmanager
+def deferred_indexes(*models):
+    """
+    Drop the `Meta.indexes` of `models` for the duration of a bulk load and
+    rebuild them afterwards, even if the load fails.
+
+    Building an index once over a loaded table is several times cheaper than
+    maintaining it row by row. Primary keys, unique constraints and the
+    per-field (foreign key) indexes are kept. The DDL runs outside any
+    transaction, so every other client of the database loses these indexes
+    until the load ends: for load-testing databases only. Inside a
+    transaction this does nothing, since DDL would commit it on MySQL.
+    """
+    connection = connections[router.db_for_write(models[0])]
+    if connection.in_atomic_block:
+        yield
+        return
+    with connection.schema_editor() as editor:
+        for model in models:
+            for index in model._meta.indexes:
+                editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for model in models:
+                for index in model._meta.indexes:
+                    editor.add_index(model, index)
+
+
+def _compare(field, value):
+    if field.startswith("-"):
+        return Q(**{f"{field[1:]}__lt": value})
+    return Q(**{f"{field}__gt": value})
+
+
+def keyset_after(ordering, values):
+    """
+    Lexicographic `(f1, f2, ...) > (v1, v2, ...)` as a Q object; `-field`
+    sorts downwards, so it compares with `<`.
+    """
+    condition = _compare(ordering[-1], values[-1])
+    for field, value in zip(reversed(ordering[:-1]), reversed(values[:-1]), strict=True):
+        condition = _compare(field, value) | (Q(**{field.lstrip("-"): value}) & condition)
+    return condition
+
+
+def iter_keyset_chunks(queryset, ordering, chunk_size=1000, after=None):
+    """
+    Iterate a queryset chunk by chunk, resuming after the last row seen.
+
+    `ordering` must be unique (end with the primary key) and non-nullable;
+    rows are model instances or `.values()` dicts containing those fields.
+    Each chunk is an indexed range scan, so memory stays bounded by
+    `chunk_size` and late chunks cost the same as early ones. `after` resumes
+    from a previously returned position.
+    """
+    queryset = queryset.order_by(*ordering)
+    last = after
+    while True:
+        chunk = queryset if last is None else queryset.filter(keyset_after(ordering, last))
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last = keyset_position(rows[-1], ordering)
+
+
+def keyset_position(row, ordering):
+    fields = [field.lstrip("-") for field in ordering]
+    if isinstance(row, dict):
+        return tuple(row[field] for field in fields)
+    return tuple(getattr(row, field) for field in fields)
+
+
+def iter_keyset(queryset, ordering, chunk_size=1000):
+    """
+    Row by row version of `iter_keyset_chunks`.
+    """
+    for rows in iter_keyset_chunks(queryset, ordering, chunk_size):
+        yield from rows
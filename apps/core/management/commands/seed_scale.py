@@ -0,0 +1,567 @@
+from __future__ import annotations
+
+import random
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.db import deferred_indexes, insert_rows
+from apps.inventory.compliance import recompute_lot_compliance
+from apps.inventory.models import (
+    Batch,
+    Container,
+    ExpiryDigest,
+    InventoryLine,
+    InventorySession,
+    Item,
+    Location,
+    LotInstance,
+    LotTemplate,
+    LotTemplateItem,
+    Site,
+    StockLine,
+    StockMovement,
+    Tombstone,
+)
+from apps.inventory.tombstones import suppress_tombstones
+from apps.organizations.models import Membership, Organization, Structure, StructureClosure
+
+SLUG = "crf-scale"
+
+CATEGORIES = ["Protection", "Bilans", "Trauma", "Respiration", "Plaies", "Divers", "Hygiène"]
+UNITS = ["unité", "paire", "boite", "flacon", "rouleau"]
+CONTAINER_TYPES = [
+    Container.Type.BAG_INTERVENTION,
+    Container.Type.BAG_OXY,
+    Container.Type.BAG_FIRST_AID,
+    Container.Type.VEHICLE_VPSP,
+    Container.Type.RESERVE_CASE,
+]
+# (type, weight); TRANSFER and ADJUST included so every movement shape exists.
+MOVEMENT_TYPES = [
+    (StockMovement.Type.CONSUME, 50),
+    (StockMovement.Type.RESTOCK, 25),
+    (StockMovement.Type.IN, 10),
+    (StockMovement.Type.OUT, 5),
+    (StockMovement.Type.TRANSFER, 5),
+    (StockMovement.Type.ADJUST, 5),
+]
+OUTGOING = {StockMovement.Type.CONSUME, StockMovement.Type.OUT, StockMovement.Type.TRANSFER}
+INCOMING = {
+    StockMovement.Type.RESTOCK,
+    StockMovement.Type.IN,
+    StockMovement.Type.TRANSFER,
+    StockMovement.Type.ADJUST,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large CRF-shaped dataset for load testing: deterministic, "
+        "bulk inserts only (organization 'crf-scale')."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--structures", type=int, default=200, help="Local units (UL).")
+        parser.add_argument(
+            "--territorials", type=int, default=0, help="DT count (default: one per 10 UL)."
+        )
+        parser.add_argument("--containers-per-ul", type=int, default=20)
+        parser.add_argument("--items", type=int, default=1000, help="Catalogue size.")
+        parser.add_argument("--items-per-template", type=int, default=40)
+        parser.add_argument("--batches-per-item", type=int, default=3)
+        parser.add_argument("--movements", type=int, default=100_000)
+        parser.add_argument("--sessions-per-ul", type=int, default=2)
+        parser.add_argument("--days", type=int, default=365, help="Movement history span.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--member", help="Email of an existing user made ADMIN of the national structure."
+        )
+        parser.add_argument(
+            "--flush", action="store_true", help="Delete a previous 'crf-scale' dataset first."
+        )
+        parser.add_argument(
+            "--defer-indexes",
+            action="store_true",
+            help="Drop the secondary indexes of the big tables during the load "
+            "(whole database, dedicated load-testing databases only).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.today = timezone.localdate(self.now)
+        self.rows = 0
+
+        if Organization.objects.filter(slug=SLUG).exists():
+            if not options["flush"]:
+                raise CommandError(f"Le jeu '{SLUG}' existe déjà: relancez avec --flush.")
+            self._flush()
+
+        defer = options["defer_indexes"]
+        if defer:
+            self.stdout.write(
+                self.style.WARNING(
+                    "⚠️  --defer-indexes: les index de StockLine, StockMovement et "
+                    "InventoryLine sont supprimés pour TOUTE la base jusqu'à la fin du "
+                    "chargement. À réserver à une base de test de charge."
+                )
+            )
+        started = time.perf_counter()
+        # Secondary indexes of the big tables are rebuilt once at the end.
+        with (
+            deferred_indexes(StockLine, StockMovement, InventoryLine) if defer else nullcontext(),
+            transaction.atomic(),
+        ):
+            org = Organization.objects.create(name="CRF (charge)", slug=SLUG)
+            self.rows += 1
+            uls = self._seed_structures(org, options["structures"], options["territorials"])
+            if options["member"]:
+                self._seed_member(options["member"], org)
+            templates = self._seed_catalogue(
+                org,
+                options["items"],
+                options["items_per_template"],
+                options["batches_per_item"],
+            )
+            lots = self._seed_containers(uls, templates, options["containers_per_ul"])
+            self._seed_movements(lots, templates, options["movements"], options["days"])
+            self._seed_inventories(lots, templates, options["sessions_per_ul"], options["days"])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"🚀 {self.rows} lignes en {elapsed:.1f}s ({self.rows / elapsed:,.0f} lignes/s)"
+        )
+        compliance_started = time.perf_counter()
+        recompute_lot_compliance(LotInstance.objects.filter(structure__organization=org))
+        self.stdout.write(
+            f"🩺 Conformité des lots recalculée en {time.perf_counter() - compliance_started:.1f}s"
+        )
+        self.stdout.write(self.style.SUCCESS("✅ Seed scale terminé."))
+
+    # ---------------------------------------------------------------------
+    # Helpers
+    # ---------------------------------------------------------------------
+    def _bulk_create(self, model, objs):
+        """
+        bulk_create in batches; primary keys are re-read by callers because
+        MySQL does not return them.
+        """
+        created = model.objects.bulk_create(objs, batch_size=self.batch_size)
+        self.rows += len(created)
+        return created
+
+    def _insert(self, model, fields, rows):
+        written = insert_rows(model, fields, rows, batch_size=self.batch_size)
+        self.rows += written
+        return written
+
+    def _flush(self) -> None:
+        """
+        Delete children first, `batch_size` rows per statement so the collector
+        never holds a whole table. The data is throwaway: no tombstone is
+        recorded, the other delete signals (caches) still run.
+        """
+        self.stdout.write(self.style.WARNING(f"⚠️  Suppression du jeu '{SLUG}'…"))
+        org = Organization.objects.get(slug=SLUG)
+        structures = Structure.objects.filter(organization=org)
+        querysets = [
+            InventoryLine.objects.filter(structure__in=structures),
+            InventorySession.objects.filter(structure__in=structures),
+            StockMovement.objects.filter(structure__in=structures),
+            StockLine.objects.filter(structure__in=structures),
+            LotInstance.objects.filter(structure__in=structures),
+            Container.objects.filter(structure__in=structures),
+            Location.objects.filter(site__structure__in=structures),
+            Site.objects.filter(structure__in=structures),
+            ExpiryDigest.objects.filter(structure__in=structures),
+            Tombstone.objects.filter(structure__in=structures),
+            Batch.objects.filter(item__organization=org),
+            LotTemplateItem.objects.filter(template__organization=org),
+            LotTemplate.objects.filter(organization=org),
+            Item.objects.filter(organization=org),
+            Membership.objects.filter(structure__in=structures),
+            StructureClosure.objects.filter(descendant__in=structures),
+            *(
+                structures.filter(level=level)
+                for level in (Structure.Level.LOCAL, Structure.Level.TERRITORIAL)
+            ),
+            structures,
+            Organization.objects.filter(pk=org.pk),
+        ]
+        with transaction.atomic(), suppress_tombstones():
+            for queryset in querysets:
+                while ids := list(queryset.values_list("pk", flat=True)[: self.batch_size]):
+                    queryset.filter(pk__in=ids).delete()
+
+    # ---------------------------------------------------------------------
+    # Organizations
+    # ---------------------------------------------------------------------
+    def _seed_structures(self, org: Organization, locals_: int, territorials: int) -> list[int]:
+        territorials = territorials or max(1, locals_ // 10)
+        self._bulk_create(
+            Structure,
+            [Structure(organization=org, level="NATIONAL", name="Siège (charge)", code="CRF")],
+        )
+        national_id = Structure.objects.get(organization=org, code="CRF").id
+        self._bulk_create(
+            Structure,
+            [
+                Structure(
+                    organization=org,
+                    level="TERRITORIAL",
+                    name=f"Direction territoriale {n:03d}",
+                    code=f"DT{n:03d}",
+                    parent_id=national_id,
+                )
+                for n in range(territorials)
+            ],
+        )
+        dt_ids = list(
+            Structure.objects.filter(organization=org, level="TERRITORIAL")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        self._bulk_create(
+            Structure,
+            [
+                Structure(
+                    organization=org,
+                    level="LOCAL",
+                    name=f"Unité locale {n:04d}",
+                    code=f"UL{n:04d}",
+                    parent_id=dt_ids[n % territorials],
+                )
+                for n in range(locals_)
+            ],
+        )
+        # bulk_create skips Structure.save(), which maintains the closure table.
+        StructureClosure.objects.rebuild(batch_size=self.batch_size)
+        self.stdout.write(f"🏗️  Structures: 1 / {territorials} DT / {locals_} UL")
+        return list(
+            Structure.objects.filter(organization=org, level="LOCAL")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    def _seed_member(self, email: str, org: Organization) -> None:
+        user = get_user_model().objects.filter(email=email).first()
+        if user is None:
+            raise CommandError(f"Utilisateur inconnu: {email}.")
+        Membership.objects.update_or_create(
+            user=user,
+            structure=Structure.objects.get(organization=org, code="CRF"),
+            defaults={"role": Membership.Role.ADMIN, "is_active": True},
+        )
+        self.stdout.write(f"👤 Membre: {email} (ADMIN national)")
+
+    # ---------------------------------------------------------------------
+    # Catalogue
+    # ---------------------------------------------------------------------
+    def _seed_catalogue(
+        self, org: Organization, items: int, per_template: int, batches_per_item: int
+    ) -> dict[int, list[tuple[int, int, list[int]]]]:
+        """
+        Items, batches and one template per lot code.
+
+        Returns {template_id: [(item_id, expected_qty, batch_ids), ...]}.
+        """
+        rng = self.rng
+        self._bulk_create(
+            Item,
+            [
+                Item(
+                    organization=org,
+                    name=f"Article {n:05d}",
+                    sku=f"SC-{n:05d}",
+                    unit=rng.choice(UNITS),
+                    category=rng.choice(CATEGORIES),
+                    requires_expiry=rng.random() < 0.4,
+                    requires_lot_number=rng.random() < 0.2,
+                )
+                for n in range(items)
+            ],
+        )
+        item_rows = list(
+            Item.objects.filter(organization=org)
+            .order_by("id")
+            .values_list("id", "requires_expiry")
+        )
+        self._bulk_create(
+            Batch,
+            [
+                Batch(
+                    item_id=item_id,
+                    lot_number=f"SC-{index:05d}-{n}",
+                    expires_at=self.today + timedelta(days=rng.randint(-60, 900)),
+                )
+                for index, (item_id, requires_expiry) in enumerate(item_rows)
+                if requires_expiry
+                for n in range(batches_per_item)
+            ],
+        )
+        batches: dict[int, list[int]] = {}
+        self.expiries = {}
+        for batch_id, item_id, expires_at in (
+            Batch.objects.filter(item__organization=org)
+            .order_by("id")
+            .values_list("id", "item_id", "expires_at")
+        ):
+            batches.setdefault(item_id, []).append(batch_id)
+            self.expiries[batch_id] = expires_at
+
+        item_ids = [item_id for item_id, _ in item_rows]
+        self._bulk_create(
+            LotTemplate,
+            [
+                LotTemplate(organization=org, code=code, name=label, version="SCALE-001")
+                for code, label in LotTemplate.Code.choices
+            ],
+        )
+        template_ids = list(
+            LotTemplate.objects.filter(organization=org).order_by("id").values_list("id", flat=True)
+        )
+        groups = LotTemplateItem.Group.values
+        recipes: dict[int, list[tuple[int, int, list[int]]]] = {}
+        template_items = []
+        for template_id in template_ids:
+            recipe = [
+                (item_id, rng.randint(1, 20), batches.get(item_id, []))
+                for item_id in rng.sample(item_ids, min(per_template, len(item_ids)))
+            ]
+            recipes[template_id] = recipe
+            template_items += [
+                LotTemplateItem(
+                    template_id=template_id,
+                    group=rng.choice(groups),
+                    item_id=item_id,
+                    expected_qty=expected,
+                )
+                for item_id, expected, _batch_ids in recipe
+            ]
+        self._bulk_create(LotTemplateItem, template_items)
+        self.stdout.write(
+            f"📦 Catalogue: {items} articles, {sum(map(len, batches.values()))} lots fabricant, "
+            f"{len(template_ids)} modèles"
+        )
+        return recipes
+
+    # ---------------------------------------------------------------------
+    # Sites / containers / lots / stock
+    # ---------------------------------------------------------------------
+    def _seed_containers(
+        self, uls: list[int], recipes: dict, per_ul: int
+    ) -> list[tuple[int, int, int, int]]:
+        """
+        One site, two locations and `per_ul` containers per UL, each holding a
+        lot stocked close to its template. Returns (lot, structure, template,
+        container) tuples.
+        """
+        rng = self.rng
+        template_ids = list(recipes)
+        self._bulk_create(Site, [Site(structure_id=ul, name=f"Local UL {ul}") for ul in uls])
+        sites = dict(Site.objects.filter(structure_id__in=uls).values_list("structure_id", "id"))
+        self._bulk_create(
+            Location,
+            [
+                Location(site_id=sites[ul], name=name, location_type=kind)
+                for ul in uls
+                for name, kind in (("Armoire principale", "Stock"), ("VPSP 1", "Véhicule"))
+            ],
+        )
+        locations: dict[int, list[int]] = {}
+        for site_id, location_id in (
+            Location.objects.filter(site_id__in=sites.values())
+            .order_by("id")
+            .values_list("site_id", "id")
+        ):
+            locations.setdefault(site_id, []).append(location_id)
+
+        self._bulk_create(
+            Container,
+            [
+                Container(
+                    structure_id=ul,
+                    location_id=rng.choice(locations[sites[ul]]),
+                    type=rng.choice(CONTAINER_TYPES),
+                    identifier=f"S{ul}-{n:03d}",
+                )
+                for ul in uls
+                for n in range(per_ul)
+            ],
+        )
+        containers = list(
+            Container.objects.filter(structure_id__in=uls)
+            .order_by("id")
+            .values_list("id", "structure_id")
+        )
+        self._bulk_create(
+            LotInstance,
+            [
+                LotInstance(
+                    template_id=rng.choice(template_ids),
+                    container_id=container_id,
+                    structure_id=structure_id,
+                    last_checked_at=self.now - timedelta(days=rng.randint(0, 120)),
+                    next_check_due_at=self.now + timedelta(days=rng.randint(-30, 90)),
+                )
+                for container_id, structure_id in containers
+            ],
+        )
+        lots = list(
+            LotInstance.objects.filter(structure_id__in=uls)
+            .order_by("id")
+            .values_list("id", "structure_id", "template_id", "container_id")
+        )
+        self.stdout.write(f"🎒 Conteneurs: {len(containers)} (un lot chacun)")
+
+        def stock_rows():
+            for lot_id, structure_id, template_id, _container_id in lots:
+                for item_id, expected, batch_ids in recipes[template_id]:
+                    quantity = expected if rng.random() < 0.85 else rng.randint(0, expected)
+                    batch_id = rng.choice(batch_ids) if batch_ids else None
+                    yield (
+                        lot_id,
+                        item_id,
+                        batch_id,
+                        structure_id,
+                        self.expiries.get(batch_id),
+                        quantity,
+                        self.now,
+                        self.now,
+                    )
+
+        written = self._insert(
+            StockLine,
+            [
+                "lot_instance",
+                "item",
+                "batch",
+                "structure",
+                "expires_at",
+                "quantity",
+                "created_at",
+                "updated_at",
+            ],
+            stock_rows(),
+        )
+        self.stdout.write(f"📈 Lignes de stock: {written}")
+        return lots
+
+    # ---------------------------------------------------------------------
+    # History
+    # ---------------------------------------------------------------------
+    def _seed_movements(self, lots: list, recipes: dict, count: int, days: int) -> None:
+        """
+        `count` movements spread evenly over the last `days`, oldest first so
+        ids and created_at grow together as in production.
+        """
+        rng = self.rng
+        kinds, weights = zip(*MOVEMENT_TYPES, strict=True)
+        siblings: dict[int, list[int]] = {}
+        for lot_id, structure_id, _template_id, _container_id in lots:
+            siblings.setdefault(structure_id, []).append(lot_id)
+        start = self.now - timedelta(days=days)
+        step = timedelta(days=days) / max(count, 1)
+
+        def movement_rows():
+            # Lots and types are drawn a batch at a time: rng.choices(k=...) is
+            # an order of magnitude cheaper per value than rng.choice().
+            for offset in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - offset)
+                picks = rng.choices(lots, k=size)
+                types = rng.choices(kinds, weights, k=size)
+                for n, (lot, kind) in enumerate(zip(picks, types, strict=True), offset):
+                    lot_id, structure_id, template_id, _container_id = lot
+                    recipe = recipes[template_id]
+                    item_id, _expected, batch_ids = recipe[int(rng.random() * len(recipe))]
+                    batch_id = batch_ids[int(rng.random() * len(batch_ids))] if batch_ids else None
+                    to_lot = lot_id if kind in INCOMING else None
+                    if kind == StockMovement.Type.TRANSFER:
+                        to_lot = rng.choice(siblings[structure_id])
+                        if to_lot == lot_id:
+                            kind, to_lot = StockMovement.Type.CONSUME, None
+                    created_at = start + step * n
+                    yield (
+                        structure_id,
+                        kind,
+                        lot_id if kind in OUTGOING else None,
+                        to_lot,
+                        item_id,
+                        batch_id,
+                        1 + int(rng.random() * 5),
+                        "",
+                        created_at,
+                        created_at,
+                    )
+
+        written = self._insert(
+            StockMovement,
+            [
+                "structure",
+                "type",
+                "from_lot",
+                "to_lot",
+                "item",
+                "batch",
+                "quantity",
+                "reason",
+                "created_at",
+                "updated_at",
+            ],
+            movement_rows(),
+        )
+        self.stdout.write(f"🔁 Mouvements: {written}")
+
+    def _seed_inventories(self, lots: list, recipes: dict, per_ul: int, days: int) -> None:
+        rng = self.rng
+        by_structure: dict[int, list[tuple[int, int]]] = {}
+        for _lot_id, structure_id, template_id, container_id in lots:
+            by_structure.setdefault(structure_id, []).append((container_id, template_id))
+        self._bulk_create(
+            InventorySession,
+            [
+                InventorySession(
+                    structure_id=structure_id,
+                    container_id=container_id,
+                    validated_at=self.now - timedelta(days=rng.randint(0, days)),
+                )
+                for structure_id, containers in by_structure.items()
+                for container_id, _template_id in rng.sample(
+                    containers, min(per_ul, len(containers))
+                )
+            ],
+        )
+        templates = {container_id: template_id for *_, template_id, container_id in lots}
+        sessions = InventorySession.objects.filter(structure_id__in=by_structure).order_by("id")
+
+        def line_rows():
+            for session_id, structure_id, container_id in sessions.values_list(
+                "id", "structure_id", "container_id"
+            ).iterator():
+                for item_id, expected, _batch_ids in recipes[templates[container_id]]:
+                    counted = expected if rng.random() < 0.9 else rng.randint(0, expected)
+                    yield (session_id, item_id, structure_id, expected, counted, self.now, self.now)
+
+        written = self._insert(
+            InventoryLine,
+            [
+                "session",
+                "item",
+                "structure",
+                "expected_qty",
+                "counted_qty",
+                "created_at",
+                "updated_at",
+            ],
+            line_rows(),
+        )
+        self.stdout.write(f"📝 Inventaires: {sessions.count()} sessions, {written} lignes")
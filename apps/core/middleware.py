@@ -0,0 +1,42 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .queries import NPlusOneError, record_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryShapeMiddleware:
+    """
+    Opt-in N+1 detector (settings.QUERY_SHAPE_DETECTOR = "log" or "raise").
+
+    Statements repeated QUERY_SHAPE_THRESHOLD times within a request are
+    logged, or raised as NPlusOneError, with the view that served it.
+    """
+
+    def __init__(self, get_response):
+        self.mode = settings.QUERY_SHAPE_DETECTOR
+        if self.mode not in ("log", "raise"):
+            raise MiddlewareNotUsed
+        self.threshold = settings.QUERY_SHAPE_THRESHOLD
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries(self.threshold) as recorder:
+            response = self.get_response(request)
+            if getattr(response, "streaming", False):
+                return response  # consumed after the middleware returns
+        repeated = recorder.repeated()
+        if repeated:
+            match = request.resolver_match
+            view = (match.view_name or match._func_path) if match else request.path
+            message = (
+                f"N+1 queries in {view} ({request.method} {request.path}), "
+                f"{recorder.total} queries:\n" + "\n".join(f"  {query}" for query in repeated)
+            )
+            if self.mode == "raise":
+                raise NPlusOneError(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,160 @@
+import base64
+import binascii
+import json
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .db import keyset_after, keyset_position
+
+
+def _encode(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal | UUID):
+        return str(value)
+    return value
+
+
+def _reversed(ordering):
+    return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in ordering)
+
+
+class CreatedAtCursorPagination(BasePagination):
+    """
+    Keyset pagination ordered on (created_at, id).
+
+    The cursor encodes the whole position of the last row seen and the next
+    page is `(created_at, id) > (x, y)`: an indexed range scan that costs the
+    same for page N as for page 1, however many rows share a `created_at`.
+    Views whose model has no `created_at` column declare their own
+    `cursor_ordering`, which must be non-null and end with a unique column.
+    """
+
+    ordering = ("created_at", "id")
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Curseur invalide."
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, "cursor_ordering", None) or self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def decode_cursor(self, request, model, ordering):
+        """
+        (position, reverse) of the `?cursor=` token, (None, False) without one.
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            values = raw["p"]
+            if len(values) != len(ordering):
+                raise ValueError
+            position = tuple(
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(ordering, values, strict=True)
+            )
+            return position, bool(raw["r"])
+        except (
+            binascii.Error,
+            FieldDoesNotExist,
+            KeyError,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message) from None
+
+    def encode_cursor(self, row, reverse):
+        values = [_encode(value) for value in keyset_position(row, self.page_ordering)]
+        raw = json.dumps({"p": values, "r": int(reverse)}, separators=(",", ":")).encode()
+        token = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        size = self.get_page_size(request)
+        if not size:
+            return None
+        self.request = request
+        self.page_ordering = self.get_ordering(request, queryset, view)
+        position, reverse = self.decode_cursor(request, queryset.model, self.page_ordering)
+        ordering = _reversed(self.page_ordering) if reverse else self.page_ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_after(ordering, position))
+        rows = list(queryset[: size + 1])
+        has_more = len(rows) > size
+        self.page = rows[:size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        link = {"type": "string", "nullable": True, "format": "uri"}
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {"next": link, "previous": link, "results": schema},
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Curseur de pagination renvoyé par `next` / `previous`.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Nombre de résultats par page.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -0,0 +1,98 @@
+import re
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.db import connection
+
+# Same statement this many times in one request: an N+1 pattern.
+DEFAULT_REPEAT_THRESHOLD = 5
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_SAVEPOINT = re.compile(r"^(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT) ")
+_APPS_DIR = str(Path(__file__).resolve().parents[1])
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def query_shape(sql: str) -> str:
+    """
+    The statement without its parameters: Django sends placeholders and
+    params separately, only IN lists vary in length.
+    """
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+def _origin() -> str:
+    """
+    Innermost project frame outside this module, e.g. a serializer method.
+    """
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if frame.filename.startswith(_APPS_DIR) and frame.filename != __file__:
+            return f"{frame.filename[len(_APPS_DIR) + 1 :]}:{frame.lineno} in {frame.name}"
+    return "?"
+
+
+@dataclass
+class RepeatedQuery:
+    shape: str
+    count: int
+    origin: str
+
+    def __str__(self) -> str:
+        return f"{self.count}x from {self.origin}: {self.shape}"
+
+
+class QueryRecorder:
+    """
+    `connection.execute_wrapper` counting statements by shape; the code that
+    issued a shape is located once, when it reaches the threshold.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_REPEAT_THRESHOLD):
+        self.threshold = threshold
+        self.total = 0
+        self.shapes: Counter[str] = Counter()
+        self.origins: dict[str, str] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        if not many and not _SAVEPOINT.match(sql):
+            shape = query_shape(sql)
+            self.shapes[shape] += 1
+            if self.shapes[shape] == self.threshold:
+                self.origins[shape] = _origin()
+        return execute(sql, params, many, context)
+
+    def repeated(self) -> list[RepeatedQuery]:
+        return [
+            RepeatedQuery(shape, count, self.origins[shape])
+            for shape, count in self.shapes.most_common()
+            if count >= self.threshold
+        ]
+
+
+@contextmanager
+def record_queries(threshold: int = DEFAULT_REPEAT_THRESHOLD, using=connection):
+    recorder = QueryRecorder(threshold)
+    with using.execute_wrapper(recorder):
+        yield recorder
+
+
+@contextmanager
+def assert_no_n_plus_one(threshold: int = DEFAULT_REPEAT_THRESHOLD, using=connection):
+    """
+    Fail when the block repeats a statement `threshold` times or more:
+
+        with assert_no_n_plus_one():
+            api.get("/api/v1/stock-lines/")
+    """
+    with record_queries(threshold, using) as recorder:
+        yield recorder
+    repeated = recorder.repeated()
+    if repeated:
+        raise AssertionError("N+1 queries:\n" + "\n".join(f"  {query}" for query in repeated))
@@ -0,0 +1,139 @@
+from functools import cached_property
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .serializers import requested_fields
+
+
+def serializer_columns(serializer_class, prefix: str = "", names=None) -> list[str]:
+    """
+    Model columns a flat ModelSerializer reads, foreign keys by name;
+    `names` restricts them to a sparse fieldset.
+    """
+    model = serializer_class.Meta.model
+    columns = []
+    for name in serializer_class.Meta.fields if names is None else names:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.many_to_many:
+            columns.append(f"{prefix}{name}")
+    return columns
+
+
+def unique_relations(serializer_class) -> list[str]:
+    """
+    Foreign keys of the serializer that belong to a unique constraint: DRF's
+    unique-together validator reads them from the instance on partial updates.
+    """
+    model = serializer_class.Meta.model
+    names = {
+        name for constraint in model._meta.total_unique_constraints for name in constraint.fields
+    }
+    names.update(name for fields in model._meta.unique_together for name in fields)
+    return [
+        name
+        for name in serializer_columns(serializer_class)
+        if name in names and model._meta.get_field(name).many_to_one
+    ]
+
+
+def _model_has(model, name: str) -> bool:
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+class ShapedQuerysetMixin:
+    """
+    Per-action queryset shaping.
+
+    Serializers emit foreign keys as ids, so reads join nothing and load only
+    the serialized columns (plus `updated_at` and the cursor ordering),
+    narrowed further by `?fields=` / `?omit=`. `?expand=item,batch` nests
+    the relations listed in `expandable_fields` and joins them, restricted to
+    the nested serializer's columns and `updated_at`. Writes load whole rows
+    and join what validation reads: the relations of unique constraints and
+    `write_select_related`.
+    """
+
+    expandable_fields: dict[str, type[serializers.ModelSerializer]] = {}
+    write_select_related: tuple[str, ...] = ()
+
+    _expanded_serializers: dict = {}
+
+    @cached_property
+    def expand(self) -> tuple[str, ...]:
+        """
+        Relations nested in this read; those dropped by `?fields=` / `?omit=`
+        are not expanded.
+        """
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return ()
+        raw = request.query_params.get("expand", "")
+        names = tuple(sorted({name.strip() for name in raw.split(",")} - {""}))
+        unknown = sorted(set(names) - set(self.expandable_fields))
+        if unknown:
+            allowed = ", ".join(sorted(self.expandable_fields)) or "aucune"
+            raise serializers.ValidationError(
+                {"expand": [f"Relations inconnues: {', '.join(unknown)} (possibles: {allowed})."]}
+            )
+        kept = requested_fields(super().get_serializer_class(), request)
+        return tuple(name for name in names if kept is None or name in kept)
+
+    def _structure_joins(self) -> list[str]:
+        """
+        Relations walked by the object permission check, e.g. `site` for
+        `site__structure`.
+        """
+        path = getattr(self, "structure_path", None) or ""
+        parts = path.split("__")[:-1]
+        return ["__".join(parts[: i + 1]) for i in range(len(parts))]
+
+    def _read_columns(self, model, kept, expand) -> set[str]:
+        columns = set(serializer_columns(super().get_serializer_class(), names=kept))
+        ordering = getattr(self, "cursor_ordering", None) or getattr(self.paginator, "ordering", ())
+        for name in ("updated_at", *(field.lstrip("-") for field in ordering)):
+            if _model_has(model, name):
+                columns.add(name)
+        for name in expand:
+            columns.add(name)
+            columns.update(serializer_columns(self.expandable_fields[name], f"{name}__"))
+            if _model_has(model._meta.get_field(name).related_model, "updated_at"):
+                columns.add(f"{name}__updated_at")
+        return columns
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        detail = getattr(self, "detail", False)
+        joins = self._structure_joins() if detail else []
+        if self.request.method not in SAFE_METHODS:
+            serializer_class = super().get_serializer_class()
+            joins = {*unique_relations(serializer_class), *self.write_select_related, *joins}
+            return queryset.select_related(*sorted(joins)) if joins else queryset
+        kept = requested_fields(super().get_serializer_class(), self.request)
+        columns = self._read_columns(queryset.model, kept, self.expand)
+        if detail and getattr(self, "structure_path", None):
+            columns.update([*joins, self.structure_path])
+        joins = [*self.expand, *joins]
+        if joins:
+            queryset = queryset.select_related(*joins)
+        return queryset.only(*columns)
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if not self.expand:
+            return serializer_class
+        key = (serializer_class, self.expand)
+        if key not in self._expanded_serializers:
+            nested = {name: self.expandable_fields[name](read_only=True) for name in self.expand}
+            self._expanded_serializers[key] = type(
+                f"Expanded{serializer_class.__name__}", (serializer_class,), nested
+            )
+        return self._expanded_serializers[key]
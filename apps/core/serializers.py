@@ -0,0 +1,50 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _names(raw: str | None) -> list[str]:
+    return [name.strip() for name in (raw or "").split(",") if name.strip()]
+
+
+def requested_fields(serializer_class, request) -> list[str] | None:
+    """
+    Fields kept by `?fields=` and `?omit=` on a read, in declaration order;
+    None when the request asks for all of them.
+
+    Writes always use the full serializer: pruning would drop input fields.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = request.query_params
+    fields, omit = _names(params.get("fields")), _names(params.get("omit"))
+    if not fields and not omit:
+        return None
+    available = list(serializer_class.Meta.fields)
+    for param, names in (("fields", fields), ("omit", omit)):
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise serializers.ValidationError({param: [f"Champs inconnus: {', '.join(unknown)}."]})
+    return [name for name in available if (not fields or name in fields) and name not in omit]
+
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets for ModelSerializers: `?fields=id,identifier` keeps only
+    those fields, `?omit=notes` drops some. Applied to the top-level
+    serializer only, never to nested (expanded) ones.
+    """
+
+    def _is_root(self) -> bool:
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        kept = requested_fields(type(self), self.context.get("request"))
+        if kept is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in kept}
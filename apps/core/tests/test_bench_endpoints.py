@@ -0,0 +1,271 @@
+"""
+Endpoint benchmarks: latency, query count and peak memory per endpoint.
+
+    pytest -m benchmark apps/core/tests/test_bench_endpoints.py
+
+Budgets live in bench_budgets.json next to this file; a measurement above
+its budget fails the test. Query counts are exact (they do not depend on
+the machine); latency is checked on the median with generous headroom, so
+only gross slowdowns fail. Results of the run are written to
+$BENCH_RESULTS (default bench-results.json). After an intended change,
+regenerate the budgets with BENCH_UPDATE_BUDGETS=1 and review the diff.
+
+$BENCH_METRICS (comma separated, default all) restricts the checked budgets:
+CI runs with BENCH_METRICS=queries BENCH_REPEAT=1.
+"""
+
+import os
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from apps.core.bench import (
+    METRICS,
+    budget_from,
+    load_budgets,
+    measure,
+    regressions,
+    results_payload,
+    write_json,
+)
+from apps.inventory.digests import build_expiry_digests
+from apps.inventory.models import (
+    Batch,
+    InventoryLine,
+    InventorySession,
+    Location,
+    LotInstance,
+    LotTemplateItem,
+    Site,
+    StockLine,
+    StockMovement,
+)
+from apps.organizations.models import Membership, Organization, Structure
+
+pytestmark = pytest.mark.benchmark
+
+BUDGETS_PATH = Path(__file__).with_name("bench_budgets.json")
+RESULTS_PATH = Path(os.getenv("BENCH_RESULTS", "bench-results.json"))
+UPDATE_BUDGETS = os.getenv("BENCH_UPDATE_BUDGETS") == "1"
+REPEAT = int(os.getenv("BENCH_REPEAT", "20"))
+CHECKED_METRICS = os.getenv("BENCH_METRICS", ",".join(METRICS)).split(",")
+
+# 40 UL x 10 containers, 40 items per lot: 16k stock lines, 50k movements.
+DATASET = {
+    "structures": 40,
+    "territorials": 4,
+    "containers_per_ul": 10,
+    "items": 400,
+    "items_per_template": 40,
+    "movements": 50_000,
+    "sessions_per_ul": 2,
+    "seed": 1,
+}
+
+
+@pytest.fixture(scope="module")
+def dataset(django_db_setup, django_db_blocker):
+    """
+    Seeded once for the module inside a transaction rolled back at the end.
+    """
+    with django_db_blocker.unblock(), transaction.atomic():
+        user = get_user_model().objects.create_user(email="bench@example.com", password="passw0rd!")
+        superuser = get_user_model().objects.create_superuser(
+            email="bench-admin@example.com", password="passw0rd!"
+        )
+        call_command("seed_scale", member=user.email, verbosity=0, **DATASET)
+        build_expiry_digests()
+        org = Organization.objects.get(slug="crf-scale")
+        ul = Structure.objects.filter(organization=org, level="LOCAL").order_by("id").first()
+        lot = LotInstance.objects.filter(structure=ul).order_by("id").first()
+        session = InventorySession.objects.filter(structure=ul).order_by("id").first()
+        # Seeded sessions are validated; counts go to an open one.
+        open_session = InventorySession.objects.create(structure=ul, container=lot.container)
+        template_item = LotTemplateItem.objects.filter(template=lot.template_id).first()
+        ids = {
+            "org": org.id,
+            "ul": ul.id,
+            "lot": lot.id,
+            "container": lot.container_id,
+            "identifier": lot.container.identifier,
+            "template": lot.template_id,
+            "template_item": template_item.id,
+            "item": template_item.item_id,
+            "site": Site.objects.filter(structure=ul).first().id,
+            "location": Location.objects.filter(site__structure=ul).first().id,
+            "batch": Batch.objects.filter(item__organization=org).first().id,
+            "stock_line": StockLine.objects.filter(structure=ul).first().id,
+            "movement": StockMovement.objects.filter(structure=ul).first().id,
+            "session": session.id,
+            "open_session": open_session.id,
+            "inventory_line": InventoryLine.objects.filter(session=session).first().id,
+            "membership": Membership.objects.get(user=user).id,
+        }
+        yield {"users": {"member": user, "superuser": superuser}, "ids": ids}
+        transaction.set_rollback(True)
+
+
+@pytest.fixture(scope="module")
+def report():
+    measurements = []
+    yield measurements
+    write_json(RESULTS_PATH, results_payload(measurements))
+    if UPDATE_BUDGETS:
+        budgets = load_budgets(BUDGETS_PATH)
+        budgets.update({m.name: budget_from(m) for m in measurements})
+        write_json(BUDGETS_PATH, budgets)
+
+
+def _read(name, path):
+    return (name, "get", path, None, "member")
+
+
+# (name, method, path template, payload builder taking (ids, i), user); paths
+# are formatted with the dataset ids. The member is ADMIN of the national
+# structure; organization writes need a superuser.
+SCENARIOS = [
+    _read("items-list", "/api/v1/items/"),
+    _read("items-detail", "/api/v1/items/{item}/"),
+    _read("sites-list", "/api/v1/sites/"),
+    _read("sites-detail", "/api/v1/sites/{site}/"),
+    _read("locations-list", "/api/v1/locations/"),
+    _read("locations-detail", "/api/v1/locations/{location}/"),
+    _read("containers-list", "/api/v1/containers/"),
+    _read("containers-detail", "/api/v1/containers/{container}/"),
+    _read("lot-templates-list", "/api/v1/lot-templates/"),
+    _read("lot-templates-detail", "/api/v1/lot-templates/{template}/"),
+    _read("lot-template-items-list", "/api/v1/lot-template-items/"),
+    _read("lot-template-items-detail", "/api/v1/lot-template-items/{template_item}/"),
+    _read("lot-instances-list", "/api/v1/lot-instances/"),
+    _read("lot-instances-detail", "/api/v1/lot-instances/{lot}/"),
+    _read("lot-instances-compliance", "/api/v1/lot-instances/{lot}/compliance/"),
+    _read("batches-list", "/api/v1/batches/"),
+    _read("batches-detail", "/api/v1/batches/{batch}/"),
+    _read("stock-lines-list", "/api/v1/stock-lines/"),
+    _read("stock-lines-detail", "/api/v1/stock-lines/{stock_line}/"),
+    _read("stock-lines-expiring", "/api/v1/stock-lines/expiring/?days=60"),
+    _read("stock-lines-export", "/api/v1/stock-lines/export/csv/?structure={ul}"),
+    _read("stock-movements-list", "/api/v1/stock-movements/"),
+    _read("stock-movements-detail", "/api/v1/stock-movements/{movement}/"),
+    _read("inventory-sessions-list", "/api/v1/inventory-sessions/"),
+    _read("inventory-sessions-detail", "/api/v1/inventory-sessions/{session}/"),
+    _read("inventory-lines-list", "/api/v1/inventory-lines/"),
+    _read("inventory-lines-detail", "/api/v1/inventory-lines/{inventory_line}/"),
+    _read("expiry-digests-list", "/api/v1/expiry-digests/"),
+    _read("scan", "/api/v1/scan/{identifier}/?structure={ul}"),
+    _read("sync", "/api/v1/sync/?models=lot_instances,stock_lines&limit=500"),
+    _read("organizations-list", "/api/v1/organizations/"),
+    _read("organizations-detail", "/api/v1/organizations/{org}/"),
+    _read("structures-list", "/api/v1/structures/"),
+    _read("structures-detail", "/api/v1/structures/{ul}/"),
+    _read("memberships-list", "/api/v1/memberships/"),
+    _read("memberships-detail", "/api/v1/memberships/{membership}/"),
+    (
+        "items-create",
+        "post",
+        "/api/v1/items/",
+        lambda ids, i: {"organization": ids["org"], "name": f"Bench item {i}"},
+        "member",
+    ),
+    (
+        "containers-update",
+        "patch",
+        "/api/v1/containers/{container}/",
+        lambda ids, i: {"label": f"Sac {i}"},
+        "member",
+    ),
+    (
+        "lot-instances-update",
+        "patch",
+        "/api/v1/lot-instances/{lot}/",
+        lambda ids, i: {"next_check_due_at": f"2030-01-{1 + i % 28:02d}T08:00:00Z"},
+        "member",
+    ),
+    (
+        "batches-update",
+        "patch",
+        "/api/v1/batches/{batch}/",
+        lambda ids, i: {"expires_at": f"2031-01-{1 + i % 28:02d}"},
+        "member",
+    ),
+    (
+        "stock-movements-create",
+        "post",
+        "/api/v1/stock-movements/",
+        lambda ids, i: {
+            "structure": ids["ul"],
+            "type": "IN",
+            "to_lot": ids["lot"],
+            "item": ids["item"],
+            "quantity": "1",
+        },
+        "member",
+    ),
+    (
+        "inventory-sessions-open",
+        "post",
+        "/api/v1/inventory-sessions/open/",
+        lambda ids, i: {"structure": ids["ul"], "container": ids["container"]},
+        "member",
+    ),
+    (
+        "inventory-lines-bulk",
+        "post",
+        "/api/v1/inventory-sessions/{open_session}/lines/bulk/",
+        lambda ids, i: [{"item": ids["item"], "counted_qty": str(Decimal(i % 7))}],
+        "member",
+    ),
+    (
+        "inventory-lines-update",
+        "patch",
+        "/api/v1/inventory-lines/{inventory_line}/",
+        lambda ids, i: {"counted_qty": str(i % 5)},
+        "member",
+    ),
+    (
+        "structures-update",
+        "patch",
+        "/api/v1/structures/{ul}/",
+        lambda ids, i: {"name": f"Unité locale {i}"},
+        "superuser",
+    ),
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name, method, path, payload, user", SCENARIOS, ids=[scenario[0] for scenario in SCENARIOS]
+)
+def test_bench_endpoint(dataset, report, settings, name, method, path, payload, user):
+    # The dataset was seeded moments ago: let sync hand it out.
+    settings.SYNC_SAFETY_LAG_SECONDS = 0
+    client = APIClient()
+    client.force_authenticate(user=dataset["users"][user])
+    ids = dataset["ids"]
+    url = path.format(**ids)
+    send = getattr(client, method)
+
+    def call(i):
+        if payload is None:
+            return send(url)
+        return send(url, payload(ids, i), format="json")
+
+    measurement = measure(name, method.upper(), url, call, repeat=REPEAT)
+    report.append(measurement)
+    print(
+        f"\n{name}: p50 {measurement.p50_ms} ms, p95 {measurement.p95_ms} ms, "
+        f"{measurement.queries} queries, peak {measurement.peak_kib} KiB"
+    )
+
+    assert measurement.status < 400, f"{name}: HTTP {measurement.status}"
+    budget = load_budgets(BUDGETS_PATH).get(name)
+    if UPDATE_BUDGETS:
+        return
+    assert budget is not None, f"{name}: no budget, run with BENCH_UPDATE_BUDGETS=1"
+    problems = regressions(measurement, budget, CHECKED_METRICS)
+    assert not problems, f"{name} regressed: {'; '.join(problems)}"
@@ -0,0 +1,94 @@
+import logging
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+from rest_framework.test import APIClient
+
+from apps.core.middleware import QueryShapeMiddleware
+from apps.core.queries import NPlusOneError, assert_no_n_plus_one, query_shape
+from apps.inventory.models import Batch, Item
+from apps.organizations.models import Organization
+
+LIST_ROUTES = [
+    "/api/v1/items/",
+    "/api/v1/sites/",
+    "/api/v1/locations/",
+    "/api/v1/containers/",
+    "/api/v1/lot-templates/",
+    "/api/v1/lot-template-items/",
+    "/api/v1/lot-instances/",
+    "/api/v1/batches/",
+    "/api/v1/stock-lines/",
+    "/api/v1/stock-movements/",
+    "/api/v1/inventory-sessions/",
+    "/api/v1/inventory-lines/",
+    "/api/v1/structures/",
+    "/api/v1/memberships/",
+]
+
+
+@pytest.fixture
+def batches():
+    org = Organization.objects.create(name="Organisation", slug="org")
+    for i in range(6):
+        item = Item.objects.create(organization=org, name=f"Article {i}")
+        Batch.objects.create(item=item, lot_number=f"L{i}")
+
+
+def test_query_shape_ignores_in_list_length():
+    one = 'SELECT "id" FROM "t" WHERE "id" IN (%s)'
+    three = 'SELECT "id" FROM "t" WHERE "id" IN (%s, %s, %s)'
+    assert query_shape(one) == query_shape(three) == 'SELECT "id" FROM "t" WHERE "id" IN (...)'
+
+
+@pytest.mark.django_db
+def test_assert_no_n_plus_one_reports_lazy_relations(batches):
+    with pytest.raises(AssertionError, match=r"6x from core/tests/test_queries.py"):
+        with assert_no_n_plus_one():
+            [batch.item.name for batch in Batch.objects.all()]
+
+    with assert_no_n_plus_one() as recorder:
+        [batch.item.name for batch in Batch.objects.select_related("item")]
+    assert recorder.total == 1
+
+
+@pytest.mark.django_db
+def test_middleware_logs_or_raises(batches, caplog):
+    def view(request):
+        return [batch.item.name for batch in Batch.objects.all()]
+
+    request = RequestFactory().get("/api/v1/batches/")
+    with override_settings(QUERY_SHAPE_DETECTOR="log", QUERY_SHAPE_THRESHOLD=5):
+        with caplog.at_level(logging.WARNING, logger="apps.core.middleware"):
+            QueryShapeMiddleware(view)(request)
+    assert "N+1 queries in /api/v1/batches/ (GET /api/v1/batches/), 7 queries" in caplog.text
+
+    with override_settings(QUERY_SHAPE_DETECTOR="raise", QUERY_SHAPE_THRESHOLD=5):
+        with pytest.raises(NPlusOneError):
+            QueryShapeMiddleware(view)(request)
+
+
+@pytest.mark.django_db
+def test_list_endpoints_do_not_repeat_queries():
+    user = get_user_model().objects.create_user(email="n1@example.com", password="passw0rd!")
+    call_command(
+        "seed_scale",
+        structures=3,
+        territorials=1,
+        containers_per_ul=3,
+        items=20,
+        items_per_template=5,
+        movements=100,
+        sessions_per_ul=1,
+        member=user.email,
+        verbosity=0,
+    )
+    client = APIClient()
+    client.force_authenticate(user=user)
+    for route in LIST_ROUTES:
+        with assert_no_n_plus_one(threshold=3):
+            response = client.get(route)
+        assert response.status_code == 200, route
+        assert response.json()["results"], route
@@ -0,0 +1,72 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from apps.inventory.models import InventoryLine, LotInstance, StockLine, StockMovement, Tombstone
+from apps.organizations.models import Structure
+
+SMALL = {
+    "structures": 4,
+    "territorials": 2,
+    "containers_per_ul": 3,
+    "items": 30,
+    "items_per_template": 5,
+    "movements": 500,
+    "sessions_per_ul": 1,
+    "batch_size": 100,
+}
+
+
+def _fingerprint():
+    movements = StockMovement.objects.filter(structure__organization__slug="crf-scale")
+    return (
+        list(movements.order_by("id").values_list("type", "quantity")),
+        StockLine.objects.aggregate(total=Sum("quantity"))["total"],
+    )
+
+
+@pytest.mark.django_db
+def test_seed_scale_builds_a_consistent_dataset():
+    call_command("seed_scale", seed=7, **SMALL)
+
+    uls = Structure.objects.filter(organization__slug="crf-scale", level="LOCAL")
+    assert uls.count() == 4
+    # The closure table was rebuilt: each UL sees its DT and the national level.
+    assert Structure.objects.ancestors_of(uls.first().id).count() == 3
+    assert LotInstance.objects.filter(structure__in=uls).count() == 12
+    assert StockLine.objects.filter(structure__in=uls).count() == 12 * 5
+    assert StockLine.objects.filter(structure=None).count() == 0
+    assert InventoryLine.objects.filter(structure__in=uls).count() == 4 * 5
+    movements = StockMovement.objects.filter(structure__in=uls)
+    assert movements.count() == 500
+    first, last = movements.order_by("id")[0], movements.order_by("-id")[0]
+    assert first.created_at < last.created_at
+    assert LotInstance.objects.exclude(status=LotInstance.Status.READY).exists()
+
+
+@pytest.mark.django_db
+def test_seed_scale_is_deterministic_and_flushes():
+    call_command("seed_scale", seed=7, **SMALL)
+    fingerprint = _fingerprint()
+
+    with pytest.raises(CommandError):
+        call_command("seed_scale", seed=7, **SMALL)
+    call_command("seed_scale", seed=7, flush=True, **SMALL)
+
+    assert _fingerprint() == fingerprint
+    assert Structure.objects.filter(organization__slug="crf-scale").count() == 1 + 2 + 4
+    # The flushed rows are throwaway: no client is told about their deletion.
+    assert not Tombstone.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_seed_scale_rebuilds_deferred_indexes():
+    call_command("seed_scale", seed=7, defer_indexes=True, verbosity=0, **SMALL)
+
+    assert StockMovement.objects.count() == 500
+    with connection.cursor() as cursor:
+        for model in (StockLine, StockMovement, InventoryLine):
+            names = connection.introspection.get_constraints(cursor, model._meta.db_table)
+            assert {index.name for index in model._meta.indexes} <= set(names)
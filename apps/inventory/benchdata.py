@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.organizations.models import Organization, Structure
+
+from .models import Batch, Container, Item, LotInstance, LotTemplate, StockLine
+
+
+@transaction.atomic
+def create_stock_dataset(structures=50, lots=20, items=100, batches=10, seed=42) -> dict[str, Any]:
+    """
+    Throwaway organisation for benchmark commands.
+
+    Every lot holds one stock line per batch, so the dataset has
+    `structures * lots * items * batches` stock lines. Expiry dates spread
+    from two months ago to two years ahead; a third of the lots are overdue
+    for their check.
+    """
+    rng = random.Random(seed)
+    suffix = uuid.uuid4().hex[:8]
+    org = Organization.objects.create(name=f"Bench {suffix}", slug=f"bench-{suffix}")
+    structure_objs = [
+        Structure.objects.create(organization=org, level="LOCAL", name=f"Bench UL {n}")
+        for n in range(structures)
+    ]
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Bench")
+    item_objs = Item.objects.bulk_create(
+        Item(organization=org, name=f"Bench item {n}") for n in range(items)
+    )
+    now = timezone.now()
+    today = timezone.localdate(now)
+    batch_objs = Batch.objects.bulk_create(
+        Batch(
+            item=item,
+            lot_number=f"B{n}",
+            expires_at=today + timedelta(days=rng.randint(-60, 720)),
+        )
+        for item in item_objs
+        for n in range(batches)
+    )
+    lines = 0
+    for structure in structure_objs:
+        containers = Container.objects.bulk_create(
+            Container(structure=structure, type="BAG_INTERVENTION", identifier=f"BENCH-{n}")
+            for n in range(lots)
+        )
+        lot_objs = LotInstance.objects.bulk_create(
+            LotInstance(
+                template=template,
+                container=container,
+                structure=structure,
+                next_check_due_at=now + timedelta(days=rng.randint(-60, 120)),
+            )
+            for container in containers
+        )
+        for lot in lot_objs:
+            created = StockLine.objects.bulk_create(
+                StockLine(
+                    lot_instance=lot,
+                    item_id=batch.item_id,
+                    batch=batch,
+                    structure=structure,
+                    expires_at=batch.expires_at,
+                    quantity=Decimal(rng.randint(0, 5)),
+                )
+                for batch in batch_objs
+            )
+            lines += len(created)
+    return {
+        "org": org,
+        "structure_ids": [structure.id for structure in structure_objs],
+        "lines": lines,
+    }
+
+
+@transaction.atomic
+def drop_stock_dataset(dataset: dict[str, Any]) -> None:
+    StockLine.objects.filter(structure_id__in=dataset["structure_ids"]).delete()
+    Container.objects.filter(structure_id__in=dataset["structure_ids"]).delete()
+    Item.objects.filter(organization=dataset["org"]).delete()
+    LotTemplate.objects.filter(organization=dataset["org"]).delete()
+    Structure.objects.filter(id__in=dataset["structure_ids"]).delete()
+    dataset["org"].delete()
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import models
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import LotInstance, LotTemplateItem, StockLine
+
+ZERO = Decimal("0")
+
+# (lot_instance_id, item_id)
+LotItem = tuple[int, int]
+
+STATUS_FROM_COUNTS = Case(
+    When(missing_count__gt=0, then=Value(LotInstance.Status.INCOMPLETE)),
+    When(expired_count__gt=0, then=Value(LotInstance.Status.EXPIRED)),
+    default=Value(LotInstance.Status.READY),
+)
+
+
+@dataclass
+class ItemCompliance:
+    item: int
+    expected_qty: Decimal = ZERO
+    quantity: Decimal = ZERO
+    expired_qty: Decimal = ZERO
+
+    @property
+    def missing_qty(self) -> Decimal:
+        return max(self.expected_qty - self.quantity, ZERO)
+
+    @property
+    def over_qty(self) -> Decimal:
+        return max(self.quantity - self.expected_qty, ZERO)
+
+
+@dataclass
+class LotCompliance:
+    lot_instance: int
+    items: list[ItemCompliance] = field(default_factory=list)
+
+    @property
+    def missing_count(self) -> int:
+        return sum(1 for item in self.items if item.missing_qty)
+
+    @property
+    def over_count(self) -> int:
+        return sum(1 for item in self.items if item.over_qty)
+
+    @property
+    def expired_count(self) -> int:
+        return sum(1 for item in self.items if item.expired_qty)
+
+    @property
+    def status(self) -> str:
+        if self.missing_count:
+            return LotInstance.Status.INCOMPLETE
+        if self.expired_count:
+            return LotInstance.Status.EXPIRED
+        return LotInstance.Status.READY
+
+
+def _expired_quantity():
+    return Sum("quantity", filter=Q(batch__expires_at__lt=timezone.localdate()), default=ZERO)
+
+
+def compute_compliance(lot_ids) -> dict[int, LotCompliance]:
+    """
+    Compare stock with template expectations for many lots at once.
+
+    Two grouped queries, whatever the number of lots: expected quantities per
+    (lot, item) through the lot's template, and stock sums per (lot, item).
+    Items stocked but absent from the template count as over-stocked.
+    """
+    lot_ids = list(lot_ids)
+    per_lot: dict[int, dict[int, ItemCompliance]] = defaultdict(dict)
+
+    expected = (
+        LotTemplateItem.objects.filter(template__instances__in=lot_ids)
+        .values("item", lot_id=F("template__instances"))
+        .annotate(total=Sum("expected_qty"))
+        .order_by()
+    )
+    for row in expected:
+        per_lot[row["lot_id"]][row["item"]] = ItemCompliance(
+            item=row["item"], expected_qty=row["total"]
+        )
+
+    stocked = (
+        StockLine.objects.filter(lot_instance_id__in=lot_ids)
+        .values("lot_instance_id", "item_id")
+        .annotate(total=Sum("quantity"), expired=_expired_quantity())
+        .order_by()
+    )
+    for row in stocked:
+        items = per_lot[row["lot_instance_id"]]
+        entry = items.setdefault(row["item_id"], ItemCompliance(item=row["item_id"]))
+        entry.quantity = row["total"]
+        entry.expired_qty = row["expired"]
+
+    return {
+        lot_id: LotCompliance(
+            lot_instance=lot_id,
+            items=sorted(per_lot[lot_id].values(), key=lambda item: item.item),
+        )
+        for lot_id in lot_ids
+    }
+
+
+def recompute_lot_compliance(queryset=None, batch_size=1000) -> int:
+    """
+    Recompute status and counters from scratch, chunk by chunk.
+
+    Used nightly (expiry depends on the date) and after template changes;
+    returns the number of lots whose values changed.
+    """
+    queryset = (queryset if queryset is not None else LotInstance.objects.all()).order_by("id")
+    fields = ("status", "missing_count", "expired_count")
+    now = timezone.now()
+    changed = 0
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id).only("id", *fields)[:batch_size])
+        if not chunk:
+            return changed
+        last_id = chunk[-1].id
+        compliance = compute_compliance(lot.id for lot in chunk)
+        stale = []
+        for lot in chunk:
+            result = compliance[lot.id]
+            current = (result.status, result.missing_count, result.expired_count)
+            if current != tuple(getattr(lot, name) for name in fields):
+                lot.status, lot.missing_count, lot.expired_count = current
+                lot.updated_at = now
+                stale.append(lot)
+        LotInstance.objects.bulk_update(stale, [*fields, "updated_at"])
+        changed += len(stale)
+
+
+def _expected_for(pairs: set[LotItem]) -> dict[LotItem, Decimal]:
+    rows = (
+        LotTemplateItem.objects.filter(
+            template__instances__in={lot_id for lot_id, _ in pairs},
+            item_id__in={item_id for _, item_id in pairs},
+        )
+        .values("item", lot_id=F("template__instances"))
+        .annotate(total=Sum("expected_qty"))
+        .order_by()
+    )
+    return {(row["lot_id"], row["item"]): row["total"] for row in rows}
+
+
+def _pair_flags(pairs: set[LotItem], expected: dict[LotItem, Decimal]):
+    """
+    (is_missing, has_expired) for each (lot, item) pair, in one grouped query.
+    """
+    rows = (
+        StockLine.objects.filter(
+            lot_instance_id__in={lot_id for lot_id, _ in pairs},
+            item_id__in={item_id for _, item_id in pairs},
+        )
+        .values("lot_instance_id", "item_id")
+        .annotate(total=Sum("quantity"), expired=_expired_quantity())
+        .order_by()
+    )
+    stock = {
+        (row["lot_instance_id"], row["item_id"]): (row["total"], row["expired"]) for row in rows
+    }
+    flags = {}
+    for pair in pairs:
+        total, expired = stock.get(pair, (ZERO, ZERO))
+        flags[pair] = (total < expected.get(pair, ZERO), expired > 0)
+    return flags
+
+
+def _apply_counter_deltas(deltas: dict[int, list[int]]) -> None:
+    deltas = {lot_id: delta for lot_id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    updates = {}
+    for index, name in enumerate(("missing_count", "expired_count")):
+        whens = [
+            When(id=lot_id, then=Value(delta[index]))
+            for lot_id, delta in deltas.items()
+            if delta[index]
+        ]
+        if whens:
+            updates[name] = F(name) + Case(
+                *whens, default=Value(0), output_field=models.IntegerField()
+            )
+    lots = LotInstance.objects.filter(id__in=deltas)
+    lots.update(**updates)
+    # Separate statement: MySQL would otherwise read the already-updated counters
+    # while other backends read the old ones.
+    lots.update(status=STATUS_FROM_COUNTS, updated_at=timezone.now())
+
+
+@contextmanager
+def track_compliance(pairs):
+    """
+    Keep lot counters in sync with a StockLine change made inside the block.
+
+    Only the given (lot, item) pairs are examined: their missing/expired state
+    is read before and after the change and the difference is added to the
+    lot counters, so the cost does not depend on the size of the lot.
+    """
+    pairs = {pair for pair in pairs if None not in pair}
+    if not pairs:
+        yield
+        return
+    expected = _expected_for(pairs)
+    before = _pair_flags(pairs, expected)
+    yield
+    after = _pair_flags(pairs, expected)
+    deltas: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+    for pair in pairs:
+        lot_id = pair[0]
+        deltas[lot_id][0] += int(after[pair][0]) - int(before[pair][0])
+        deltas[lot_id][1] += int(after[pair][1]) - int(before[pair][1])
+    _apply_counter_deltas(deltas)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.db import bulk_upsert, iter_keyset
+
+from .models import ExpiryDigest, LotInstance, StockLine
+
+DIGEST_FIELDS = [
+    "generated_at",
+    "window_days",
+    "overdue_check_count",
+    "expired_count",
+    "expiring_count",
+    "payload",
+    "updated_at",
+]
+
+
+def build_expiry_digests(days=30, limit=50, chunk_size=5000, now=None) -> int:
+    """
+    Regenerate one ExpiryDigest per structure with something to act on.
+
+    Overdue lot checks and stock expiring within `days` (or already expired)
+    are read with keyset iteration in urgency order, so only `chunk_size` rows
+    are held at a time and each digest keeps its `limit` most urgent entries.
+    Digests of structures with nothing left are removed. Returns the number
+    of digests written.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    horizon = today + timedelta(days=days)
+    digests: dict[int, ExpiryDigest] = {}
+
+    def digest_for(structure_id: int) -> ExpiryDigest:
+        if structure_id not in digests:
+            digests[structure_id] = ExpiryDigest(
+                structure_id=structure_id,
+                generated_at=now,
+                window_days=days,
+                payload={"overdue_checks": [], "expiring_stock": []},
+            )
+        return digests[structure_id]
+
+    overdue = LotInstance.objects.filter(next_check_due_at__lt=now).values(
+        "id",
+        "next_check_due_at",
+        "container_id",
+        "structure_id",
+        identifier=F("container__identifier"),
+    )
+    for row in iter_keyset(overdue, ("next_check_due_at", "id"), chunk_size):
+        digest = digest_for(row["structure_id"])
+        digest.overdue_check_count += 1
+        if len(digest.payload["overdue_checks"]) < limit:
+            digest.payload["overdue_checks"].append(
+                {
+                    "lot_instance": row["id"],
+                    "container": row["container_id"],
+                    "identifier": row["identifier"],
+                    "next_check_due_at": row["next_check_due_at"].isoformat(),
+                }
+            )
+
+    expiring = StockLine.objects.filter(
+        quantity__gt=0, structure__isnull=False, expires_at__lte=horizon
+    ).values(
+        "id",
+        "expires_at",
+        "structure_id",
+        "lot_instance_id",
+        "item_id",
+        "batch_id",
+        "quantity",
+        item_name=F("item__name"),
+    )
+    for row in iter_keyset(expiring, ("expires_at", "id"), chunk_size):
+        digest = digest_for(row["structure_id"])
+        if row["expires_at"] < today:
+            digest.expired_count += 1
+        else:
+            digest.expiring_count += 1
+        if len(digest.payload["expiring_stock"]) < limit:
+            digest.payload["expiring_stock"].append(
+                {
+                    "stock_line": row["id"],
+                    "lot_instance": row["lot_instance_id"],
+                    "item": row["item_id"],
+                    "item_name": row["item_name"],
+                    "batch": row["batch_id"],
+                    "quantity": str(row["quantity"]),
+                    "expires_at": row["expires_at"].isoformat(),
+                }
+            )
+
+    with transaction.atomic():
+        bulk_upsert(
+            ExpiryDigest,
+            list(digests.values()),
+            unique_fields=["structure"],
+            update_fields=DIGEST_FIELDS,
+            batch_size=1000,
+        )
+        ExpiryDigest.objects.exclude(generated_at=now).delete()
+    return len(digests)
@@ -0,0 +1,70 @@
+from django_filters import rest_framework as filters
+
+from .models import (
+    Batch,
+    Container,
+    ExpiryDigest,
+    InventoryLine,
+    InventorySession,
+    LotInstance,
+    StockLine,
+    StockMovement,
+)
+
+# Every filter exposed here must be served by an index: either a foreign key
+# column (indexed by Django) or an index/unique constraint declared in the
+# model Meta. tests/test_filters.py checks the query plans.
+
+
+class StockLineFilter(filters.FilterSet):
+    class Meta:
+        model = StockLine
+        fields = ("lot_instance", "item", "batch")
+
+
+class BatchFilter(filters.FilterSet):
+    expires_after = filters.DateFilter(field_name="expires_at", lookup_expr="gte")
+    expires_before = filters.DateFilter(field_name="expires_at", lookup_expr="lte")
+
+    class Meta:
+        model = Batch
+        fields = ("item",)
+
+
+class ContainerFilter(filters.FilterSet):
+    class Meta:
+        model = Container
+        fields = ("type", "location", "identifier")
+
+
+class LotInstanceFilter(filters.FilterSet):
+    class Meta:
+        model = LotInstance
+        fields = ("template", "container", "status")
+
+
+class StockMovementFilter(filters.FilterSet):
+    created_after = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
+
+    class Meta:
+        model = StockMovement
+        fields = ("type", "item", "structure")
+
+
+class InventorySessionFilter(filters.FilterSet):
+    class Meta:
+        model = InventorySession
+        fields = ("container",)
+
+
+class InventoryLineFilter(filters.FilterSet):
+    class Meta:
+        model = InventoryLine
+        fields = ("session", "item")
+
+
+class ExpiryDigestFilter(filters.FilterSet):
+    class Meta:
+        model = ExpiryDigest
+        fields = ("structure",)
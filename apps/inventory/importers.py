@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import csv
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from apps.core.db import bulk_upsert
+
+from .compliance import recompute_lot_compliance
+from .models import Item, LotInstance, LotTemplate, LotTemplateItem
+
+IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+
+ITEM_COLUMNS = (
+    "name",
+    "sku",
+    "unit",
+    "category",
+    "is_consumable",
+    "requires_expiry",
+    "requires_lot_number",
+    "is_active",
+)
+TEMPLATE_COLUMNS = (
+    "code",
+    "version",
+    "template_name",
+    "group",
+    "item",
+    "sku",
+    "expected_qty",
+    "notes",
+)
+
+_BOOLEANS = {
+    "1": True,
+    "true": True,
+    "yes": True,
+    "oui": True,
+    "vrai": True,
+    "0": False,
+    "false": False,
+    "no": False,
+    "non": False,
+    "faux": False,
+}
+
+
+class ImportFormatError(Exception):
+    """
+    The file cannot be imported at all (unreadable header, missing columns).
+    """
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    error_count: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    def add_error(self, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "error_count": self.error_count,
+            "errors": [{"line": line, "message": message} for line, message in self.errors],
+        }
+
+
+def _read_batches(
+    lines: Iterable[str], known: tuple[str, ...], required: set[str], delimiter: str, size: int
+) -> tuple[set[str], Iterator[list[tuple[int, dict]]]]:
+    """
+    Columns present in the header, and `(line number, row)` batches.
+
+    Only one batch is held in memory, whatever the size of the file.
+    """
+    reader = csv.DictReader(lines, delimiter=delimiter)
+    if reader.fieldnames is None:
+        raise ImportFormatError("Fichier vide.")
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    columns = set(reader.fieldnames) & set(known)
+    missing = sorted(required - columns)
+    if missing:
+        raise ImportFormatError(f"Colonnes manquantes: {', '.join(missing)}.")
+
+    def batches():
+        batch = []
+        for row in reader:
+            batch.append((reader.line_num, row))
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    return columns, batches()
+
+
+def _text(row: dict, column: str, max_length: int, required: bool = False) -> str:
+    value = (row.get(column) or "").strip()
+    if required and not value:
+        raise RowError(f"{column}: valeur obligatoire.")
+    if len(value) > max_length:
+        raise RowError(f"{column}: {max_length} caractères au maximum.")
+    return value
+
+
+def _choice(row: dict, column: str, choices) -> str:
+    value = _text(row, column, 32, required=True).upper()
+    if value not in choices.values:
+        raise RowError(f"{column}: valeur inconnue « {value} ».")
+    return value
+
+
+def _bool(row: dict, column: str, default: bool) -> bool:
+    value = (row.get(column) or "").strip().lower()
+    if not value:
+        return default
+    if value not in _BOOLEANS:
+        raise RowError(f"{column}: booléen attendu, « {value} » reçu.")
+    return _BOOLEANS[value]
+
+
+def _quantity(row: dict, column: str) -> Decimal:
+    value = _text(row, column, 32, required=True).replace(",", ".")
+    try:
+        quantity = Decimal(value)
+    except InvalidOperation:
+        raise RowError(f"{column}: nombre attendu, « {value} » reçu.") from None
+    if not quantity.is_finite() or quantity < 0:
+        raise RowError(f"{column}: doit être positif ou nul.")
+    if quantity.as_tuple().exponent < -2 or quantity >= Decimal("1e8"):
+        raise RowError(f"{column}: 8 chiffres et 2 décimales au maximum.")
+    return quantity
+
+
+def _field_length(model, name: str) -> int:
+    return model._meta.get_field(name).max_length
+
+
+def _item_from_row(organization, row: dict) -> Item:
+    return Item(
+        organization=organization,
+        name=_text(row, "name", _field_length(Item, "name"), required=True),
+        sku=_text(row, "sku", _field_length(Item, "sku")),
+        unit=_text(row, "unit", _field_length(Item, "unit")),
+        category=_text(row, "category", _field_length(Item, "category")),
+        is_consumable=_bool(row, "is_consumable", True),
+        requires_expiry=_bool(row, "requires_expiry", False),
+        requires_lot_number=_bool(row, "requires_lot_number", False),
+        is_active=_bool(row, "is_active", True),
+    )
+
+
+@transaction.atomic
+def import_items(
+    organization, lines: Iterable[str], delimiter: str = ",", batch_size: int = IMPORT_BATCH_SIZE
+) -> ImportReport:
+    """
+    Insert or update catalogue items keyed on (organization, name).
+
+    Columns missing from the header are left untouched on existing items;
+    invalid rows are reported and skipped, the others are upserted one
+    statement per batch.
+    """
+    columns, batches = _read_batches(lines, ITEM_COLUMNS, {"name"}, delimiter, batch_size)
+    update_fields = [name for name in ITEM_COLUMNS if name in columns and name != "name"]
+    report = ImportReport()
+    for batch in batches:
+        items: dict[str, Item] = {}
+        for line, row in batch:
+            report.rows += 1
+            try:
+                item = _item_from_row(organization, row)
+            except RowError as exc:
+                report.add_error(line, str(exc))
+                continue
+            items[item.name] = item  # a repeated name: the last row wins
+            report.imported += 1
+        if items:
+            bulk_upsert(
+                Item,
+                list(items.values()),
+                unique_fields=["organization", "name"],
+                update_fields=[*update_fields, "updated_at"],
+            )
+    return report
+
+
+def _resolve_items(organization, rows: list[tuple[int, dict]]) -> tuple[dict, dict, set]:
+    """
+    Item ids by name and by SKU for a batch, in two queries; SKUs shared by
+    several items are returned as ambiguous.
+    """
+    names = {(row.get("item") or "").strip() for _line, row in rows} - {""}
+    skus = {(row.get("sku") or "").strip() for _line, row in rows} - {""}
+    items = Item.objects.filter(organization=organization)
+    by_name = dict(items.filter(name__in=names).values_list("name", "id")) if names else {}
+    by_sku: dict[str, int] = {}
+    ambiguous: set[str] = set()
+    for sku, item_id in items.filter(sku__in=skus).values_list("sku", "id") if skus else ():
+        if sku in by_sku:
+            ambiguous.add(sku)
+        by_sku[sku] = item_id
+    return by_name, by_sku, ambiguous
+
+
+def _upsert_templates(organization, templates: dict[tuple[str, str], str]) -> dict:
+    """
+    Create the (code, version) templates of a batch and rename those given a
+    name; returns their ids.
+    """
+    named = [
+        LotTemplate(organization=organization, code=code, version=version, name=name)
+        for (code, version), name in templates.items()
+        if name
+    ]
+    if named:
+        bulk_upsert(
+            LotTemplate,
+            named,
+            unique_fields=["organization", "code", "version"],
+            update_fields=["name", "updated_at"],
+        )
+    LotTemplate.objects.bulk_create(
+        [
+            LotTemplate(
+                organization=organization,
+                code=code,
+                version=version,
+                name=LotTemplate.Code(code).label,
+            )
+            for (code, version), name in templates.items()
+            if not name
+        ],
+        ignore_conflicts=True,
+    )
+    rows = LotTemplate.objects.filter(
+        organization=organization,
+        code__in={code for code, _version in templates},
+        version__in={version for _code, version in templates},
+    ).values_list("code", "version", "id")
+    return {
+        (code, version): template_id
+        for code, version, template_id in rows
+        if (code, version) in templates
+    }
+
+
+@transaction.atomic
+def import_lot_templates(
+    organization, lines: Iterable[str], delimiter: str = ",", batch_size: int = IMPORT_BATCH_SIZE
+) -> ImportReport:
+    """
+    Insert or update template recipes, one row per expected item.
+
+    Templates are keyed on (organization, code, version) and created on first
+    sight; their items on (template, group, item), with the item looked up by
+    name, or by SKU when the name is blank. Lots built from the imported
+    templates have their compliance recomputed once at the end.
+    """
+    columns, batches = _read_batches(
+        lines, TEMPLATE_COLUMNS, {"code", "group", "expected_qty"}, delimiter, batch_size
+    )
+    if not columns & {"item", "sku"}:
+        raise ImportFormatError("Colonnes manquantes: item ou sku.")
+    update_fields = ["expected_qty", "notes"] if "notes" in columns else ["expected_qty"]
+    report = ImportReport()
+    template_ids: set[int] = set()
+    for batch in batches:
+        by_name, by_sku, ambiguous = _resolve_items(organization, batch)
+        parsed = []
+        templates: dict[tuple[str, str], str] = {}
+        for line, row in batch:
+            report.rows += 1
+            try:
+                key = (
+                    _choice(row, "code", LotTemplate.Code),
+                    _text(row, "version", _field_length(LotTemplate, "version")),
+                )
+                name = _text(row, "template_name", _field_length(LotTemplate, "name"))
+                item_name, sku = (row.get("item") or "").strip(), (row.get("sku") or "").strip()
+                if item_name:
+                    item_id = by_name.get(item_name)
+                elif sku in ambiguous:
+                    raise RowError(f"sku: « {sku} » désigne plusieurs articles.")
+                else:
+                    item_id = by_sku.get(sku)
+                if item_id is None:
+                    raise RowError(f"Article introuvable: « {item_name or sku} ».")
+                template_item = LotTemplateItem(
+                    group=_choice(row, "group", LotTemplateItem.Group),
+                    item_id=item_id,
+                    expected_qty=_quantity(row, "expected_qty"),
+                    notes=_text(row, "notes", _field_length(LotTemplateItem, "notes")),
+                )
+            except RowError as exc:
+                report.add_error(line, str(exc))
+                continue
+            templates[key] = name or templates.get(key, "")
+            parsed.append((key, template_item))
+            report.imported += 1
+        if not parsed:
+            continue
+
+        ids = _upsert_templates(organization, templates)
+        template_items = {}
+        for key, template_item in parsed:
+            template_item.template_id = ids[key]
+            template_items[(ids[key], template_item.group, template_item.item_id)] = template_item
+        bulk_upsert(
+            LotTemplateItem,
+            list(template_items.values()),
+            unique_fields=["template", "group", "item"],
+            update_fields=[*update_fields, "updated_at"],
+        )
+        template_ids.update(ids.values())
+
+    if template_ids:
+        recompute_lot_compliance(LotInstance.objects.filter(template_id__in=template_ids))
+    return report
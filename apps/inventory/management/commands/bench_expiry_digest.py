@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.bench import percentile
+from apps.inventory.benchdata import create_stock_dataset, drop_stock_dataset
+from apps.inventory.digests import build_expiry_digests
+from apps.inventory.models import ExpiryDigest
+
+
+class Command(BaseCommand):
+    help = "Benchmark build_expiry_digest runtime and peak Python memory on a generated dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--structures", type=int, default=50)
+        parser.add_argument("--lots", type=int, default=20, help="Lots per structure.")
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--batches", type=int, default=10, help="Batches per item.")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=3, help="Digest rebuilds to time.")
+        parser.add_argument("--budget-mb", type=float, default=64.0, help="Peak memory budget.")
+        parser.add_argument("--keep", action="store_true", help="Keep benchmark data.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started = time.perf_counter()
+        dataset = create_stock_dataset(
+            structures=options["structures"],
+            lots=options["lots"],
+            items=options["items"],
+            batches=options["batches"],
+        )
+        self.stdout.write(
+            f"lines={dataset['lines']} created in {time.perf_counter() - started:.1f}s"
+        )
+        try:
+            timings = []
+            peak = 0
+            for _ in range(options["repeat"]):
+                tracemalloc.start()
+                begin = time.perf_counter()
+                written = build_expiry_digests(chunk_size=options["chunk_size"])
+                timings.append(time.perf_counter() - begin)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            peak_mb = peak / 1024 / 1024
+            self.stdout.write(
+                f"digests={written} p50={percentile(timings, 50):.2f}s "
+                f"p95={percentile(timings, 95):.2f}s peak={peak_mb:.1f}MB "
+                f"chunk_size={options['chunk_size']}"
+            )
+            if peak_mb > options["budget_mb"]:
+                raise CommandError(f"Peak {peak_mb:.1f}MB over budget {options['budget_mb']}MB.")
+            self.stdout.write(self.style.SUCCESS("✅ Expiry digest within memory budget."))
+        finally:
+            if not options["keep"]:
+                ExpiryDigest.objects.filter(structure_id__in=dataset["structure_ids"]).delete()
+                drop_stock_dataset(dataset)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.bench import percentile
+from apps.inventory.benchdata import create_stock_dataset, drop_stock_dataset
+from apps.inventory.views import StockLineViewSet
+from apps.organizations.models import Membership
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the stock expiry radar endpoint (first page, 30-day window, one structure) "
+        "on a generated dataset, pagination and serialization included."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--structures", type=int, default=50)
+        parser.add_argument("--lots", type=int, default=20, help="Lots per structure.")
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--batches", type=int, default=10, help="Batches per item.")
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--budget-ms", type=float, default=50.0, help="p95 budget.")
+        parser.add_argument("--keep", action="store_true", help="Keep benchmark data.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started = time.perf_counter()
+        dataset = create_stock_dataset(
+            structures=options["structures"],
+            lots=options["lots"],
+            items=options["items"],
+            batches=options["batches"],
+        )
+        user = get_user_model().objects.create_user(
+            email=f"bench-{uuid.uuid4().hex[:8]}@example.com", password=None
+        )
+        Membership.objects.bulk_create(
+            Membership(user=user, structure_id=structure_id, role=Membership.Role.VIEWER)
+            for structure_id in dataset["structure_ids"]
+        )
+        self.stdout.write(
+            f"lines={dataset['lines']} created in {time.perf_counter() - started:.1f}s"
+        )
+        try:
+            view = StockLineViewSet.as_view({"get": "expiring"})
+            factory = APIRequestFactory()
+            # Next links are absolute: the host must pass ALLOWED_HOSTS.
+            host = next((h for h in settings.ALLOWED_HOSTS if "*" not in h), "localhost")
+            timings = []
+            for n in range(options["repeat"]):
+                structure_id = dataset["structure_ids"][n % len(dataset["structure_ids"])]
+                request = factory.get(
+                    "/api/v1/stock-lines/expiring/",
+                    {"structure": structure_id, "days": 30},
+                    HTTP_HOST=host.lstrip("."),
+                )
+                force_authenticate(request, user=user)
+                begin = time.perf_counter()
+                response = view(request).render()
+                timings.append((time.perf_counter() - begin) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"HTTP {response.status_code}: {response.content[:200]}")
+            p50, p95 = percentile(timings, 50), percentile(timings, 95)
+            self.stdout.write(f"expiring page: p50={p50:.2f}ms p95={p95:.2f}ms")
+            if p95 > options["budget_ms"]:
+                raise CommandError(f"p95 {p95:.2f}ms over budget {options['budget_ms']}ms.")
+            self.stdout.write(self.style.SUCCESS("✅ Expiry radar within budget."))
+        finally:
+            if not options["keep"]:
+                user.delete()
+                drop_stock_dataset(dataset)
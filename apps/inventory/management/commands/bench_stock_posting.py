@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from decimal import Decimal
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from apps.core.bench import percentile
+from apps.inventory.models import (
+    Container,
+    Item,
+    LotInstance,
+    LotTemplate,
+    StockLine,
+    StockMovement,
+)
+from apps.inventory.services import post_movement
+from apps.organizations.models import Organization, Structure
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark stock posting throughput with N concurrent workers on the same lot. "
+        "Needs a server database (MySQL): in-memory SQLite is not shared between threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--movements", type=int, default=500, help="Movements per worker.")
+        parser.add_argument("--max-retries", type=int, default=5)
+        parser.add_argument("--keep", action="store_true", help="Keep benchmark data.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if connection.vendor == "sqlite" and connection.settings_dict["NAME"] == ":memory:":
+            raise CommandError("bench_stock_posting needs a shared database, not :memory:.")
+
+        workers = options["workers"]
+        per_worker = options["movements"]
+        fixture = self._create_fixture()
+        retries = [0] * workers
+        # Per-movement latencies in ms, lock waits and retries included.
+        timings: list[list[float]] = [[] for _ in range(workers)]
+        failures: list[BaseException] = []
+
+        def run(index: int) -> None:
+            try:
+                for n in range(per_worker):
+                    # Alternate IN/OUT so every worker fights for the same StockLine row.
+                    type_ = StockMovement.Type.IN if n % 2 == 0 else StockMovement.Type.OUT
+                    begin = time.perf_counter()
+                    retries[index] += self._post_with_retry(fixture, type_, options["max_retries"])
+                    timings[index].append((time.perf_counter() - begin) * 1000)
+            except BaseException as exc:  # surfaced after join()
+                failures.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            if failures:
+                raise CommandError(f"Worker failed: {failures[0]!r}")
+            total = workers * per_worker
+            expected = (
+                fixture["initial"]
+                + sum((1 if n % 2 == 0 else -1) for n in range(per_worker)) * workers
+            )
+            line = StockLine.objects.get(lot_instance=fixture["lot"], item=fixture["item"])
+            consistent = line.quantity == expected
+            latencies = [ms for worker in timings for ms in worker]
+            self.stdout.write(
+                f"workers={workers} movements={total} elapsed={elapsed:.2f}s "
+                f"throughput={total / elapsed:.0f} mvt/s "
+                f"p50={percentile(latencies, 50):.2f}ms p95={percentile(latencies, 95):.2f}ms "
+                f"retries={sum(retries)} final_qty={line.quantity} expected={expected}"
+            )
+            if not consistent:
+                raise CommandError("Final StockLine quantity does not match posted movements.")
+            self.stdout.write(self.style.SUCCESS("✅ Stock ledger consistent."))
+        finally:
+            if not options["keep"]:
+                self._drop_fixture(fixture)
+
+    def _post_with_retry(self, fixture: dict[str, Any], type_: str, max_retries: int) -> int:
+        for attempt in range(max_retries + 1):
+            try:
+                with transaction.atomic():
+                    movement = StockMovement.objects.create(
+                        structure=fixture["structure"],
+                        type=type_,
+                        from_lot=fixture["lot"] if type_ == StockMovement.Type.OUT else None,
+                        to_lot=fixture["lot"] if type_ == StockMovement.Type.IN else None,
+                        item=fixture["item"],
+                        quantity=Decimal("1"),
+                        reason="bench",
+                    )
+                    post_movement(movement)
+                return attempt
+            except OperationalError:
+                # Deadlock / lock wait timeout: the transaction was rolled back, retry it.
+                if attempt == max_retries:
+                    raise
+        return max_retries
+
+    def _create_fixture(self) -> dict[str, Any]:
+        suffix = uuid.uuid4().hex[:8]
+        org = Organization.objects.create(name=f"Bench {suffix}", slug=f"bench-{suffix}")
+        structure = Structure.objects.create(organization=org, level="LOCAL", name="Bench UL")
+        container = Container.objects.create(
+            structure=structure, type="BAG_INTERVENTION", identifier=f"BENCH-{suffix}"
+        )
+        template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Bench")
+        lot = LotInstance.objects.create(template=template, container=container)
+        item = Item.objects.create(organization=org, name="Bench item")
+        initial = Decimal("1000")
+        StockLine.objects.create(lot_instance=lot, item=item, quantity=initial)
+        return {
+            "org": org,
+            "structure": structure,
+            "container": container,
+            "lot": lot,
+            "item": item,
+            "initial": initial,
+        }
+
+    def _drop_fixture(self, fixture: dict[str, Any]) -> None:
+        StockMovement.objects.filter(structure=fixture["structure"]).delete()
+        fixture["container"].delete()
+        Item.objects.filter(organization=fixture["org"]).delete()
+        LotTemplate.objects.filter(organization=fixture["org"]).delete()
+        fixture["structure"].delete()
+        fixture["org"].delete()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from apps.core.bench import percentile
+from apps.inventory.benchdata import create_stock_dataset, drop_stock_dataset
+from apps.inventory.models import LotInstance, StockLine
+
+# model -> (scoping path before denormalization, path now)
+SCOPING_PATHS = {
+    StockLine: ("lot_instance__container__structure", "structure"),
+    LotInstance: ("container__structure", "structure"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare query plans and latency of structure-scoped list queries through joins "
+        "versus the denormalized structure column."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--structures", type=int, default=50)
+        parser.add_argument("--lots", type=int, default=20, help="Lots per structure.")
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--batches", type=int, default=10, help="Batches per item.")
+        parser.add_argument(
+            "--scope", type=int, nargs="+", default=[1, 3], help="Structures visible to the user."
+        )
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--keep", action="store_true", help="Keep benchmark data.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        dataset = create_stock_dataset(
+            structures=options["structures"],
+            lots=options["lots"],
+            items=options["items"],
+            batches=options["batches"],
+        )
+        self.stdout.write(f"lines={dataset['lines']}")
+        try:
+            for size, (model, paths) in (
+                (size, item) for size in options["scope"] for item in SCOPING_PATHS.items()
+            ):
+                scope = dataset["structure_ids"][:size]
+                for path in paths:
+                    queryset = model.objects.filter(**{f"{path}__in": scope}).order_by(
+                        "created_at", "id"
+                    )[:51]
+                    timings = self._time(queryset, options["repeat"])
+                    self.stdout.write(
+                        f"{model.__name__} scope={size} via {path}: "
+                        f"p50={percentile(timings, 50):.2f}ms p95={percentile(timings, 95):.2f}ms"
+                    )
+                    for line in queryset.explain().splitlines():
+                        self.stdout.write(f"    {line}")
+            self.stdout.write(self.style.SUCCESS("✅ Scoping benchmark done."))
+        finally:
+            if not options["keep"]:
+                drop_stock_dataset(dataset)
+
+    def _time(self, queryset, repeat: int) -> list[float]:
+        timings = []
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - begin) * 1000)
+        return timings
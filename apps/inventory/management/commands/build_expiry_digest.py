@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory.digests import build_expiry_digests
+
+
+class Command(BaseCommand):
+    help = "Regenerate per-structure digests of overdue lot checks and expiring stock (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Expiry window in days.")
+        parser.add_argument("--limit", type=int, default=50, help="Entries kept per list.")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        written = build_expiry_digests(
+            days=options["days"], limit=options["limit"], chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Synthèses de péremption générées: {written}."))
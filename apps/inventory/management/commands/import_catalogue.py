@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.importers import ImportFormatError, import_items, import_lot_templates
+from apps.organizations.models import Organization
+
+IMPORTERS = {"items": import_items, "templates": import_lot_templates}
+
+
+class Command(BaseCommand):
+    help = "Import catalogue items or lot template recipes from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(IMPORTERS))
+        parser.add_argument("path", help="CSV file (UTF-8, header on the first line).")
+        parser.add_argument("--organization", required=True, help="Organization slug.")
+        parser.add_argument("--delimiter", default=",", choices=[",", ";"])
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            organization = Organization.objects.get(slug=options["organization"])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organisation inconnue: {options['organization']}.") from None
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as lines:
+                report = IMPORTERS[options["kind"]](
+                    organization, lines, delimiter=options["delimiter"]
+                )
+        except (OSError, ImportFormatError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        for line, message in report.errors:
+            self.stderr.write(f"Ligne {line}: {message}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"... {report.error_count - len(report.errors)} autres erreurs.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {report.imported}/{report.rows} lignes importées "
+                f"({report.error_count} en erreur)."
+            )
+        )
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.inventory.tombstones import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete deletion tombstones older than the sync retention window, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.TOMBSTONE_RETENTION_DAYS)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        before = timezone.now() - timedelta(days=options["days"])
+        deleted = prune_tombstones(before, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Tombstones supprimées: {deleted}."))
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory.compliance import recompute_lot_compliance
+
+
+class Command(BaseCommand):
+    help = "Recompute LotInstance status and missing/expired counters from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        changed = recompute_lot_compliance(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Statuts de lots recalculés: {changed} modifiés."))
@@ -0,0 +1,69 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0001_initial"),
+        ("organizations", "0002_cursor_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="batch",
+            index=models.Index(fields=["created_at", "id"], name="inventory_b_created_5fe6d2_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="container",
+            index=models.Index(fields=["created_at", "id"], name="inventory_c_created_e1d752_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryline",
+            index=models.Index(fields=["created_at", "id"], name="inventory_i_created_44c0f5_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="inventorysession",
+            index=models.Index(fields=["created_at", "id"], name="inventory_i_created_4b322d_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(fields=["created_at", "id"], name="inventory_i_created_2b3b57_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="location",
+            index=models.Index(fields=["created_at", "id"], name="inventory_l_created_76a0d6_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="lotinstance",
+            index=models.Index(fields=["created_at", "id"], name="inventory_l_created_f9775e_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="lottemplate",
+            index=models.Index(fields=["created_at", "id"], name="inventory_l_created_7790d5_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="lottemplateitem",
+            index=models.Index(fields=["created_at", "id"], name="inventory_l_created_465a4f_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="site",
+            index=models.Index(fields=["created_at", "id"], name="inventory_s_created_7510f6_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="stockline",
+            index=models.Index(fields=["created_at", "id"], name="inventory_s_created_e572c0_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="stockmovement",
+            index=models.Index(fields=["created_at", "id"], name="inventory_s_created_36aee8_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="stockmovement",
+            index=models.Index(
+                fields=["structure", "created_at"], name="inventory_s_structu_405237_idx"
+            ),
+        ),
+    ]
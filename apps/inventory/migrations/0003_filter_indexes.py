@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0002_cursor_pagination_indexes"),
+        ("organizations", "0002_cursor_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="batch",
+            index=models.Index(fields=["expires_at"], name="inventory_b_expires_c76739_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="container",
+            index=models.Index(fields=["type"], name="inventory_c_type_a2eb34_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="container",
+            index=models.Index(fields=["identifier"], name="inventory_c_identif_2703fc_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="stockmovement",
+            index=models.Index(fields=["type", "created_at"], name="inventory_s_type_ad780b_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="stockmovement",
+            index=models.Index(
+                fields=["item", "created_at"], name="inventory_s_item_id_a9fe64_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0003_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="lotinstance",
+            name="status",
+            field=models.CharField(
+                choices=[("READY", "Complet"), ("INCOMPLETE", "Incomplet")],
+                default="READY",
+                max_length=32,
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0004_lot_instance_status_choices"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lotinstance",
+            name="expired_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="lotinstance",
+            name="missing_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="lotinstance",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("READY", "Complet"),
+                    ("INCOMPLETE", "Incomplet"),
+                    ("EXPIRED", "Produits périmés"),
+                ],
+                default="READY",
+                max_length=32,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lotinstance",
+            index=models.Index(fields=["status"], name="inventory_l_status_3e3bf1_idx"),
+        ),
+    ]
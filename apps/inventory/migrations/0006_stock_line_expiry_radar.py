@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_structure_and_expiry(apps, schema_editor):
+    StockLine = apps.get_model("inventory", "StockLine")
+    LotInstance = apps.get_model("inventory", "LotInstance")
+    Batch = apps.get_model("inventory", "Batch")
+    StockLine.objects.update(
+        structure_id=Subquery(
+            LotInstance.objects.filter(pk=OuterRef("lot_instance_id")).values(
+                "container__structure_id"
+            )[:1]
+        ),
+        expires_at=Subquery(Batch.objects.filter(pk=OuterRef("batch_id")).values("expires_at")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0005_lot_compliance_counters"),
+        ("organizations", "0003_structure_closure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stockline",
+            name="expires_at",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="stockline",
+            name="structure",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="stock_lines",
+                to="organizations.structure",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stockline",
+            index=models.Index(
+                fields=["structure", "expires_at", "id"], name="inventory_s_structu_fc0053_idx"
+            ),
+        ),
+        migrations.RunPython(copy_structure_and_expiry, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0006_stock_line_expiry_radar"),
+        ("organizations", "0003_structure_closure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExpiryDigest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("generated_at", models.DateTimeField()),
+                ("window_days", models.PositiveSmallIntegerField()),
+                ("overdue_check_count", models.PositiveIntegerField(default=0)),
+                ("expired_count", models.PositiveIntegerField(default=0)),
+                ("expiring_count", models.PositiveIntegerField(default=0)),
+                ("payload", models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="lotinstance",
+            index=models.Index(
+                fields=["next_check_due_at", "id"], name="inventory_l_next_ch_d473bb_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stockline",
+            index=models.Index(fields=["expires_at", "id"], name="inventory_s_expires_860358_idx"),
+        ),
+        migrations.AddField(
+            model_name="expirydigest",
+            name="structure",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="expiry_digest",
+                to="organizations.structure",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="expirydigest",
+            index=models.Index(fields=["created_at", "id"], name="inventory_e_created_0fb93d_idx"),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_structure(apps, schema_editor):
+    Container = apps.get_model("inventory", "Container")
+    InventorySession = apps.get_model("inventory", "InventorySession")
+    LotInstance = apps.get_model("inventory", "LotInstance")
+    InventoryLine = apps.get_model("inventory", "InventoryLine")
+    LotInstance.objects.update(
+        structure_id=Subquery(
+            Container.objects.filter(pk=OuterRef("container_id")).values("structure_id")[:1]
+        )
+    )
+    InventoryLine.objects.update(
+        structure_id=Subquery(
+            InventorySession.objects.filter(pk=OuterRef("session_id")).values("structure_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0007_expiry_digest"),
+        ("organizations", "0003_structure_closure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inventoryline",
+            name="structure",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="inventory_lines",
+                to="organizations.structure",
+            ),
+        ),
+        migrations.AddField(
+            model_name="lotinstance",
+            name="structure",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="lots",
+                to="organizations.structure",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryline",
+            index=models.Index(
+                fields=["structure", "created_at", "id"], name="inventory_i_structu_e3080f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lotinstance",
+            index=models.Index(
+                fields=["structure", "created_at", "id"], name="inventory_l_structu_bbd87a_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stockline",
+            index=models.Index(
+                fields=["structure", "created_at", "id"], name="inventory_s_structu_397257_idx"
+            ),
+        ),
+        migrations.RunPython(copy_structure, migrations.RunPython.noop),
+    ]
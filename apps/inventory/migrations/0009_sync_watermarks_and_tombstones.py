@@ -0,0 +1,115 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0008_structure_denormalization"),
+        ("organizations", "0003_structure_closure"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("model", models.CharField(max_length=32)),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="batch",
+            index=models.Index(fields=["updated_at", "id"], name="inventory_b_updated_6ef450_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="container",
+            index=models.Index(
+                fields=["structure", "updated_at", "id"], name="inventory_c_structu_e684f7_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryline",
+            index=models.Index(
+                fields=["structure", "updated_at", "id"], name="inventory_i_structu_5c69a3_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventorysession",
+            index=models.Index(
+                fields=["structure", "updated_at", "id"], name="inventory_i_structu_77a095_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(fields=["updated_at", "id"], name="inventory_i_updated_a1c89e_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="location",
+            index=models.Index(fields=["updated_at", "id"], name="inventory_l_updated_10e2aa_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="lotinstance",
+            index=models.Index(
+                fields=["structure", "updated_at", "id"], name="inventory_l_structu_a8bb86_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lottemplate",
+            index=models.Index(fields=["updated_at", "id"], name="inventory_l_updated_f61594_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="lottemplateitem",
+            index=models.Index(fields=["updated_at", "id"], name="inventory_l_updated_1dc3df_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="site",
+            index=models.Index(
+                fields=["structure", "updated_at", "id"], name="inventory_s_structu_e7a328_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stockline",
+            index=models.Index(
+                fields=["structure", "updated_at", "id"], name="inventory_s_structu_0e05f9_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stockmovement",
+            index=models.Index(
+                fields=["structure", "updated_at", "id"], name="inventory_s_structu_2c8607_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="tombstone",
+            name="structure",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="organizations.structure",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["structure", "deleted_at", "id"], name="inventory_t_structu_cb3cf9_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(fields=["deleted_at", "id"], name="inventory_t_deleted_fe4723_idx"),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:16
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    """
+    Fold batch-less duplicates into their oldest line before the constraint exists.
+    """
+    StockLine = apps.get_model("inventory", "StockLine")
+    duplicates = (
+        StockLine.objects.filter(batch__isnull=True)
+        .values("lot_instance_id", "item_id")
+        .annotate(rows=Count("id"), keep=Min("id"), total=Sum("quantity"))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        lines = StockLine.objects.filter(
+            lot_instance_id=row["lot_instance_id"], item_id=row["item_id"], batch__isnull=True
+        )
+        lines.exclude(id=row["keep"]).delete()
+        lines.filter(id=row["keep"]).update(quantity=row["total"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0009_sync_watermarks_and_tombstones"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="stockline",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("batch__isnull", True)),
+                fields=("lot_instance", "item"),
+                name="uniq_stockline_per_lot_item_without_batch",
+            ),
+        ),
+    ]
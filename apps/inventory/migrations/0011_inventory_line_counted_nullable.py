@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0010_stock_line_unique_without_batch"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="inventoryline",
+            name="counted_qty",
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
@@ -0,0 +1,70 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+ZERO = Decimal("0")
+
+
+def backfill_lot_compliance(apps, schema_editor):
+    """
+    Fill the counters added in 0005 for lots created before them, with the
+    same two grouped queries per chunk as recompute_lot_compliance().
+    """
+    LotInstance = apps.get_model("inventory", "LotInstance")
+    LotTemplateItem = apps.get_model("inventory", "LotTemplateItem")
+    StockLine = apps.get_model("inventory", "StockLine")
+    today = timezone.localdate()
+    last_id = 0
+    while True:
+        chunk = list(
+            LotInstance.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "status", "missing_count", "expired_count")[:1000]
+        )
+        if not chunk:
+            return
+        last_id = chunk[-1].id
+        lot_ids = [lot.id for lot in chunk]
+        # (lot, item) -> [expected, quantity, expired]
+        pairs = defaultdict(lambda: [ZERO, ZERO, ZERO])
+        for row in (
+            LotTemplateItem.objects.filter(template__instances__in=lot_ids)
+            .values("item", lot_id=F("template__instances"))
+            .annotate(total=Sum("expected_qty"))
+            .order_by()
+        ):
+            pairs[row["lot_id"], row["item"]][0] = row["total"]
+        for row in (
+            StockLine.objects.filter(lot_instance_id__in=lot_ids)
+            .values("lot_instance_id", "item_id")
+            .annotate(
+                total=Sum("quantity"),
+                expired=Sum("quantity", filter=Q(batch__expires_at__lt=today), default=ZERO),
+            )
+            .order_by()
+        ):
+            pair = pairs[row["lot_instance_id"], row["item_id"]]
+            pair[1], pair[2] = row["total"], row["expired"]
+        missing, expired = defaultdict(int), defaultdict(int)
+        for (lot_id, _item_id), (expected_qty, quantity, expired_qty) in pairs.items():
+            missing[lot_id] += expected_qty > quantity
+            expired[lot_id] += expired_qty > 0
+        for lot in chunk:
+            lot.missing_count, lot.expired_count = missing[lot.id], expired[lot.id]
+            lot.status = (
+                "INCOMPLETE" if lot.missing_count else "EXPIRED" if lot.expired_count else "READY"
+            )
+        LotInstance.objects.bulk_update(chunk, ["status", "missing_count", "expired_count"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0011_inventory_line_counted_nullable"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_lot_compliance, migrations.RunPython.noop),
+    ]
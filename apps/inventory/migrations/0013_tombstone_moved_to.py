@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-17 04:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0012_backfill_lot_compliance"),
+        ("organizations", "0003_structure_closure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tombstone",
+            name="moved_to",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="organizations.structure",
+            ),
+        ),
+    ]
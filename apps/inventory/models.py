@@ -1,14 +1,19 @@
 # apps/inventory/models.py
 from __future__ import annotations
 
+from contextlib import nullcontext
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
+from django.utils import timezone
 
 from apps.organizations.models import Organization, Structure
 
+from .tombstones import TombstoneModel, record_scope_exit
+
 
-class TimeStampedModel(models.Model):
+class TimeStampedModel(TombstoneModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -38,6 +43,8 @@ class Item(TimeStampedModel):
         indexes = [
             models.Index(fields=["organization", "name"]),
             models.Index(fields=["organization", "sku"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["updated_at", "id"]),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -60,11 +67,37 @@ class Site(TimeStampedModel):
     address = models.TextField(blank=True, default="")
 
     class Meta:
-        indexes = [models.Index(fields=["structure", "name"])]
+        indexes = [
+            models.Index(fields=["structure", "name"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["structure", "updated_at", "id"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.structure_id} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        moved = False
+        if not self._state.adding and (update_fields is None or "structure" in update_fields):
+            previous_structure_id = (
+                Site.objects.filter(pk=self.pk).values_list("structure_id", flat=True).first()
+            )
+            moved = previous_structure_id != self.structure_id
+        with transaction.atomic() if moved else nullcontext():
+            super().save(*args, **kwargs)
+            if moved:
+                # Les emplacements changent de structure avec le site.
+                record_scope_exit(
+                    previous_structure_id,
+                    self.structure_id,
+                    {
+                        "sites": [self.pk],
+                        "locations": self.locations.values_list("id", flat=True),
+                    },
+                )
+                self.locations.update(updated_at=timezone.now())
+
 
 class Location(TimeStampedModel):
     """
@@ -79,11 +112,37 @@ class Location(TimeStampedModel):
         constraints = [
             models.UniqueConstraint(fields=["site", "name"], name="uniq_location_name_per_site"),
         ]
-        indexes = [models.Index(fields=["site", "name"])]
+        indexes = [
+            models.Index(fields=["site", "name"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["updated_at", "id"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.site_id} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        previous_structure_id = structure_id = None
+        if not self._state.adding and (update_fields is None or "site" in update_fields):
+            previous_site_id, previous_structure_id = (
+                Location.objects.filter(pk=self.pk)
+                .values_list("site_id", "site__structure_id")
+                .first()
+            )
+            structure_id = previous_structure_id
+            if previous_site_id != self.site_id:
+                structure_id = (
+                    Site.objects.filter(pk=self.site_id)
+                    .values_list("structure_id", flat=True)
+                    .first()
+                )
+        moved = previous_structure_id != structure_id
+        with transaction.atomic() if moved else nullcontext():
+            super().save(*args, **kwargs)
+            if moved:
+                record_scope_exit(previous_structure_id, structure_id, {"locations": [self.pk]})
+
 
 class Container(TimeStampedModel):
     """
@@ -124,11 +183,42 @@ class Container(TimeStampedModel):
         indexes = [
             models.Index(fields=["structure", "type"]),
             models.Index(fields=["structure", "identifier"]),
+            models.Index(fields=["type"]),
+            models.Index(fields=["identifier"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["structure", "updated_at", "id"]),
         ]
 
     def __str__(self) -> str:
         return f"{self.identifier} ({self.get_type_display()})"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        moved = False
+        if not self._state.adding and (update_fields is None or "structure" in update_fields):
+            previous_structure_id = (
+                Container.objects.filter(pk=self.pk).values_list("structure_id", flat=True).first()
+            )
+            moved = previous_structure_id != self.structure_id
+        # Only a move rewrites the copies: plain saves skip the savepoint.
+        with transaction.atomic() if moved else nullcontext():
+            super().save(*args, **kwargs)
+            if moved:
+                lines = StockLine.objects.filter(lot_instance__container=self)
+                record_scope_exit(
+                    previous_structure_id,
+                    self.structure_id,
+                    {
+                        "containers": [self.pk],
+                        "lot_instances": self.lots.values_list("id", flat=True),
+                        "stock_lines": lines.values_list("id", flat=True),
+                    },
+                )
+                # updated_at suit les copies: ETags et synchronisation s'y fient.
+                now = timezone.now()
+                self.lots.update(structure_id=self.structure_id, updated_at=now)
+                lines.update(structure_id=self.structure_id, updated_at=now)
+
 
 class LotTemplate(TimeStampedModel):
     """
@@ -157,7 +247,11 @@ class LotTemplate(TimeStampedModel):
                 name="uniq_template_per_org_code_version",
             ),
         ]
-        indexes = [models.Index(fields=["organization", "code", "version"])]
+        indexes = [
+            models.Index(fields=["organization", "code", "version"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["updated_at", "id"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.code} - {self.version}"
@@ -193,6 +287,10 @@ class LotTemplateItem(TimeStampedModel):
                 name="check_expected_qty_non_negative",
             ),
         ]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["updated_at", "id"]),
+        ]
 
 
 class LotInstance(TimeStampedModel):
@@ -200,12 +298,25 @@ class LotInstance(TimeStampedModel):
     Un lot réel attaché à un conteneur (ex: Sac intervention Lot C UL01).
     """
 
+    class Status(models.TextChoices):
+        READY = "READY", "Complet"
+        INCOMPLETE = "INCOMPLETE", "Incomplet"
+        EXPIRED = "EXPIRED", "Produits périmés"
+
     template = models.ForeignKey(LotTemplate, on_delete=models.PROTECT, related_name="instances")
     container = models.ForeignKey(Container, on_delete=models.CASCADE, related_name="lots")
+    # Copie de container.structure, tenue à jour par save(): le filtrage par structure
+    # se fait sans jointure.
+    structure = models.ForeignKey(
+        Structure, null=True, blank=True, on_delete=models.PROTECT, related_name="lots"
+    )
 
     last_checked_at = models.DateTimeField(null=True, blank=True)
     next_check_due_at = models.DateTimeField(null=True, blank=True)
-    status = models.CharField(max_length=32, default="READY")
+    status = models.CharField(max_length=32, choices=Status.choices, default=Status.READY)
+    # Maintenus par apps.inventory.compliance à chaque mouvement de stock.
+    missing_count = models.IntegerField(default=0)
+    expired_count = models.IntegerField(default=0)
 
     class Meta:
         constraints = [
@@ -213,6 +324,39 @@ class LotInstance(TimeStampedModel):
                 fields=["template", "container"], name="uniq_template_container"
             ),
         ]
+        indexes = [
+            models.Index(fields=["status"]),
+            models.Index(fields=["next_check_due_at", "id"]),
+            models.Index(fields=["structure", "created_at", "id"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["structure", "updated_at", "id"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        moved = False
+        if update_fields is None or "container" in update_fields:
+            previous_structure_id = self.structure_id
+            self.structure_id = (
+                Container.objects.filter(pk=self.container_id)
+                .values_list("structure_id", flat=True)
+                .first()
+            )
+            moved = not self._state.adding and previous_structure_id != self.structure_id
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "structure"}
+        with transaction.atomic() if moved else nullcontext():
+            super().save(*args, **kwargs)
+            if moved:
+                record_scope_exit(
+                    previous_structure_id,
+                    self.structure_id,
+                    {
+                        "lot_instances": [self.pk],
+                        "stock_lines": self.stock_lines.values_list("id", flat=True),
+                    },
+                )
+                self.stock_lines.update(structure_id=self.structure_id, updated_at=timezone.now())
 
 
 class Batch(TimeStampedModel):
@@ -225,7 +369,12 @@ class Batch(TimeStampedModel):
     expires_at = models.DateField(null=True, blank=True)
 
     class Meta:
-        indexes = [models.Index(fields=["item", "expires_at"])]
+        indexes = [
+            models.Index(fields=["item", "expires_at"]),
+            models.Index(fields=["expires_at"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["updated_at", "id"]),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["item", "lot_number", "expires_at"],
@@ -233,6 +382,21 @@ class Batch(TimeStampedModel):
             ),
         ]
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        changed = False
+        if not self._state.adding and (update_fields is None or "expires_at" in update_fields):
+            previous_expires_at = (
+                Batch.objects.filter(pk=self.pk).values_list("expires_at", flat=True).first()
+            )
+            changed = previous_expires_at != self.expires_at
+        with transaction.atomic() if changed else nullcontext():
+            super().save(*args, **kwargs)
+            if changed:
+                StockLine.objects.filter(batch=self).update(
+                    expires_at=self.expires_at, updated_at=timezone.now()
+                )
+
 
 class StockLine(TimeStampedModel):
     lot_instance = models.ForeignKey(
@@ -243,16 +407,60 @@ class StockLine(TimeStampedModel):
 
     quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    # Copies de lot_instance.container.structure et batch.expires_at, tenues à jour par
+    # Container/LotInstance/Batch.save(): le radar de péremption filtre sans jointure.
+    structure = models.ForeignKey(
+        Structure, null=True, blank=True, on_delete=models.PROTECT, related_name="stock_lines"
+    )
+    expires_at = models.DateField(null=True, blank=True, editable=False)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
                 fields=["lot_instance", "item", "batch"],
                 name="uniq_stockline_per_lot_item_batch",
             ),
+            # NULL n'est égal à rien: sans lot de fabrication, l'unicité est portée ici.
+            models.UniqueConstraint(
+                fields=["lot_instance", "item"],
+                condition=Q(batch__isnull=True),
+                name="uniq_stockline_per_lot_item_without_batch",
+            ),
             models.CheckConstraint(
                 condition=Q(quantity__gte=0), name="check_stock_quantity_non_negative"
             ),
         ]
+        indexes = [
+            models.Index(fields=["structure", "expires_at", "id"]),
+            models.Index(fields=["expires_at", "id"]),
+            models.Index(fields=["structure", "created_at", "id"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["structure", "updated_at", "id"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        previous_structure_id = self.structure_id
+        if update_fields is None or {"lot_instance", "batch"} & set(update_fields):
+            self.structure_id = (
+                LotInstance.objects.filter(pk=self.lot_instance_id)
+                .values_list("structure_id", flat=True)
+                .first()
+            )
+            self.expires_at = (
+                Batch.objects.filter(pk=self.batch_id).values_list("expires_at", flat=True).first()
+                if self.batch_id
+                else None
+            )
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "structure", "expires_at"}
+        moved = not self._state.adding and previous_structure_id != self.structure_id
+        with transaction.atomic() if moved else nullcontext():
+            super().save(*args, **kwargs)
+            if moved:
+                record_scope_exit(
+                    previous_structure_id, self.structure_id, {"stock_lines": [self.pk]}
+                )
 
 
 class StockMovement(TimeStampedModel):
@@ -297,6 +505,30 @@ class StockMovement(TimeStampedModel):
                 name="check_movement_lot_consistency",
             ),
         ]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["structure", "updated_at", "id"]),
+            models.Index(fields=["structure", "created_at"]),
+            models.Index(fields=["type", "created_at"]),
+            models.Index(fields=["item", "created_at"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        moved = False
+        if not self._state.adding and (update_fields is None or "structure" in update_fields):
+            previous_structure_id = (
+                StockMovement.objects.filter(pk=self.pk)
+                .values_list("structure_id", flat=True)
+                .first()
+            )
+            moved = previous_structure_id != self.structure_id
+        with transaction.atomic() if moved else nullcontext():
+            super().save(*args, **kwargs)
+            if moved:
+                record_scope_exit(
+                    previous_structure_id, self.structure_id, {"stock_movements": [self.pk]}
+                )
 
 
 class InventorySession(TimeStampedModel):
@@ -312,13 +544,48 @@ class InventorySession(TimeStampedModel):
         related_name="validated_inventories",
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["structure", "updated_at", "id"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        moved = False
+        if not self._state.adding and (update_fields is None or "structure" in update_fields):
+            previous_structure_id = (
+                InventorySession.objects.filter(pk=self.pk)
+                .values_list("structure_id", flat=True)
+                .first()
+            )
+            moved = previous_structure_id != self.structure_id
+        with transaction.atomic() if moved else nullcontext():
+            super().save(*args, **kwargs)
+            if moved:
+                record_scope_exit(
+                    previous_structure_id,
+                    self.structure_id,
+                    {
+                        "inventory_sessions": [self.pk],
+                        "inventory_lines": self.lines.values_list("id", flat=True),
+                    },
+                )
+                self.lines.update(structure_id=self.structure_id, updated_at=timezone.now())
+
 
 class InventoryLine(TimeStampedModel):
     session = models.ForeignKey(InventorySession, on_delete=models.CASCADE, related_name="lines")
     item = models.ForeignKey(Item, on_delete=models.PROTECT)
+    # Copie de session.structure, tenue à jour par save().
+    structure = models.ForeignKey(
+        Structure, null=True, blank=True, on_delete=models.PROTECT, related_name="inventory_lines"
+    )
 
     expected_qty = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    counted_qty = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Vide tant que l'article n'a pas été compté : seules les lignes comptées
+    # sont reportées dans le stock à la validation.
+    counted_qty = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
     class Meta:
         constraints = [
@@ -332,3 +599,84 @@ class InventoryLine(TimeStampedModel):
                 condition=Q(counted_qty__gte=0), name="check_counted_non_negative"
             ),
         ]
+        indexes = [
+            models.Index(fields=["structure", "created_at", "id"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["structure", "updated_at", "id"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        previous_structure_id = self.structure_id
+        if update_fields is None or "session" in update_fields:
+            self.structure_id = (
+                InventorySession.objects.filter(pk=self.session_id)
+                .values_list("structure_id", flat=True)
+                .first()
+            )
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "structure"}
+        moved = not self._state.adding and previous_structure_id != self.structure_id
+        with transaction.atomic() if moved else nullcontext():
+            super().save(*args, **kwargs)
+            if moved:
+                record_scope_exit(
+                    previous_structure_id, self.structure_id, {"inventory_lines": [self.pk]}
+                )
+
+
+class ExpiryDigest(TimeStampedModel):
+    """
+    Synthèse par structure des vérifications de lots en retard et des péremptions à venir.
+    Régénérée par la commande build_expiry_digest, servie telle quelle par l'API.
+    """
+
+    structure = models.OneToOneField(
+        Structure, on_delete=models.CASCADE, related_name="expiry_digest"
+    )
+    generated_at = models.DateTimeField()
+    window_days = models.PositiveSmallIntegerField()
+
+    overdue_check_count = models.PositiveIntegerField(default=0)
+    expired_count = models.PositiveIntegerField(default=0)
+    expiring_count = models.PositiveIntegerField(default=0)
+    # {"overdue_checks": [...], "expiring_stock": [...]}, les plus urgents d'abord.
+    payload = models.JSONField(default=dict)
+
+    class Meta:
+        indexes = [models.Index(fields=["created_at", "id"])]
+
+
+class Tombstone(models.Model):
+    """
+    Trace d'une suppression, pour que les clients hors ligne l'appliquent à la synchronisation.
+    """
+
+    model = models.CharField(max_length=32)  # nom de synchronisation (ex: stock_lines)
+    object_id = models.PositiveBigIntegerField()
+    # Sans contrainte: la trace survit à la suppression de la structure.
+    structure = models.ForeignKey(
+        Structure,
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    # Renseigné quand la ligne a seulement quitté `structure` pour celle-ci: la trace
+    # ne vaut que pour les clients qui ne voient pas la destination.
+    moved_to = models.ForeignKey(
+        Structure,
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["structure", "deleted_at", "id"]),
+            models.Index(fields=["deleted_at", "id"]),
+        ]
@@ -1,8 +1,13 @@
 from rest_framework import serializers
 
+from apps.core.serializers import SparseFieldsetMixin
+from apps.organizations.models import Organization
+from apps.organizations.permissions import StructureScopedPermission, get_structure_roles
+
 from .models import (
     Batch,
     Container,
+    ExpiryDigest,
     InventoryLine,
     InventorySession,
     Item,
@@ -16,7 +21,7 @@ from .models import (
 )
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Item
         fields = (
@@ -34,42 +39,42 @@ class ItemSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
-class SiteSerializer(serializers.ModelSerializer):
+class SiteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Site
         fields = ("id", "structure", "name", "address")
         read_only_fields = ("id",)
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Location
         fields = ("id", "site", "name", "location_type")
         read_only_fields = ("id",)
 
 
-class ContainerSerializer(serializers.ModelSerializer):
+class ContainerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Container
         fields = ("id", "structure", "location", "type", "identifier", "label", "is_active")
         read_only_fields = ("id",)
 
 
-class LotTemplateSerializer(serializers.ModelSerializer):
+class LotTemplateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = LotTemplate
         fields = ("id", "organization", "code", "name", "version", "is_active")
         read_only_fields = ("id",)
 
 
-class LotTemplateItemSerializer(serializers.ModelSerializer):
+class LotTemplateItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = LotTemplateItem
         fields = ("id", "template", "group", "item", "expected_qty", "notes")
         read_only_fields = ("id",)
 
 
-class LotInstanceSerializer(serializers.ModelSerializer):
+class LotInstanceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = LotInstance
         fields = (
@@ -79,25 +84,47 @@ class LotInstanceSerializer(serializers.ModelSerializer):
             "last_checked_at",
             "next_check_due_at",
             "status",
+            "missing_count",
+            "expired_count",
         )
-        read_only_fields = ("id",)
+        read_only_fields = ("id", "status", "missing_count", "expired_count")
 
 
-class BatchSerializer(serializers.ModelSerializer):
+class BatchSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Batch
         fields = ("id", "item", "lot_number", "expires_at")
         read_only_fields = ("id",)
 
 
-class StockLineSerializer(serializers.ModelSerializer):
+class CatalogueImportSerializer(serializers.Serializer):
+    """
+    CSV upload of catalogue items or template recipes.
+    """
+
+    file = serializers.FileField()
+    organization = serializers.PrimaryKeyRelatedField(queryset=Organization.objects.all())
+    delimiter = serializers.ChoiceField(choices=[",", ";"], default=",")
+
+
+class StockLineSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = StockLine
-        fields = ("id", "lot_instance", "item", "batch", "quantity")
-        read_only_fields = ("id",)
+        fields = ("id", "lot_instance", "item", "batch", "quantity", "structure", "expires_at")
+        read_only_fields = ("id", "structure", "expires_at")
+
+
+class ExpiringStockQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the stock expiry radar.
+    """
 
+    days = serializers.IntegerField(min_value=0, max_value=3650, default=30)
+    structure = serializers.IntegerField(required=False)
+    include_expired = serializers.BooleanField(default=False)
 
-class StockMovementSerializer(serializers.ModelSerializer):
+
+class StockMovementSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = StockMovement
         fields = (
@@ -116,8 +143,31 @@ class StockMovementSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("id", "created_at", "updated_at")
 
+    def validate(self, attrs):
+        """
+        Posting changes the stock of both lots: each must belong to the movement's
+        structure, or to a structure the user can write to.
+        """
+        structure = attrs.get("structure", getattr(self.instance, "structure", None))
+        request = self.context.get("request")
+        errors = {}
+        for name in ("from_lot", "to_lot"):
+            lot = attrs.get(name, getattr(self.instance, name, None))
+            if lot is None or structure is None or lot.structure_id == structure.id:
+                continue
+            if request is not None and (
+                request.user.is_superuser
+                or get_structure_roles(request).get(lot.structure_id)
+                in StructureScopedPermission.write_roles
+            ):
+                continue
+            errors[name] = "Ce lot n'appartient pas à cette structure."
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
 
-class InventorySessionSerializer(serializers.ModelSerializer):
+class InventorySessionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = InventorySession
         fields = (
@@ -131,9 +181,142 @@ class InventorySessionSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("id", "created_at", "updated_at")
 
+    def validate(self, attrs):
+        structure = attrs.get("structure", getattr(self.instance, "structure", None))
+        container = attrs.get("container", getattr(self.instance, "container", None))
+        if structure and container and container.structure_id != structure.id:
+            raise serializers.ValidationError(
+                {"container": "Le conteneur n'appartient pas à cette structure."}
+            )
+        return attrs
 
-class InventoryLineSerializer(serializers.ModelSerializer):
+
+class InventoryLineSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = InventoryLine
         fields = ("id", "session", "item", "expected_qty", "counted_qty")
         read_only_fields = ("id",)
+
+
+class InventoryCountListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        item_ids = [count["item"] for count in attrs]
+        if len(set(item_ids)) != len(item_ids):
+            raise serializers.ValidationError("Un article ne peut être compté qu'une fois.")
+        known = set(Item.objects.filter(id__in=item_ids).values_list("id", flat=True))
+        unknown = sorted(set(item_ids) - known)
+        if unknown:
+            raise serializers.ValidationError(f"Articles inconnus: {unknown}.")
+        return attrs
+
+
+class InventoryCountSerializer(serializers.Serializer):
+    """
+    One `{item, counted_qty}` entry of a bulk count; items are checked in one query.
+    """
+
+    item = serializers.IntegerField(min_value=1)
+    counted_qty = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+
+    class Meta:
+        list_serializer_class = InventoryCountListSerializer
+
+
+class ItemComplianceSerializer(serializers.Serializer):
+    item = serializers.IntegerField()
+    expected_qty = serializers.DecimalField(max_digits=10, decimal_places=2)
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=2)
+    missing_qty = serializers.DecimalField(max_digits=10, decimal_places=2)
+    over_qty = serializers.DecimalField(max_digits=10, decimal_places=2)
+    expired_qty = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class LotComplianceSerializer(serializers.Serializer):
+    lot_instance = serializers.IntegerField()
+    status = serializers.CharField()
+    missing_count = serializers.IntegerField()
+    over_count = serializers.IntegerField()
+    expired_count = serializers.IntegerField()
+    items = ItemComplianceSerializer(many=True)
+
+
+class ExpiryDigestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ExpiryDigest
+        fields = (
+            "id",
+            "structure",
+            "generated_at",
+            "window_days",
+            "overdue_check_count",
+            "expired_count",
+            "expiring_count",
+            "payload",
+        )
+        read_only_fields = fields
+
+
+class ScanStockLineSerializer(serializers.ModelSerializer):
+    item_name = serializers.CharField(source="item.name", read_only=True)
+    lot_number = serializers.CharField(source="batch.lot_number", read_only=True, default=None)
+
+    class Meta:
+        model = StockLine
+        fields = ("id", "item", "item_name", "batch", "lot_number", "expires_at", "quantity")
+        read_only_fields = fields
+
+
+class ScanExpectationSerializer(serializers.ModelSerializer):
+    item_name = serializers.CharField(source="item.name", read_only=True)
+
+    class Meta:
+        model = LotTemplateItem
+        fields = ("item", "item_name", "group", "expected_qty")
+        read_only_fields = fields
+
+
+class ScanLotSerializer(serializers.ModelSerializer):
+    template_code = serializers.CharField(source="template.code", read_only=True)
+    template_name = serializers.CharField(source="template.name", read_only=True)
+    expectations = ScanExpectationSerializer(source="template.items", many=True, read_only=True)
+    stock_lines = ScanStockLineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = LotInstance
+        fields = (
+            "id",
+            "template",
+            "template_code",
+            "template_name",
+            "status",
+            "missing_count",
+            "expired_count",
+            "last_checked_at",
+            "next_check_due_at",
+            "expectations",
+            "stock_lines",
+        )
+        read_only_fields = fields
+
+
+class ContainerScanSerializer(serializers.ModelSerializer):
+    """
+    Everything a volunteer needs after scanning a container, in one payload.
+    """
+
+    lots = ScanLotSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Container
+        fields = (
+            "id",
+            "structure",
+            "location",
+            "type",
+            "identifier",
+            "label",
+            "is_active",
+            "updated_at",
+            "lots",
+        )
+        read_only_fields = fields
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.core.db import bulk_upsert
+
+from .compliance import track_compliance
+from .models import (
+    Batch,
+    InventoryLine,
+    InventorySession,
+    LotInstance,
+    LotTemplateItem,
+    StockLine,
+    StockMovement,
+)
+
+# (lot_instance_id, item_id, batch_id)
+StockKey = tuple[int, int, int | None]
+
+INCOMING_TYPES = {
+    StockMovement.Type.IN,
+    StockMovement.Type.RESTOCK,
+    StockMovement.Type.TRANSFER,
+    StockMovement.Type.ADJUST,
+}
+OUTGOING_TYPES = {
+    StockMovement.Type.OUT,
+    StockMovement.Type.CONSUME,
+    StockMovement.Type.TRANSFER,
+    StockMovement.Type.ADJUST,
+}
+
+
+class StockPostingError(Exception):
+    """
+    A posting that cannot be applied; nothing has been written.
+    """
+
+
+class InsufficientStockError(StockPostingError):
+    """
+    Raised when posting would drive a StockLine below zero.
+    """
+
+    def __init__(self, key: StockKey, available: Decimal, requested: Decimal):
+        self.key = key
+        self.available = available
+        self.requested = requested
+        lot_instance_id, item_id, _batch_id = key
+        super().__init__(
+            f"Stock insuffisant pour l'article {item_id} dans le lot {lot_instance_id} "
+            f"(disponible: {available}, demandé: {requested})."
+        )
+
+
+def movement_deltas(movement: StockMovement, sign: int = 1) -> dict[StockKey, Decimal]:
+    """
+    Quantity changes a movement applies to StockLine rows.
+    `sign=-1` gives the deltas needed to revert it.
+    """
+    deltas: dict[StockKey, Decimal] = defaultdict(Decimal)
+    quantity = movement.quantity * sign
+    if movement.from_lot_id and movement.type in OUTGOING_TYPES:
+        deltas[(movement.from_lot_id, movement.item_id, movement.batch_id)] -= quantity
+    if movement.to_lot_id and movement.type in INCOMING_TYPES:
+        deltas[(movement.to_lot_id, movement.item_id, movement.batch_id)] += quantity
+    return deltas
+
+
+def merge_deltas(*many: dict[StockKey, Decimal]) -> dict[StockKey, Decimal]:
+    merged: dict[StockKey, Decimal] = defaultdict(Decimal)
+    for deltas in many:
+        for key, delta in deltas.items():
+            merged[key] += delta
+    return merged
+
+
+def _stock_key(line: StockLine) -> StockKey:
+    return (line.lot_instance_id, line.item_id, line.batch_id)
+
+
+def _lock_stock_lines(keys: list[StockKey]) -> dict[StockKey, StockLine]:
+    """
+    Lock every StockLine touched by `keys` in primary key order.
+
+    All writers lock in the same order so concurrent postings on the same lot
+    queue up instead of deadlocking. The filter may lock a few sibling lines
+    (other batches of the same item), which is harmless.
+    """
+    lot_ids = {key[0] for key in keys}
+    item_ids = {key[1] for key in keys}
+    lines = (
+        StockLine.objects.select_for_update()
+        .filter(lot_instance_id__in=lot_ids, item_id__in=item_ids)
+        .order_by("pk")
+    )
+    wanted = set(keys)
+    return {_stock_key(line): line for line in lines if _stock_key(line) in wanted}
+
+
+def _new_stock_lines(keys: list[StockKey]) -> list[StockLine]:
+    """
+    Unsaved lines for `keys`, with the structure and expiry copies that
+    StockLine.save() would have filled in (bulk_create bypasses it).
+    """
+    structures = dict(
+        LotInstance.objects.filter(id__in={key[0] for key in keys}).values_list(
+            "id", "structure_id"
+        )
+    )
+    batch_ids = {key[2] for key in keys if key[2]}
+    expiries = (
+        dict(Batch.objects.filter(id__in=batch_ids).values_list("id", "expires_at"))
+        if batch_ids
+        else {}
+    )
+    return [
+        StockLine(
+            lot_instance_id=lot_id,
+            item_id=item_id,
+            batch_id=batch_id,
+            structure_id=structures.get(lot_id),
+            expires_at=expiries.get(batch_id),
+        )
+        for lot_id, item_id, batch_id in keys
+    ]
+
+
+@transaction.atomic
+def apply_stock_deltas(deltas: dict[StockKey, Decimal]) -> list[StockLine]:
+    """
+    Apply quantity deltas to StockLine rows under row locks.
+
+    Missing lines are created for positive deltas; a delta that would leave a
+    line below zero raises InsufficientStockError and rolls back everything.
+    The compliance counters of the touched lots are updated in the same
+    transaction.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return []
+    keys = sorted(deltas, key=lambda k: (k[0], k[1], k[2] or 0))
+
+    lines = _lock_stock_lines(keys)
+    with track_compliance((lot_id, item_id) for lot_id, item_id, _batch_id in keys):
+        return _write_stock_deltas(keys, deltas, lines)
+
+
+def _write_stock_deltas(
+    keys: list[StockKey], deltas: dict[StockKey, Decimal], lines: dict[StockKey, StockLine]
+) -> list[StockLine]:
+    missing = [key for key in keys if key not in lines]
+    for key in missing:
+        if deltas[key] < 0:
+            raise InsufficientStockError(key, Decimal("0"), -deltas[key])
+    if missing:
+        # First postings on a lot are serialised on the lot row: MySQL has no
+        # partial unique index, so batch-less lines are not deduplicated there.
+        list(
+            LotInstance.objects.select_for_update()
+            .filter(id__in={key[0] for key in missing})
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        lines = _lock_stock_lines(keys)
+        missing = [key for key in keys if key not in lines]
+    if missing:
+        StockLine.objects.bulk_create(_new_stock_lines(missing), ignore_conflicts=True)
+        lines = _lock_stock_lines(keys)
+
+    now = timezone.now()
+    changed = []
+    for key in keys:
+        line = lines[key]
+        quantity = line.quantity + deltas[key]
+        if quantity < 0:
+            raise InsufficientStockError(key, line.quantity, -deltas[key])
+        line.quantity = quantity
+        line.updated_at = now
+        changed.append(line)
+    StockLine.objects.bulk_update(changed, ["quantity", "updated_at"])
+    return changed
+
+
+def post_movement(movement: StockMovement) -> list[StockLine]:
+    return apply_stock_deltas(movement_deltas(movement))
+
+
+def revert_movement(movement: StockMovement) -> list[StockLine]:
+    return apply_stock_deltas(movement_deltas(movement, sign=-1))
+
+
+def upsert_inventory_counts(session: InventorySession, counts: list[dict]) -> list[InventoryLine]:
+    """
+    Insert or update the counted quantity of many items in one statement.
+    Expected quantities of existing lines are left untouched.
+    """
+    bulk_upsert(
+        InventoryLine,
+        [
+            InventoryLine(
+                session=session,
+                structure_id=session.structure_id,
+                item_id=count["item"],
+                counted_qty=count["counted_qty"],
+            )
+            for count in counts
+        ],
+        unique_fields=["session", "item"],
+        update_fields=["counted_qty", "updated_at"],
+    )
+    return list(
+        session.lines.filter(item_id__in=[count["item"] for count in counts]).order_by("id")
+    )
+
+
+def prefill_expected_lines(session: InventorySession) -> list[InventoryLine]:
+    """
+    Set expected quantities from the templates of every lot in the container.
+
+    One grouped SELECT over LotTemplateItem (an item listed in several lots
+    or groups is summed) and one upsert, whatever the number of lots.
+    """
+    expected = (
+        LotTemplateItem.objects.filter(template__instances__container_id=session.container_id)
+        .values("item")
+        .annotate(total=Sum("expected_qty"))
+        .order_by("item")
+    )
+    bulk_upsert(
+        InventoryLine,
+        [
+            InventoryLine(
+                session=session,
+                structure_id=session.structure_id,
+                item_id=row["item"],
+                expected_qty=row["total"],
+            )
+            for row in expected
+        ],
+        unique_fields=["session", "item"],
+        update_fields=["expected_qty", "updated_at"],
+    )
+    return list(session.lines.order_by("id"))
+
+
+@transaction.atomic
+def validate_inventory_session(session: InventorySession, user) -> list[StockMovement]:
+    """
+    Reconcile counted quantities into stock and close the session.
+
+    For every counted item the difference with the container's current stock
+    becomes ADJUST movements: surpluses go to the lot whose template lists the
+    item, shortages are taken from the earliest-expiring batches first. Items
+    without a count (no InventoryLine, or a prefilled one whose `counted_qty`
+    is still empty) are left as they are. Movements, StockLine
+    updates and the session update are all bulk statements, so the query
+    count does not grow with the number of lines.
+    """
+    if InventorySession.objects.select_for_update().get(pk=session.pk).validated_at:
+        raise StockPostingError("Cette session d'inventaire est déjà validée.")
+    counted = dict(
+        session.lines.filter(counted_qty__isnull=False).values_list("item_id", "counted_qty")
+    )
+    lots = list(
+        LotInstance.objects.filter(container_id=session.container_id)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    if counted and not lots:
+        raise StockPostingError("Le conteneur n'a aucun lot où reporter l'inventaire.")
+
+    # Lock the counted lines in primary key order, like every other writer, so
+    # that no posting changes a total between this read and the adjustment.
+    lines = StockLine.objects.filter(lot_instance_id__in=lots, item_id__in=counted)
+    list(lines.select_for_update().order_by("pk").values_list("pk", flat=True))
+    stock: dict[int, list[dict]] = defaultdict(list)
+    for row in (
+        lines.filter(quantity__gt=0)
+        .order_by("batch__expires_at", "id")
+        .values("lot_instance_id", "item_id", "batch_id", "quantity", "batch__expires_at")
+    ):
+        stock[row["item_id"]].append(row)
+    # Never-expiring stock (no batch or no date) is consumed last.
+    for rows in stock.values():
+        rows.sort(key=lambda row: row["batch__expires_at"] is None)
+
+    home_lots = {}
+    for item_id, lot_id in (
+        LotTemplateItem.objects.filter(
+            template__instances__container_id=session.container_id, item_id__in=counted
+        )
+        .order_by("template__instances__id")
+        .values_list("item_id", "template__instances__id")
+    ):
+        home_lots.setdefault(item_id, lot_id)
+
+    movements = []
+    reason = f"Inventaire #{session.pk}"
+    for item_id, counted_qty in counted.items():
+        rows = stock.get(item_id, [])
+        diff = counted_qty - sum((row["quantity"] for row in rows), Decimal("0"))
+        if diff > 0:
+            lot_id = home_lots.get(item_id) or (rows[0]["lot_instance_id"] if rows else lots[0])
+            movements.append(
+                StockMovement(
+                    structure_id=session.structure_id,
+                    created_by=user,
+                    type=StockMovement.Type.ADJUST,
+                    to_lot_id=lot_id,
+                    item_id=item_id,
+                    quantity=diff,
+                    reason=reason,
+                )
+            )
+        for row in rows:
+            if diff >= 0:
+                break
+            taken = min(row["quantity"], -diff)
+            diff += taken
+            movements.append(
+                StockMovement(
+                    structure_id=session.structure_id,
+                    created_by=user,
+                    type=StockMovement.Type.ADJUST,
+                    from_lot_id=row["lot_instance_id"],
+                    item_id=item_id,
+                    batch_id=row["batch_id"],
+                    quantity=taken,
+                    reason=reason,
+                )
+            )
+
+    apply_stock_deltas(merge_deltas(*(movement_deltas(movement) for movement in movements)))
+    StockMovement.objects.bulk_create(movements)
+
+    session.validated_at = timezone.now()
+    session.validated_by = user
+    session.save(update_fields=["validated_at", "validated_by", "updated_at"])
+    return movements
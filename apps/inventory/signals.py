@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete
+
+from .sync import SYNC_NAMES
+from .tombstones import record_tombstone
+
+
+def tombstone_on_delete(sender, instance, **kwargs):
+    record_tombstone(SYNC_NAMES[sender], instance)
+
+
+for model in SYNC_NAMES:
+    post_delete.connect(
+        tombstone_on_delete, sender=model, dispatch_uid=f"tombstone-{model.__name__}"
+    )
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.core.db import iter_keyset_chunks, keyset_position
+from apps.organizations.permissions import get_structure_roles
+
+from .models import (
+    Batch,
+    Container,
+    InventoryLine,
+    InventorySession,
+    Item,
+    Location,
+    LotInstance,
+    LotTemplate,
+    LotTemplateItem,
+    Site,
+    StockLine,
+    StockMovement,
+    Tombstone,
+)
+from .serializers import (
+    BatchSerializer,
+    ContainerSerializer,
+    InventoryLineSerializer,
+    InventorySessionSerializer,
+    ItemSerializer,
+    LocationSerializer,
+    LotInstanceSerializer,
+    LotTemplateItemSerializer,
+    LotTemplateSerializer,
+    SiteSerializer,
+    StockLineSerializer,
+    StockMovementSerializer,
+)
+
+SYNC_CHUNK_SIZE = 500
+SYNC_DEFAULT_LIMIT = 1000
+SYNC_MAX_LIMIT = 5000
+CHANGE_ORDERING = ("updated_at", "id")
+TOMBSTONE_ORDERING = ("deleted_at", "id")
+
+
+@dataclass(frozen=True)
+class SyncSource:
+    model: type
+    serializer_class: type
+    # None: organisation-wide referential, visible to every authenticated user.
+    structure_path: str | None
+
+
+SYNC_SOURCES: dict[str, SyncSource] = {
+    "items": SyncSource(Item, ItemSerializer, None),
+    "lot_templates": SyncSource(LotTemplate, LotTemplateSerializer, None),
+    "lot_template_items": SyncSource(LotTemplateItem, LotTemplateItemSerializer, None),
+    "batches": SyncSource(Batch, BatchSerializer, None),
+    "sites": SyncSource(Site, SiteSerializer, "structure"),
+    "locations": SyncSource(Location, LocationSerializer, "site__structure"),
+    "containers": SyncSource(Container, ContainerSerializer, "structure"),
+    "lot_instances": SyncSource(LotInstance, LotInstanceSerializer, "structure"),
+    "stock_lines": SyncSource(StockLine, StockLineSerializer, "structure"),
+    "stock_movements": SyncSource(StockMovement, StockMovementSerializer, "structure"),
+    "inventory_sessions": SyncSource(InventorySession, InventorySessionSerializer, "structure"),
+    "inventory_lines": SyncSource(InventoryLine, InventoryLineSerializer, "structure"),
+}
+SYNC_NAMES = {source.model: name for name, source in SYNC_SOURCES.items()}
+TOMBSTONES = "tombstones"
+
+
+def encode_watermark(position) -> str:
+    moment, pk = position
+    raw = json.dumps([moment.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_watermark(token: str):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        moment, pk = json.loads(raw)
+        moment = parse_datetime(moment)
+    except (binascii.Error, ValueError, TypeError):
+        moment = None
+    if moment is None or not isinstance(pk, int):
+        raise serializers.ValidationError("Marqueur de synchronisation invalide.")
+    return moment, pk
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    """
+    `?models=` (comma separated, default: all), `?limit=` rows per model and
+    one opaque watermark per model name, as returned by the previous sync.
+    """
+
+    models = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=SYNC_MAX_LIMIT, default=SYNC_DEFAULT_LIMIT
+    )
+
+    def validate_models(self, value):
+        names = [name for name in value.split(",") if name]
+        unknown = sorted(set(names) - {*SYNC_SOURCES, TOMBSTONES})
+        if unknown:
+            raise serializers.ValidationError(f"Modèles inconnus: {unknown}.")
+        return names
+
+    def validate(self, attrs):
+        names = attrs.get("models") or [*SYNC_SOURCES, TOMBSTONES]
+        watermarks = {}
+        for name in names:
+            token = self.initial_data.get(name)
+            if token:
+                try:
+                    watermarks[name] = decode_watermark(token)
+                except serializers.ValidationError as exc:
+                    raise serializers.ValidationError({name: exc.detail}) from exc
+        return {**attrs, "models": names, "watermarks": watermarks}
+
+
+def _scoped(queryset, path, structure_ids):
+    if structure_ids is None:
+        return queryset
+    return queryset.filter(**{f"{path}__in": structure_ids})
+
+
+def _stream_rows(queryset, ordering, after, limit, serialize, exhausted=None) -> Iterator[str]:
+    """
+    Yield the JSON body of one section, rows first, then watermark and has_more.
+
+    `exhausted` is the position reported when the section has nothing more
+    to send, so that its watermark keeps moving even when no row changed.
+    """
+    sent = 0
+    position = after
+    yield '{"rows":['
+    for rows in iter_keyset_chunks(
+        queryset, ordering, chunk_size=min(limit, SYNC_CHUNK_SIZE), after=after
+    ):
+        rows = rows[: limit - sent]
+        for data in serialize(rows):
+            yield ("," if sent else "") + json.dumps(data, cls=JSONEncoder)
+            sent += 1
+        position = keyset_position(rows[-1], ordering)
+        if sent >= limit:
+            break
+    if exhausted and sent < limit:
+        position = max(position, exhausted) if position else exhausted
+    watermark = encode_watermark(position) if position else None
+    # A full page may be followed by nothing: the client then gets one empty page.
+    yield f'],"watermark":{json.dumps(watermark)},"has_more":{json.dumps(sent >= limit)}}}'
+
+
+def stream_sync(request, params) -> Iterator[str]:
+    """
+    Changes since each watermark, then deletions, as one streamed JSON document.
+
+    `reset` tells the client its tombstone watermark predates the retention
+    window: it should drop local data and sync without watermarks. Each model
+    is read in (updated_at, id) keyset chunks, scoped to the user's
+    structures, so memory does not depend on how much changed. Rows moved to
+    a structure the user cannot see come back as tombstones.
+    """
+    user = request.user
+    structure_ids = None if user.is_superuser else list(get_structure_roles(request))
+    limit = params["limit"]
+    names = params["models"]
+    watermarks = params["watermarks"]
+
+    # updated_at and deleted_at are stamped before their transaction commits:
+    # only rows older than the safety lag are sent and exhausted sections stop
+    # at that cutoff, so a late commit still lands past the watermark.
+    # Tombstones older than the retention window are pruned: a client whose
+    # tombstone watermark predates it may have missed deletions and must start
+    # over. The tombstone watermark always advances to the cutoff, so a quiet
+    # period without deletions does not trigger a reset.
+    started_at = timezone.now()
+    cutoff = started_at - timedelta(seconds=settings.SYNC_SAFETY_LAG_SECONDS)
+    horizon = started_at - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS)
+    tombstone_mark = watermarks.get(TOMBSTONES)
+    reset = tombstone_mark is not None and tombstone_mark[0] < horizon
+    yield f'{{"reset":{json.dumps(reset)},"changes":{{'
+    for index, name in enumerate(name for name in names if name != TOMBSTONES):
+        source = SYNC_SOURCES[name]
+        queryset = source.model.objects.filter(updated_at__lt=cutoff)
+        if source.structure_path:
+            queryset = _scoped(queryset, source.structure_path, structure_ids)
+        yield ("," if index else "") + json.dumps(name) + ":"
+        yield from _stream_rows(
+            queryset,
+            CHANGE_ORDERING,
+            watermarks.get(name),
+            limit,
+            lambda rows, source=source: source.serializer_class(rows, many=True).data,
+            exhausted=(cutoff, 0),
+        )
+    yield "}"
+
+    if TOMBSTONES in names:
+        tombstones = Tombstone.objects.filter(deleted_at__lt=cutoff)
+        if structure_ids is None:
+            tombstones = tombstones.filter(moved_to__isnull=True)
+        else:
+            tombstones = tombstones.filter(
+                Q(structure_id__in=structure_ids) | Q(structure__isnull=True)
+            ).exclude(moved_to__in=structure_ids)
+        yield ',"tombstones":'
+        yield from _stream_rows(
+            tombstones,
+            TOMBSTONE_ORDERING,
+            watermarks.get(TOMBSTONES),
+            limit,
+            lambda rows: [
+                {"model": row.model, "id": row.object_id, "deleted_at": row.deleted_at}
+                for row in rows
+            ],
+            exhausted=(cutoff, 0),
+        )
+    yield "}"
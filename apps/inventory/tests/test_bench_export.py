@@ -0,0 +1,48 @@
+import time
+import tracemalloc
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from apps.inventory.benchdata import create_stock_dataset
+from apps.organizations.models import Membership, Structure
+
+pytestmark = pytest.mark.benchmark
+
+# 500 lots x 100 items x 10 batches in one structure.
+ROWS = 500_000
+PEAK_BUDGET = 32 * 1024 * 1024
+
+
+@pytest.mark.django_db
+def test_bench_stock_export_memory_is_flat():
+    dataset = create_stock_dataset(structures=1, lots=500, items=100, batches=10)
+    assert dataset["lines"] == ROWS
+    user = get_user_model().objects.create_user(email="user@example.com", password="passw0rd!")
+    Membership.objects.create(
+        user=user,
+        structure=Structure.objects.get(id=dataset["structure_ids"][0]),
+        role=Membership.Role.VIEWER,
+    )
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    for fmt in ("csv", "ndjson"):
+        tracemalloc.start()
+        started = time.perf_counter()
+        resp = client.get(f"/api/v1/stock-lines/export/{fmt}/")
+        rows = size = 0
+        for chunk in resp.streaming_content:
+            rows += chunk.count(b"\n")
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"\n{fmt}: {rows} lines, {size / 2**20:.1f} MiB in {elapsed:.1f}s, "
+            f"peak {peak / 2**20:.1f} MiB"
+        )
+        assert rows == ROWS + (fmt == "csv")
+        assert peak < PEAK_BUDGET
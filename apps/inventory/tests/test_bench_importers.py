@@ -0,0 +1,50 @@
+import io
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.importers import import_items, import_lot_templates
+from apps.inventory.models import Item, LotTemplateItem
+from apps.organizations.models import Organization
+
+pytestmark = pytest.mark.benchmark
+
+ROWS = 50_000
+
+
+def _csv(header, rows):
+    return io.StringIO(header + "\n" + "\n".join(rows) + "\n", newline="")
+
+
+def _timed(fn):
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        report = fn()
+        elapsed = time.perf_counter() - started
+    return report, elapsed, len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_bench_import_50k_rows():
+    org = Organization.objects.create(name="Organisation", slug="org")
+    items = _csv(
+        "name,sku,unit,requires_expiry",
+        (f"Item {n},SKU-{n},piece,{n % 2}" for n in range(ROWS)),
+    )
+    recipes = _csv(
+        "code,version,group,item,sku,expected_qty",
+        (f"LOT_A,V{n // 1000},DIVERS,,SKU-{n},{n % 7}" for n in range(ROWS)),
+    )
+
+    for label, fn in (
+        ("items", lambda: import_items(org, items)),
+        ("templates", lambda: import_lot_templates(org, recipes)),
+    ):
+        report, elapsed, queries = _timed(fn)
+        print(f"\n{label}: {report.imported} rows in {elapsed:.2f}s, {queries} queries")
+        assert report.imported == ROWS and report.error_count == 0
+        assert elapsed < 20
+    assert Item.objects.filter(organization=org).count() == ROWS
+    assert LotTemplateItem.objects.filter(template__organization=org).count() == ROWS
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.models import Container, InventoryLine, InventorySession, Item
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    container = Container.objects.create(structure=ul, type="VEHICLE_VPSP", identifier="VPSP-01")
+    return {
+        "client": api_client,
+        "items": Item.objects.bulk_create(
+            Item(organization=org, name=f"Item {i:03d}") for i in range(200)
+        ),
+        "session": InventorySession.objects.create(structure=ul, container=container),
+    }
+
+
+def _timed(fn):
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+    return elapsed, len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_bench_single_posts_vs_bulk_upsert(setup):
+    client, session, items = setup["client"], setup["session"], setup["items"]
+
+    def single_posts():
+        for item in items:
+            resp = client.post(
+                "/api/v1/inventory-lines/",
+                {"session": session.id, "item": item.id, "counted_qty": "2"},
+                format="json",
+            )
+            assert resp.status_code == 201
+
+    def bulk():
+        payload = [{"item": item.id, "counted_qty": "2"} for item in items]
+        resp = client.post(
+            f"/api/v1/inventory-sessions/{session.id}/lines/bulk/", payload, format="json"
+        )
+        assert resp.status_code == 200
+
+    single_time, single_queries = _timed(single_posts)
+    InventoryLine.objects.all().delete()
+    bulk_time, bulk_queries = _timed(bulk)
+
+    print(
+        f"\n{len(items)} lines: single POSTs {single_time * 1000:.0f} ms / {single_queries} queries"
+        f" | bulk {bulk_time * 1000:.0f} ms / {bulk_queries} queries"
+        f" | x{single_time / bulk_time:.1f}"
+    )
+    assert InventoryLine.objects.count() == len(items)
+    assert bulk_queries < single_queries
+    assert bulk_time < single_time
@@ -0,0 +1,168 @@
+from datetime import date
+
+import pytest
+from django.core.management import call_command
+
+from apps.inventory.compliance import compute_compliance, recompute_lot_compliance
+from apps.inventory.models import (
+    Batch,
+    Container,
+    Item,
+    LotInstance,
+    LotTemplate,
+    LotTemplateItem,
+    StockLine,
+)
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    template = LotTemplate.objects.create(organization=org, code="LOT_C", name="Lot C")
+    gloves, dressing, blanket = (
+        Item.objects.create(organization=org, name=name) for name in ("Gants", "Pansement", "Couv")
+    )
+    LotTemplateItem.objects.create(
+        template=template, group="PROTECTION", item=gloves, expected_qty=10
+    )
+    LotTemplateItem.objects.create(template=template, group="WOUNDS", item=dressing, expected_qty=2)
+    lots = [
+        LotInstance.objects.create(
+            template=template,
+            container=Container.objects.create(
+                structure=ul, type="BAG_INTERVENTION", identifier=f"SAC-{i}"
+            ),
+        )
+        for i in range(3)
+    ]
+    return {"client": api_client, "lots": lots, "items": (gloves, dressing, blanket)}
+
+
+@pytest.mark.django_db
+def test_compliance_endpoint_reports_missing_and_over_items(setup):
+    lot = setup["lots"][0]
+    gloves, dressing, blanket = setup["items"]
+    StockLine.objects.create(lot_instance=lot, item=gloves, quantity=10)
+    StockLine.objects.create(lot_instance=lot, item=dressing, quantity=1)
+    StockLine.objects.create(lot_instance=lot, item=blanket, quantity=3)
+
+    resp = setup["client"].get(f"/api/v1/lot-instances/{lot.id}/compliance/")
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == "INCOMPLETE"
+    assert (body["missing_count"], body["over_count"]) == (1, 1)
+    items = {row["item"]: row for row in body["items"]}
+    assert items[dressing.id]["missing_qty"] == "1.00"
+    assert items[blanket.id]["expected_qty"] == "0.00"
+    assert items[blanket.id]["over_qty"] == "3.00"
+    assert items[gloves.id]["missing_qty"] == items[gloves.id]["over_qty"] == "0.00"
+
+
+@pytest.mark.django_db
+def test_compliance_is_computed_in_constant_queries(setup, django_assert_num_queries):
+    lots = setup["lots"]
+    gloves, dressing, _ = setup["items"]
+    for lot in lots[:2]:
+        StockLine.objects.create(lot_instance=lot, item=gloves, quantity=10)
+        StockLine.objects.create(lot_instance=lot, item=dressing, quantity=2)
+
+    with django_assert_num_queries(2):
+        result = compute_compliance(lot.id for lot in lots)
+
+    assert [result[lot.id].status for lot in lots] == ["READY", "READY", "INCOMPLETE"]
+    assert result[lots[2].id].missing_count == 2
+
+
+@pytest.mark.django_db
+def test_recompute_command_updates_statuses(setup):
+    lots = setup["lots"]
+    gloves, dressing, _ = setup["items"]
+    StockLine.objects.create(lot_instance=lots[0], item=gloves, quantity=10)
+    StockLine.objects.create(lot_instance=lots[0], item=dressing, quantity=2)
+
+    call_command("recompute_lot_status", batch_size=2)
+
+    statuses = dict(LotInstance.objects.values_list("id", "status"))
+    assert statuses == {lots[0].id: "READY", lots[1].id: "INCOMPLETE", lots[2].id: "INCOMPLETE"}
+
+
+def _move(client, structure, **payload):
+    resp = client.post(
+        "/api/v1/stock-movements/", {"structure": structure.id, **payload}, format="json"
+    )
+    assert resp.status_code == 201, resp.content
+
+
+def _counters(lot):
+    lot.refresh_from_db()
+    return lot.status, lot.missing_count, lot.expired_count
+
+
+@pytest.mark.django_db
+def test_lot_counters_follow_stock_changes(setup):
+    client, lots = setup["client"], setup["lots"]
+    gloves, dressing, _ = setup["items"]
+    structure = lots[0].container.structure
+    # Template created lots start with every expected item missing.
+    container = Container.objects.create(structure=structure, identifier="SAC-NEW")
+    lot = client.post(
+        "/api/v1/lot-instances/",
+        {"template": lots[0].template_id, "container": container.id},
+        format="json",
+    ).json()
+    assert (lot["status"], lot["missing_count"], lot["expired_count"]) == ("INCOMPLETE", 2, 0)
+    lot = LotInstance.objects.get(id=lot["id"])
+    assert _counters(lot) == ("INCOMPLETE", 2, 0)
+
+    _move(client, structure, type="IN", to_lot=lot.id, item=gloves.id, quantity="10")
+    assert _counters(lot) == ("INCOMPLETE", 1, 0)
+
+    expired = Batch.objects.create(item=dressing, lot_number="L1", expires_at=date(2020, 1, 1))
+    _move(
+        client,
+        structure,
+        type="IN",
+        to_lot=lot.id,
+        item=dressing.id,
+        batch=expired.id,
+        quantity="2",
+    )
+    assert _counters(lot) == ("EXPIRED", 0, 1)
+
+    resp = client.patch(
+        f"/api/v1/batches/{expired.id}/", {"expires_at": "2999-01-01"}, format="json"
+    )
+    assert resp.status_code == 200
+    assert _counters(lot) == ("READY", 0, 0)
+
+    line = StockLine.objects.get(lot_instance=lot, item=gloves)
+    resp = client.patch(f"/api/v1/stock-lines/{line.id}/", {"quantity": "4"}, format="json")
+    assert resp.status_code == 200
+    assert _counters(lot) == ("INCOMPLETE", 1, 0)
+
+    # Fixture lots were created without the API and still hold the default counters.
+    resp = client.get("/api/v1/lot-instances/", {"status": "INCOMPLETE"})
+    assert [row["id"] for row in resp.json()["results"]] == [lot.id]
+
+    # The incremental counters agree with a full recomputation.
+    assert recompute_lot_compliance(LotInstance.objects.filter(id=lot.id)) == 0
+
+
+@pytest.mark.django_db
+def test_template_change_recomputes_instances(setup):
+    client, lots = setup["client"], setup["lots"]
+    gloves, dressing, blanket = setup["items"]
+    StockLine.objects.create(lot_instance=lots[0], item=gloves, quantity=10)
+    StockLine.objects.create(lot_instance=lots[0], item=dressing, quantity=2)
+    recompute_lot_compliance()
+    assert _counters(lots[0]) == ("READY", 0, 0)
+
+    resp = client.post(
+        "/api/v1/lot-template-items/",
+        {"template": lots[0].template_id, "group": "DIVERS", "item": blanket.id, "expected_qty": 1},
+        format="json",
+    )
+
+    assert resp.status_code == 201
+    assert _counters(lots[0]) == ("INCOMPLETE", 1, 0)
+    assert _counters(lots[1]) == ("INCOMPLETE", 3, 0)
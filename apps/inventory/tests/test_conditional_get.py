@@ -0,0 +1,139 @@
+from datetime import date
+from unittest import mock
+
+import pytest
+from django.utils.http import http_date
+
+from apps.inventory.models import (
+    Batch,
+    Container,
+    Item,
+    LotInstance,
+    LotTemplate,
+    LotTemplateItem,
+    StockLine,
+)
+from apps.inventory.serializers import ItemSerializer
+from apps.organizations.models import Membership, Structure
+
+
+@pytest.fixture
+def setup(org, api_client):
+    items = [Item.objects.create(organization=org, name=f"Article {n}") for n in range(3)]
+    return {"client": api_client, "org": org, "items": items}
+
+
+@pytest.mark.django_db
+def test_unchanged_list_is_not_serialized_again(setup, django_assert_num_queries):
+    client = setup["client"]
+    first = client.get("/api/v1/items/")
+    assert first.status_code == 200
+    assert first["ETag"]
+
+    with (
+        mock.patch.object(ItemSerializer, "to_representation") as to_representation,
+        django_assert_num_queries(1),
+    ):
+        resp = client.get("/api/v1/items/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+    assert resp.status_code == 304
+    assert not resp.content
+    to_representation.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("change", ["update", "create", "delete"])
+def test_list_etag_changes_with_the_data(setup, change):
+    client, item = setup["client"], setup["items"][0]
+    etag = client.get("/api/v1/items/")["ETag"]
+
+    if change == "update":
+        item.name = "Renommé"
+        item.save()
+    elif change == "create":
+        Item.objects.create(organization=setup["org"], name="Nouveau")
+    else:
+        item.delete()
+
+    resp = client.get("/api/v1/items/", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_etag_depends_on_query_string(setup):
+    client = setup["client"]
+    etag = client.get("/api/v1/items/")["ETag"]
+
+    resp = client.get("/api/v1/items/", {"page_size": 1}, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+def test_list_ignores_if_modified_since_after_a_deletion(setup):
+    client = setup["client"]
+    first = client.get("/api/v1/items/")
+    assert "Last-Modified" not in first
+    since = http_date(max(item.updated_at for item in setup["items"]).timestamp() + 1)
+
+    setup["items"][0].delete()
+
+    resp = client.get("/api/v1/items/", HTTP_IF_MODIFIED_SINCE=since)
+    assert resp.status_code == 200
+    assert len(resp.json()["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_detail_honours_if_modified_since(setup):
+    client, item = setup["client"], setup["items"][0]
+    url = f"/api/v1/items/{item.id}/"
+    first = client.get(url)
+
+    with mock.patch.object(ItemSerializer, "to_representation") as to_representation:
+        resp = client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert resp.status_code == 304
+    to_representation.assert_not_called()
+
+    stale = http_date(item.updated_at.timestamp() - 60)
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=stale).status_code == 200
+
+
+@pytest.mark.django_db
+def test_etags_follow_counter_and_copy_writes(setup, ul, user, membership):
+    client, org, item = setup["client"], setup["org"], setup["items"][0]
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    LotTemplateItem.objects.create(template=template, group="DIVERS", item=item, expected_qty=1)
+    container = Container.objects.create(structure=ul, type="BAG_INTERVENTION", identifier="S")
+    lot = client.post(
+        "/api/v1/lot-instances/", {"template": template.id, "container": container.id}
+    ).json()
+    url = f"/api/v1/lot-instances/{lot['id']}/"
+    etag = client.get(url)["ETag"]
+
+    # The movement only changes the lot's counters.
+    client.post(
+        "/api/v1/stock-movements/",
+        {"structure": ul.id, "type": "IN", "to_lot": lot["id"], "item": item.id, "quantity": 1},
+    )
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp.json()["status"] == LotInstance.Status.READY
+
+    other = Structure.objects.create(organization=org, level="LOCAL", name="UL 02")
+    Membership.objects.create(user=user, structure=other, role=Membership.Role.REFERENT)
+    batch = Batch.objects.create(item=item, lot_number="L1")
+    StockLine.objects.filter(lot_instance_id=lot["id"]).update(batch=batch)
+    etag = client.get("/api/v1/stock-lines/")["ETag"]
+    container.structure = other
+    container.save()
+    resp = client.get("/api/v1/stock-lines/", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp.json()["results"][0]["structure"] == other.id
+
+    etag = resp["ETag"]
+    batch.expires_at = date(2030, 1, 1)
+    batch.save()
+    resp = client.get("/api/v1/stock-lines/", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp.json()["results"][0]["expires_at"] == "2030-01-01"
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.inventory.digests import build_expiry_digests
+from apps.inventory.models import (
+    Batch,
+    Container,
+    ExpiryDigest,
+    Item,
+    LotInstance,
+    LotTemplate,
+    StockLine,
+)
+from apps.organizations.models import Membership, Structure
+
+
+@pytest.fixture
+def role():
+    return Membership.Role.VIEWER
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    other = Structure.objects.create(organization=org, level="LOCAL", name="UL 02")
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    item = Item.objects.create(organization=org, name="Sérum physiologique")
+    now = timezone.now()
+    today = timezone.localdate(now)
+
+    lots = {}
+    for structure, overdue_days in ((ul, 3), (other, -10)):
+        container = Container.objects.create(
+            structure=structure, type="BAG_INTERVENTION", identifier=f"SAC-{structure.id}"
+        )
+        lots[structure.id] = LotInstance.objects.create(
+            template=template,
+            container=container,
+            next_check_due_at=now - timedelta(days=overdue_days),
+        )
+    for days, number in ((-2, "E"), (4, "S1"), (6, "S2"), (60, "L")):
+        batch = Batch.objects.create(
+            item=item, lot_number=number, expires_at=today + timedelta(days=days)
+        )
+        StockLine.objects.create(
+            lot_instance=lots[ul.id], item=item, batch=batch, quantity=Decimal("1")
+        )
+    return {"client": api_client, "ul": ul, "other": other, "lot": lots[ul.id]}
+
+
+@pytest.mark.django_db
+def test_digest_groups_overdue_checks_and_expiring_stock(setup):
+    ul = setup["ul"]
+
+    assert build_expiry_digests(days=30, limit=2, chunk_size=1) == 1
+
+    digest = ExpiryDigest.objects.get()
+    assert digest.structure_id == ul.id
+    assert (digest.overdue_check_count, digest.expired_count, digest.expiring_count) == (1, 1, 2)
+    assert digest.payload["overdue_checks"][0]["lot_instance"] == setup["lot"].id
+    # Limited to the two most urgent entries, oldest expiry first.
+    assert [row["batch"] for row in digest.payload["expiring_stock"]] == [
+        StockLine.objects.get(batch__lot_number=number).batch_id for number in ("E", "S1")
+    ]
+
+
+@pytest.mark.django_db
+def test_digest_rebuild_drops_resolved_structures(setup):
+    call_command("build_expiry_digest")
+    StockLine.objects.update(quantity=0)
+    LotInstance.objects.update(next_check_due_at=None)
+
+    call_command("build_expiry_digest")
+
+    assert not ExpiryDigest.objects.exists()
+
+
+@pytest.mark.django_db
+def test_digest_api_is_scoped(setup, django_assert_max_num_queries):
+    build_expiry_digests()
+    ExpiryDigest.objects.create(
+        structure=setup["other"], generated_at=timezone.now(), window_days=30
+    )
+
+    with django_assert_max_num_queries(3):
+        resp = setup["client"].get("/api/v1/expiry-digests/")
+
+    assert resp.status_code == 200
+    assert [row["structure"] for row in resp.json()["results"]] == [setup["ul"].id]
@@ -140,7 +140,7 @@ def test_inventory_crud_endpoints():
 
     list_resp = client.get("/api/v1/items/")
     assert list_resp.status_code == 200
-    assert len(list_resp.json()) == 1
+    assert len(list_resp.json()["results"]) == 1
 
     patch_resp = client.patch(f"/api/v1/items/{item_id}/", {"sku": "GANTS-001"}, format="json")
     assert patch_resp.status_code == 200
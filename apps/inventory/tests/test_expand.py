@@ -0,0 +1,117 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.models import (
+    Batch,
+    Container,
+    Item,
+    Location,
+    LotInstance,
+    LotTemplate,
+    Site,
+    StockLine,
+    StockMovement,
+)
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    item = Item.objects.create(organization=org, name="Compresses", unit="boite")
+    batch = Batch.objects.create(item=item, lot_number="L1")
+    site = Site.objects.create(structure=ul, name="Garage")
+    location = Location.objects.create(site=site, name="Armoire 1")
+    container = Container.objects.create(
+        structure=ul, location=location, type="BAG_INTERVENTION", identifier="UL-1"
+    )
+    lot = LotInstance.objects.create(template=template, container=container)
+    line = StockLine.objects.create(lot_instance=lot, item=item, batch=batch, quantity=Decimal("3"))
+    StockMovement.objects.create(
+        structure=ul, type=StockMovement.Type.IN, to_lot=lot, item=item, quantity=Decimal("3")
+    )
+    return {"client": api_client, "line": line, "item": item, "batch": batch, "location": location}
+
+
+def _select(ctx, table):
+    return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(f'SELECT "{table}"')]
+
+
+@pytest.mark.django_db
+def test_reads_join_nothing_and_load_serialized_columns(setup):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = setup["client"].get("/api/v1/stock-movements/")
+
+    assert resp.status_code == 200
+    assert resp.json()["results"][0]["item"] == setup["item"].id
+    (sql,) = [s for s in _select(ctx, "inventory_stockmovement") if "COUNT" not in s]
+    assert "JOIN" not in sql
+    assert '"inventory_stockmovement"."item_id"' in sql
+
+
+@pytest.mark.django_db
+def test_expand_nests_and_joins_on_demand(setup):
+    client, line = setup["client"], setup["line"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get("/api/v1/stock-lines/?expand=item,batch")
+    assert resp.status_code == 200
+    (row,) = resp.json()["results"]
+    assert row["item"]["name"] == "Compresses"
+    assert row["batch"] == {
+        "id": setup["batch"].id,
+        "item": setup["item"].id,
+        "lot_number": "L1",
+        "expires_at": None,
+    }
+    assert row["lot_instance"] == line.lot_instance_id
+    (sql,) = [s for s in _select(ctx, "inventory_stockline") if "COUNT" not in s]
+    assert sql.count("JOIN") == 2
+
+    resp = client.get(f"/api/v1/stock-lines/{line.id}/?expand=lot_instance")
+    assert resp.json()["lot_instance"]["container"] == line.lot_instance.container_id
+
+    resp = client.get("/api/v1/stock-lines/?expand=item,created_by")
+    assert resp.status_code == 400
+    assert "created_by" in resp.json()["expand"][0]
+
+
+@pytest.mark.django_db
+def test_writes_ignore_expand_and_keep_permissions(setup):
+    client, location = setup["client"], setup["location"]
+
+    resp = client.patch(
+        f"/api/v1/locations/{location.id}/?expand=site", {"name": "Armoire 2"}, format="json"
+    )
+    assert resp.status_code == 200
+    assert resp.json()["site"] == location.site_id
+
+    resp = client.patch(
+        f"/api/v1/stock-lines/{setup['line'].id}/", {"quantity": "4"}, format="json"
+    )
+    assert resp.status_code == 200
+    assert resp.json()["quantity"] == "4.00"
+
+
+@pytest.mark.django_db
+def test_expanded_relations_are_part_of_the_etag(setup):
+    client, line, item = setup["client"], setup["line"], setup["item"]
+    urls = ["/api/v1/stock-lines/?expand=item", f"/api/v1/stock-lines/{line.id}/?expand=item"]
+    etags = [client.get(url)["ETag"] for url in urls]
+    for url, etag in zip(urls, etags, strict=True):
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    item.name = "Compresses stériles"
+    item.save()
+
+    for url, etag in zip(urls, etags, strict=True):
+        resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert (body["results"][0] if "results" in body else body)["item"]["name"] == item.name
+    # Structures have no updated_at: their expansion is never answered with a 304.
+    resp = client.get("/api/v1/sites/?expand=structure")
+    assert resp.status_code == 200
+    assert "ETag" not in resp
@@ -0,0 +1,156 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from apps.inventory.models import (
+    Batch,
+    Container,
+    Item,
+    LotInstance,
+    LotTemplate,
+    StockLine,
+)
+from apps.organizations.models import Membership, Structure
+
+
+@pytest.fixture
+def setup(user, org, api_client):
+    dt = Structure.objects.create(organization=org, level="TERRITORIAL", name="DT 75")
+    ul = Structure.objects.create(organization=org, level="LOCAL", name="UL 01", parent=dt)
+    other = Structure.objects.create(organization=org, level="LOCAL", name="UL 02")
+    Membership.objects.create(user=user, structure=dt, role=Membership.Role.VIEWER)
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    item = Item.objects.create(organization=org, name="Sérum physiologique")
+    today = timezone.localdate()
+
+    def lot(structure, identifier):
+        container = Container.objects.create(
+            structure=structure, type="BAG_INTERVENTION", identifier=identifier
+        )
+        return LotInstance.objects.create(template=template, container=container)
+
+    def stock(lot_instance, days, lot_number):
+        batch = Batch.objects.create(
+            item=item, lot_number=lot_number, expires_at=today + timedelta(days=days)
+        )
+        return StockLine.objects.create(
+            lot_instance=lot_instance, item=item, batch=batch, quantity=Decimal("2")
+        )
+
+    dt_lot, ul_lot, other_lot = lot(dt, "DT-1"), lot(ul, "UL-1"), lot(other, "UL2-1")
+    return {
+        "client": api_client,
+        "dt": dt,
+        "ul": ul,
+        "lines": {
+            "expired": stock(ul_lot, -3, "E"),
+            "soon": stock(ul_lot, 5, "S"),
+            "dt": stock(dt_lot, 10, "D"),
+            "later": stock(ul_lot, 90, "L"),
+            "other": stock(other_lot, 1, "O"),
+        },
+    }
+
+
+def _ids(resp):
+    assert resp.status_code == 200, resp.content
+    return [row["id"] for row in resp.json()["results"]]
+
+
+@pytest.mark.django_db
+def test_expiring_lists_window_soonest_first(setup):
+    client, lines = setup["client"], setup["lines"]
+
+    assert _ids(client.get("/api/v1/stock-lines/expiring/")) == [
+        lines["soon"].id,
+        lines["dt"].id,
+    ]
+    assert _ids(client.get("/api/v1/stock-lines/expiring/", {"include_expired": "true"}))[0] == (
+        lines["expired"].id
+    )
+    assert _ids(client.get("/api/v1/stock-lines/expiring/", {"days": 365}))[-1] == (
+        lines["later"].id
+    )
+
+
+@pytest.mark.django_db
+def test_expiring_narrows_to_structure_subtree(setup):
+    client, lines = setup["client"], setup["lines"]
+
+    resp = client.get("/api/v1/stock-lines/expiring/", {"structure": setup["ul"].id})
+
+    assert _ids(resp) == [lines["soon"].id]
+
+
+@pytest.mark.django_db
+def test_expiring_pages_through_lines_expiring_the_same_day(setup):
+    client, lines = setup["client"], setup["lines"]
+    lot = lines["soon"].lot_instance
+    org = lot.template.organization
+    expires_at = lines["soon"].expires_at
+    items = Item.objects.bulk_create(Item(organization=org, name=f"Art {i}") for i in range(1600))
+    batches = Batch.objects.bulk_create(
+        Batch(item=item, lot_number="T", expires_at=expires_at) for item in items
+    )
+    StockLine.objects.bulk_create(
+        StockLine(
+            lot_instance=lot,
+            item=batch.item,
+            batch=batch,
+            structure_id=lot.structure_id,
+            expires_at=expires_at,
+            quantity=1,
+        )
+        for batch in batches
+    )
+
+    ids, pages = [], 0
+    url = "/api/v1/stock-lines/expiring/?page_size=500"
+    while url:
+        body = client.get(url).json()
+        ids += [row["id"] for row in body["results"]]
+        url = body["next"]
+        pages += 1
+
+    assert pages == 4
+    assert len(ids) == len(set(ids)) == 1600 + 2
+    assert ids[-1] == lines["dt"].id  # ties are ordered by id, later dates follow
+
+
+@pytest.mark.django_db
+def test_expiring_rejects_invalid_window(setup):
+    resp = setup["client"].get("/api/v1/stock-lines/expiring/", {"days": -1})
+
+    assert resp.status_code == 400
+    assert "days" in resp.json()
+
+
+@pytest.mark.django_db
+def test_denormalized_columns_follow_batch_and_container(setup):
+    line = setup["lines"]["soon"]
+    assert (line.structure_id, line.expires_at) == (setup["ul"].id, line.batch.expires_at)
+
+    line.batch.expires_at += timedelta(days=1)
+    line.batch.save()
+    container = line.lot_instance.container
+    container.structure = setup["dt"]
+    container.save()
+
+    line.refresh_from_db()
+    assert (line.structure_id, line.expires_at) == (setup["dt"].id, line.batch.expires_at)
+
+
+@pytest.mark.django_db
+def test_expiring_query_uses_structure_expiry_index(setup):
+    today = timezone.localdate()
+    queryset = StockLine.objects.filter(
+        structure_id=setup["ul"].id,
+        expires_at__gte=today,
+        expires_at__lte=today + timedelta(days=30),
+    ).order_by("expires_at", "id")
+
+    plan = queryset.explain()
+    assert "USING INDEX" in plan
+    assert "TEMP B-TREE" not in plan  # rows come out of the index already ordered
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from apps.inventory.models import (
+    Batch,
+    Container,
+    InventoryLine,
+    InventorySession,
+    Item,
+    LotInstance,
+    LotTemplate,
+    StockLine,
+    StockMovement,
+)
+from apps.organizations.models import Membership, Structure
+
+
+@pytest.fixture
+def role():
+    return Membership.Role.VIEWER
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    other = Structure.objects.create(organization=org, level="LOCAL", name="UL 02")
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    item = Item.objects.create(organization=org, name="Compresses, stériles")
+    batch = Batch.objects.create(item=item, lot_number="L1")
+
+    def lot(structure, identifier):
+        container = Container.objects.create(
+            structure=structure, type="BAG_INTERVENTION", identifier=identifier
+        )
+        return container, LotInstance.objects.create(template=template, container=container)
+
+    (container, ul_lot), (_, other_lot) = lot(ul, "UL-1"), lot(other, "UL2-1")
+    lines = [
+        StockLine.objects.create(lot_instance=lot_instance, item=item, batch=batch, quantity=q)
+        for lot_instance, q in ((ul_lot, Decimal("3")), (other_lot, Decimal("1")))
+    ]
+    StockMovement.objects.create(
+        structure=ul, type=StockMovement.Type.IN, to_lot=ul_lot, item=item, quantity=Decimal("3")
+    )
+    session = InventorySession.objects.create(structure=ul, container=container)
+    InventoryLine.objects.create(session=session, item=item, counted_qty=Decimal("2"))
+    spare = Item.objects.create(organization=org, name="Gants")
+    return {"client": api_client, "line": lines[0], "item": item, "spare": spare}
+
+
+def _body(resp):
+    assert resp.status_code == 200
+    assert resp.streaming
+    return b"".join(resp.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_csv_export_is_scoped_and_quoted(setup):
+    resp = setup["client"].get("/api/v1/stock-lines/export/csv/")
+
+    assert resp["Content-Type"].startswith("text/csv")
+    assert 'filename="stock-line.csv"' in resp["Content-Disposition"]
+    rows = list(csv.DictReader(io.StringIO(_body(resp))))
+    assert [row["id"] for row in rows] == [str(setup["line"].id)]
+    assert rows[0]["item_name"] == "Compresses, stériles"
+    assert rows[0]["container"] == "UL-1"
+    assert rows[0]["lot_number"] == "L1"
+
+
+@pytest.mark.django_db
+def test_ndjson_export_applies_filters(setup):
+    client, item = setup["client"], setup["item"]
+
+    for url in ("/api/v1/stock-movements/export/ndjson/", "/api/v1/inventory-lines/export/ndjson/"):
+        rows = [json.loads(line) for line in _body(client.get(url)).splitlines()]
+        assert len(rows) == 1
+        assert rows[0]["item"] == item.id
+
+    resp = client.get("/api/v1/stock-lines/export/ndjson/", {"item": setup["spare"].id})
+    assert _body(resp) == ""
+
+
+@pytest.mark.django_db
+def test_unknown_export_format_is_404(setup):
+    assert setup["client"].get("/api/v1/stock-lines/export/xlsx/").status_code == 404
@@ -0,0 +1,105 @@
+import json
+from datetime import date, datetime
+
+import pytest
+from django.db import connection
+
+from apps.inventory import filters
+from apps.inventory.models import (
+    Batch,
+    Container,
+    ExpiryDigest,
+    InventoryLine,
+    InventorySession,
+    Item,
+    Location,
+    LotInstance,
+    LotTemplate,
+    Site,
+    StockLine,
+    StockMovement,
+)
+
+FILTER_CASES = [
+    (filters.StockLineFilter, StockLine, {"lot_instance": "lot"}),
+    (filters.StockLineFilter, StockLine, {"item": "item"}),
+    (filters.StockLineFilter, StockLine, {"batch": "batch"}),
+    (filters.BatchFilter, Batch, {"item": "item"}),
+    (filters.BatchFilter, Batch, {"expires_after": "2026-01-01", "expires_before": "2026-03-01"}),
+    (filters.ContainerFilter, Container, {"type": "VEHICLE_VPSP"}),
+    (filters.ContainerFilter, Container, {"location": "location"}),
+    (filters.ContainerFilter, Container, {"identifier": "SAC-01"}),
+    (filters.LotInstanceFilter, LotInstance, {"template": "template"}),
+    (filters.LotInstanceFilter, LotInstance, {"container": "container"}),
+    (filters.LotInstanceFilter, LotInstance, {"status": "INCOMPLETE"}),
+    (filters.StockMovementFilter, StockMovement, {"type": "IN"}),
+    (filters.StockMovementFilter, StockMovement, {"item": "item"}),
+    (filters.StockMovementFilter, StockMovement, {"structure": "structure"}),
+    (
+        filters.StockMovementFilter,
+        StockMovement,
+        {"created_after": "2026-01-01T00:00:00Z", "created_before": "2026-02-01T00:00:00Z"},
+    ),
+    (filters.InventorySessionFilter, InventorySession, {"container": "container"}),
+    (filters.InventoryLineFilter, InventoryLine, {"session": "session"}),
+    (filters.InventoryLineFilter, InventoryLine, {"item": "item"}),
+    (filters.ExpiryDigestFilter, ExpiryDigest, {"structure": "structure"}),
+]
+
+
+@pytest.fixture
+def objects(org, ul):
+    site = Site.objects.create(structure=ul, name="Garage")
+    location = Location.objects.create(site=site, name="Armoire 1")
+    container = Container.objects.create(
+        structure=ul, location=location, type="BAG_FIRST_AID", identifier="SAC-01"
+    )
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    item = Item.objects.create(organization=org, name="Gants nitrile")
+    return {
+        "structure": ul,
+        "location": location,
+        "container": container,
+        "template": template,
+        "item": item,
+        "lot": LotInstance.objects.create(template=template, container=container),
+        "batch": Batch.objects.create(item=item, lot_number="LOT-1"),
+        "session": InventorySession.objects.create(structure=ul, container=container),
+    }
+
+
+def _uses_index(queryset):
+    if connection.vendor == "mysql":
+        plan = json.loads(queryset.explain(format="json"))
+        return '"access_type": "ALL"' not in json.dumps(plan)
+    plan = queryset.explain()
+    return "USING INDEX" in plan or "USING COVERING INDEX" in plan
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("filterset_class", "model", "params"),
+    FILTER_CASES,
+    ids=[f"{case[1].__name__}-{'-'.join(case[2])}" for case in FILTER_CASES],
+)
+def test_every_filter_is_index_backed(objects, filterset_class, model, params):
+    params = {
+        key: objects[value].pk if value in objects else value for key, value in params.items()
+    }
+    filterset = filterset_class(params, queryset=model.objects.all())
+    assert filterset.is_valid(), filterset.errors
+
+    assert _uses_index(filterset.qs), filterset.qs.explain()
+
+
+@pytest.mark.django_db
+def test_batches_filter_on_expiry_range(org, api_client):
+    item = Item.objects.create(organization=org, name="Gel")
+    Batch.objects.create(item=item, lot_number="A", expires_at=date(2026, 1, 15))
+    Batch.objects.create(item=item, lot_number="B", expires_at=date(2026, 6, 15))
+
+    resp = api_client.get("/api/v1/batches/?expires_before=2026-03-01")
+
+    assert resp.status_code == 200
+    assert [row["lot_number"] for row in resp.json()["results"]] == ["A"]
+    assert datetime.fromisoformat(resp.json()["results"][0]["expires_at"]).month == 1
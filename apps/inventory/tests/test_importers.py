@@ -0,0 +1,120 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from apps.inventory.importers import import_items, import_lot_templates
+from apps.inventory.models import (
+    Container,
+    Item,
+    LotInstance,
+    LotTemplate,
+    LotTemplateItem,
+)
+
+
+@pytest.fixture
+def setup(org, ul, api_client):
+    gauze = Item.objects.create(organization=org, name="Compresses", sku="CMP-1", unit="boite")
+    return {"client": api_client, "org": org, "structure": ul, "gauze": gauze}
+
+
+def _lines(text):
+    return io.StringIO(text, newline="")
+
+
+@pytest.mark.django_db
+def test_import_items_upserts_and_reports_bad_rows(setup):
+    org, gauze = setup["org"], setup["gauze"]
+
+    report = import_items(
+        org,
+        _lines(
+            "name;sku;requires_expiry\n"
+            "Compresses;CMP-2;oui\n"
+            "Gants;GNT-1;non\n"
+            ";X;oui\n"
+            "Sérum;SRM-1;peut-être\n"
+        ),
+        delimiter=";",
+        batch_size=2,
+    )
+
+    assert (report.rows, report.imported, report.error_count) == (4, 2, 2)
+    assert [line for line, _message in report.errors] == [4, 5]
+    gauze.refresh_from_db()
+    assert (gauze.sku, gauze.requires_expiry) == ("CMP-2", True)
+    assert gauze.unit == "boite"  # column absent from the file: untouched
+    assert Item.objects.filter(organization=org).count() == 2
+
+
+@pytest.mark.django_db
+def test_import_lot_templates_resolves_items_and_recomputes_lots(setup):
+    org, gauze = setup["org"], setup["gauze"]
+    template = LotTemplate.objects.create(
+        organization=org, code="LOT_A", name="Lot A", version="2024-001"
+    )
+    LotTemplateItem.objects.create(
+        template=template, group="WOUNDS", item=gauze, expected_qty=Decimal("1")
+    )
+    container = Container.objects.create(
+        structure=setup["structure"], type="BAG_INTERVENTION", identifier="SAC-1"
+    )
+    lot = LotInstance.objects.create(template=template, container=container)
+
+    report = import_lot_templates(
+        org,
+        _lines(
+            "code,version,template_name,group,item,sku,expected_qty\n"
+            'LOT_A,2024-001,,wounds,,CMP-1,"4,5"\n'
+            "LOT_B,2025-001,Lot B 2025,DIVERS,Compresses,,2\n"
+            "LOT_B,2025-001,,DIVERS,Inconnu,,2\n"
+            "LOT_Z,2025-001,,DIVERS,Compresses,,2\n"
+            "LOT_B,2025-001,,DIVERS,Compresses,,-1\n"
+        ),
+    )
+
+    assert (report.imported, report.error_count) == (2, 3)
+    assert LotTemplateItem.objects.get(template=template).expected_qty == Decimal("4.5")
+    lot_b = LotTemplate.objects.get(organization=org, code="LOT_B", version="2025-001")
+    assert lot_b.name == "Lot B 2025"
+    assert lot_b.items.get().item_id == gauze.id
+    lot.refresh_from_db()
+    assert (lot.status, lot.missing_count) == (LotInstance.Status.INCOMPLETE, 1)
+
+
+@pytest.mark.django_db
+def test_import_upload_endpoints(setup):
+    client, org = setup["client"], setup["org"]
+
+    resp = client.post(
+        "/api/v1/items/import/",
+        {
+            "organization": org.id,
+            "file": SimpleUploadedFile("items.csv", "﻿name,unit\nAttelle,pièce\n".encode()),
+        },
+        format="multipart",
+    )
+    assert resp.status_code == 200, resp.content
+    assert resp.json() == {"rows": 1, "imported": 1, "error_count": 0, "errors": []}
+    assert Item.objects.get(organization=org, name="Attelle").unit == "pièce"
+
+    resp = client.post(
+        "/api/v1/lot-templates/import/",
+        {"organization": org.id, "file": SimpleUploadedFile("t.csv", b"code,version\n")},
+        format="multipart",
+    )
+    assert resp.status_code == 400
+    assert "expected_qty" in resp.json()["detail"]
+
+
+@pytest.mark.django_db
+def test_import_catalogue_command(setup, tmp_path):
+    path = tmp_path / "items.csv"
+    path.write_text("name,category\nCouverture,Confort\n", encoding="utf-8")
+
+    call_command("import_catalogue", "items", str(path), organization="org")
+
+    assert Item.objects.get(organization=setup["org"], name="Couverture").category == "Confort"
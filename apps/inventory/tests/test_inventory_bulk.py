@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import pytest
+
+from apps.inventory.models import Container, InventoryLine, InventorySession, Item
+from apps.organizations.models import Membership
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    container = Container.objects.create(structure=ul, type="VEHICLE_VPSP", identifier="VPSP-01")
+    items = Item.objects.bulk_create(
+        Item(organization=org, name=f"Item {i:03d}") for i in range(200)
+    )
+    return {
+        "client": api_client,
+        "membership": membership,
+        "items": items,
+        "session": InventorySession.objects.create(structure=ul, container=container),
+    }
+
+
+def _url(session):
+    return f"/api/v1/inventory-sessions/{session.id}/lines/bulk/"
+
+
+@pytest.mark.django_db
+def test_bulk_counts_insert_then_update(setup, django_assert_max_num_queries):
+    client, session, items = setup["client"], setup["session"], setup["items"]
+    InventoryLine.objects.create(session=session, item=items[0], expected_qty=10, counted_qty=1)
+    payload = [{"item": item.id, "counted_qty": "3"} for item in items]
+
+    with django_assert_max_num_queries(6):
+        resp = client.post(_url(session), payload, format="json")
+
+    assert resp.status_code == 200
+    assert len(resp.json()) == 200
+    assert InventoryLine.objects.filter(session=session, counted_qty=3).count() == 200
+    line = InventoryLine.objects.get(session=session, item=items[0])
+    assert line.expected_qty == Decimal("10")
+
+    resp = client.post(_url(session), [{"item": items[0].id, "counted_qty": "7"}], format="json")
+    assert resp.json()[0]["counted_qty"] == "7.00"
+    assert InventoryLine.objects.filter(session=session).count() == 200
+
+
+@pytest.mark.django_db
+def test_bulk_counts_are_validated_as_a_whole(setup):
+    client, session, items = setup["client"], setup["session"], setup["items"]
+
+    duplicate = [{"item": items[0].id, "counted_qty": "1"}] * 2
+    assert client.post(_url(session), duplicate, format="json").status_code == 400
+    unknown = [{"item": 999999, "counted_qty": "1"}]
+    assert client.post(_url(session), unknown, format="json").status_code == 400
+    negative = [{"item": items[0].id, "counted_qty": "-1"}]
+    assert client.post(_url(session), negative, format="json").status_code == 400
+    assert InventoryLine.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_bulk_counts_require_write_role(setup):
+    setup["membership"].role = Membership.Role.VIEWER
+    setup["membership"].save()
+    payload = [{"item": setup["items"][0].id, "counted_qty": "1"}]
+
+    resp = setup["client"].post(_url(setup["session"]), payload, format="json")
+
+    assert resp.status_code == 403
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from apps.inventory.models import (
+    Container,
+    InventorySession,
+    Item,
+    LotInstance,
+    LotTemplate,
+    LotTemplateItem,
+)
+from apps.organizations.models import Membership, Structure
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    vpsp = Container.objects.create(structure=ul, type="VEHICLE_VPSP", identifier="VPSP")
+    items = Item.objects.bulk_create(Item(organization=org, name=f"Item {i}") for i in range(30))
+    for code in ("LOT_A", "LOT_B", "VPSP"):
+        template = LotTemplate.objects.create(organization=org, code=code, name=code)
+        LotTemplateItem.objects.bulk_create(
+            LotTemplateItem(template=template, group="DIVERS", item=item, expected_qty=2)
+            for item in items[:20]
+        )
+        LotInstance.objects.create(template=template, container=vpsp)
+    return {"client": api_client, "structure": ul, "vpsp": vpsp, "org": org}
+
+
+@pytest.mark.django_db
+def test_open_prefills_expected_lines_across_lots(setup, django_assert_max_num_queries):
+    payload = {"structure": setup["structure"].id, "container": setup["vpsp"].id}
+
+    with django_assert_max_num_queries(9):
+        resp = setup["client"].post("/api/v1/inventory-sessions/open/", payload, format="json")
+
+    assert resp.status_code == 201
+    body = resp.json()
+    assert len(body["lines"]) == 20
+    assert {line["expected_qty"] for line in body["lines"]} == {"6.00"}
+    assert {line["counted_qty"] for line in body["lines"]} == {None}
+    session = InventorySession.objects.get(id=body["id"])
+    assert session.lines.filter(expected_qty=Decimal("6")).count() == 20
+
+
+@pytest.mark.django_db
+def test_open_rejects_container_of_another_structure(setup):
+    other = Structure.objects.create(organization=setup["org"], level="LOCAL", name="UL 02")
+    payload = {"structure": other.id, "container": setup["vpsp"].id}
+    Membership.objects.create(
+        user=get_user_model().objects.get(), structure=other, role=Membership.Role.ADMIN
+    )
+
+    resp = setup["client"].post("/api/v1/inventory-sessions/open/", payload, format="json")
+
+    assert resp.status_code == 400
+    assert "container" in resp.json()
@@ -0,0 +1,136 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.models import (
+    Batch,
+    Container,
+    InventoryLine,
+    InventorySession,
+    Item,
+    LotInstance,
+    LotTemplate,
+    LotTemplateItem,
+    StockLine,
+    StockMovement,
+)
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    vpsp = Container.objects.create(structure=ul, type="VEHICLE_VPSP", identifier="VPSP")
+    lot_a = LotInstance.objects.create(
+        template=LotTemplate.objects.create(organization=org, code="LOT_A", name="A"),
+        container=vpsp,
+    )
+    lot_b = LotInstance.objects.create(
+        template=LotTemplate.objects.create(organization=org, code="LOT_B", name="B"),
+        container=vpsp,
+    )
+    return {
+        "client": api_client,
+        "org": org,
+        "structure": ul,
+        "vpsp": vpsp,
+        "lot_a": lot_a,
+        "lot_b": lot_b,
+    }
+
+
+def _session(setup, counts):
+    session = InventorySession.objects.create(structure=setup["structure"], container=setup["vpsp"])
+    InventoryLine.objects.bulk_create(
+        InventoryLine(session=session, item=item, counted_qty=qty) for item, qty in counts
+    )
+    return session
+
+
+def _validate(setup, session):
+    return setup["client"].post(f"/api/v1/inventory-sessions/{session.id}/validate/")
+
+
+@pytest.mark.django_db
+def test_validate_reconciles_counts_with_adjust_movements(setup):
+    org, lot_a, lot_b = setup["org"], setup["lot_a"], setup["lot_b"]
+    gel, masks, blanket = (
+        Item.objects.create(organization=org, name=name) for name in ("Gel", "FFP2", "Couv")
+    )
+    LotTemplateItem.objects.create(
+        template=lot_b.template, group="DIVERS", item=masks, expected_qty=8
+    )
+    soon = Batch.objects.create(item=gel, lot_number="S", expires_at=date(2026, 1, 1))
+    later = Batch.objects.create(item=gel, lot_number="L", expires_at=date(2027, 1, 1))
+    StockLine.objects.create(lot_instance=lot_a, item=gel, batch=later, quantity=4)
+    StockLine.objects.create(lot_instance=lot_b, item=gel, batch=soon, quantity=3)
+    StockLine.objects.create(lot_instance=lot_a, item=blanket, quantity=2)
+    session = _session(setup, [(gel, 5), (masks, 10)])
+
+    resp = _validate(setup, session)
+
+    assert resp.status_code == 200
+    assert resp.json()["adjustments"] == 2
+    # Shortage of 2 gel taken from the batch expiring first.
+    assert StockLine.objects.get(batch=soon).quantity == Decimal("1")
+    assert StockLine.objects.get(batch=later).quantity == Decimal("4")
+    # Surplus of masks lands in the lot whose template lists them.
+    assert StockLine.objects.get(item=masks).lot_instance == lot_b
+    assert StockLine.objects.get(item=masks).quantity == Decimal("10")
+    # Items that were not counted are left alone.
+    assert StockLine.objects.get(item=blanket).quantity == Decimal("2")
+    assert set(StockMovement.objects.values_list("type", flat=True)) == {"ADJUST"}
+    session.refresh_from_db()
+    assert session.validated_at is not None
+
+    assert _validate(setup, session).status_code == 400
+    assert StockMovement.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_validate_query_count_does_not_depend_on_line_count(setup):
+    org, lot_a = setup["org"], setup["lot_a"]
+
+    def run(size):
+        items = Item.objects.bulk_create(
+            Item(organization=org, name=f"{size}-{i}") for i in range(size)
+        )
+        StockLine.objects.bulk_create(
+            StockLine(lot_instance=lot_a, item=item, quantity=5) for item in items[::2]
+        )
+        session = _session(setup, [(item, 3) for item in items])
+        with CaptureQueriesContext(connection) as ctx:
+            assert _validate(setup, session).status_code == 200
+        return len(ctx.captured_queries)
+
+    assert run(4) == run(40)
+
+
+@pytest.mark.django_db
+def test_validate_ignores_prefilled_lines_that_were_not_counted(setup):
+    org, lot_a = setup["org"], setup["lot_a"]
+    gel, masks = (Item.objects.create(organization=org, name=name) for name in ("Gel", "FFP2"))
+    for item in (gel, masks):
+        LotTemplateItem.objects.create(
+            template=lot_a.template, group="DIVERS", item=item, expected_qty=4
+        )
+        StockLine.objects.create(lot_instance=lot_a, item=item, quantity=4)
+    resp = setup["client"].post(
+        "/api/v1/inventory-sessions/open/",
+        {"structure": setup["structure"].id, "container": setup["vpsp"].id},
+        format="json",
+    )
+    session = InventorySession.objects.get(id=resp.json()["id"])
+    setup["client"].post(
+        f"/api/v1/inventory-sessions/{session.id}/lines/bulk/",
+        [{"item": gel.id, "counted_qty": "3"}],
+        format="json",
+    )
+
+    resp = _validate(setup, session)
+
+    assert resp.status_code == 200
+    assert resp.json()["adjustments"] == 1
+    assert StockLine.objects.get(item=gel).quantity == Decimal("3")
+    assert StockLine.objects.get(item=masks).quantity == Decimal("4")
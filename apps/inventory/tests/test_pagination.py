@@ -0,0 +1,68 @@
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.inventory.models import Item
+from apps.organizations.models import Organization
+
+
+@pytest.mark.django_db
+def test_list_endpoints_use_cursor_pagination(api_client, org):
+    Item.objects.bulk_create(Item(organization=org, name=f"Item {i:02d}") for i in range(7))
+
+    names = []
+    url = "/api/v1/items/?page_size=3"
+    while url:
+        resp = api_client.get(url)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert len(body["results"]) <= 3
+        names += [row["name"] for row in body["results"]]
+        url = body["next"]
+
+    assert names == [f"Item {i:02d}" for i in range(7)]
+
+
+@pytest.mark.django_db
+@override_settings(API_MAX_PAGE_SIZE=2)
+def test_page_size_is_capped(api_client, org):
+    Item.objects.bulk_create(Item(organization=org, name=f"Item {i}") for i in range(5))
+
+    resp = api_client.get("/api/v1/items/?page_size=100")
+
+    assert len(resp.json()["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_models_without_created_at_paginate_on_id(api_client):
+    for i in range(3):
+        Organization.objects.create(name=f"Org {i}", slug=f"org-{i}")
+
+    resp = api_client.get("/api/v1/organizations/?page_size=2")
+
+    assert resp.status_code == 200
+    assert [row["slug"] for row in resp.json()["results"]] == ["org-0", "org-1"]
+    assert api_client.get(resp.json()["next"]).json()["results"][0]["slug"] == "org-2"
+
+
+@pytest.mark.django_db
+def test_rows_sharing_a_timestamp_are_all_paginated(api_client, org):
+    # More ties than DRF's CursorPagination offset cutoff (1000).
+    Item.objects.bulk_create(Item(organization=org, name=f"Item {i}") for i in range(1200))
+    Item.objects.update(created_at=timezone.now())
+
+    pages, ids = [], []
+    url = "/api/v1/items/?page_size=500"
+    while url:
+        body = api_client.get(url).json()
+        pages.append(body)
+        ids += [row["id"] for row in body["results"]]
+        url = body["next"]
+
+    assert ids == sorted(Item.objects.values_list("id", flat=True))
+    assert [len(page["results"]) for page in pages] == [500, 500, 200]
+    assert pages[0]["previous"] is None
+    back = api_client.get(pages[2]["previous"]).json()
+    assert [row["id"] for row in back["results"]] == ids[500:1000]
+    assert api_client.get(back["previous"]).json()["previous"] is None
+    assert api_client.get("/api/v1/items/?cursor=bogus").status_code == 404
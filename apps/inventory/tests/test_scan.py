@@ -0,0 +1,108 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.models import (
+    Batch,
+    Container,
+    Item,
+    LotInstance,
+    LotTemplate,
+    LotTemplateItem,
+    StockLine,
+)
+from apps.organizations.models import Membership, Structure
+
+
+@pytest.fixture
+def role():
+    return Membership.Role.VIEWER
+
+
+@pytest.fixture
+def setup(user, org, ul, membership, api_client):
+    return {"client": api_client, "org": org, "ul": ul, "user": user}
+
+
+def _fill(setup, identifier, lots, items):
+    org = setup["org"]
+    container = Container.objects.create(
+        structure=setup["ul"], type="VEHICLE_VPSP", identifier=identifier
+    )
+    for n in range(lots):
+        template = LotTemplate.objects.create(
+            organization=org, code="LOT_A", name=f"{identifier} {n}", version=f"{identifier}-{n}"
+        )
+        lot = LotInstance.objects.create(template=template, container=container)
+        for m in range(items):
+            item = Item.objects.create(organization=org, name=f"{identifier}-{n}-{m}")
+            LotTemplateItem.objects.create(
+                template=template, group="DIVERS", item=item, expected_qty=2
+            )
+            batch = Batch.objects.create(item=item, lot_number="L1", expires_at=date(2030, 1, 1))
+            StockLine.objects.create(
+                lot_instance=lot, item=item, batch=batch, quantity=Decimal("1")
+            )
+    return container
+
+
+def _scan(setup, identifier, **headers):
+    with CaptureQueriesContext(connection) as queries:
+        resp = setup["client"].get(f"/api/v1/scan/{identifier}/", **headers)
+    return resp, len(queries)
+
+
+@pytest.mark.django_db
+def test_scan_returns_full_snapshot_in_constant_queries(setup):
+    _fill(setup, "VPSP-S", lots=1, items=1)
+    container = _fill(setup, "VPSP-L", lots=3, items=5)
+
+    small, small_queries = _scan(setup, "VPSP-S")
+    resp, queries = _scan(setup, "VPSP-L")
+
+    assert small.status_code == resp.status_code == 200
+    assert queries == small_queries
+    body = resp.json()
+    assert body["id"] == container.id
+    assert len(body["lots"]) == 3
+    lot = body["lots"][0]
+    assert len(lot["expectations"]) == len(lot["stock_lines"]) == 5
+    assert lot["expectations"][0]["expected_qty"] == "2.00"
+    assert lot["stock_lines"][0]["expires_at"] == "2030-01-01"
+    assert lot["stock_lines"][0]["lot_number"] == "L1"
+
+
+@pytest.mark.django_db
+def test_scan_revalidates_with_etag(setup):
+    container = _fill(setup, "SAC-1", lots=1, items=2)
+    resp, _ = _scan(setup, "SAC-1")
+    etag = resp["ETag"]
+
+    cached, _ = _scan(setup, "SAC-1", HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == 304
+    assert not cached.content
+
+    line = StockLine.objects.filter(lot_instance__container=container).first()
+    line.quantity = Decimal("5")
+    line.save()
+    changed, _ = _scan(setup, "SAC-1", HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_scan_is_scoped_and_disambiguated(setup):
+    other = Structure.objects.create(organization=setup["org"], level="LOCAL", name="UL 02")
+    Container.objects.create(structure=other, type="BAG_OXY", identifier="SAC-2")
+    assert _scan(setup, "SAC-2")[0].status_code == 404
+
+    Membership.objects.create(user=setup["user"], structure=other, role=Membership.Role.VIEWER)
+    Container.objects.create(structure=setup["ul"], type="BAG_OXY", identifier="SAC-2")
+    assert _scan(setup, "SAC-2")[0].status_code == 400
+
+    resp = setup["client"].get("/api/v1/scan/SAC-2/", {"structure": other.id})
+    assert resp.status_code == 200
+    assert resp.json()["structure"] == other.id
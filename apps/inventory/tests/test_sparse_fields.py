@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.models import Batch, Container, Item, LotInstance, LotTemplate, StockLine
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    item = Item.objects.create(organization=org, name="Compresses")
+    batch = Batch.objects.create(item=item, lot_number="L1")
+    container = Container.objects.create(
+        structure=ul, type="BAG_INTERVENTION", identifier="UL-1", label="Sac rouge"
+    )
+    lot = LotInstance.objects.create(template=template, container=container)
+    line = StockLine.objects.create(lot_instance=lot, item=item, batch=batch, quantity=Decimal("3"))
+    return {"client": api_client, "container": container, "line": line, "item": item}
+
+
+def _main_select(ctx, table):
+    (sql,) = [
+        q["sql"]
+        for q in ctx.captured_queries
+        if q["sql"].startswith(f'SELECT "{table}"') and "COUNT" not in q["sql"]
+    ]
+    return sql
+
+
+@pytest.mark.django_db
+def test_fields_prunes_payload_and_columns(setup):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = setup["client"].get("/api/v1/containers/?fields=id,identifier,type")
+
+    assert resp.status_code == 200
+    assert resp.json()["results"] == [
+        {"id": setup["container"].id, "identifier": "UL-1", "type": "BAG_INTERVENTION"}
+    ]
+    sql = _main_select(ctx, "inventory_container")
+    assert '"inventory_container"."identifier"' in sql
+    assert '"inventory_container"."label"' not in sql
+    assert '"inventory_container"."location_id"' not in sql
+
+
+@pytest.mark.django_db
+def test_omit_and_expand_combine(setup):
+    client, line = setup["client"], setup["line"]
+
+    resp = client.get(f"/api/v1/stock-lines/{line.id}/?omit=batch,expires_at,structure")
+    assert resp.status_code == 200
+    assert set(resp.json()) == {"id", "lot_instance", "item", "quantity"}
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get("/api/v1/stock-lines/?fields=item,quantity&expand=item,batch")
+    (row,) = resp.json()["results"]
+    assert set(row) == {"item", "quantity"}
+    assert row["quantity"] == "3.00"
+    assert row["item"]["name"] == "Compresses"
+    assert set(row["item"]) > {"id", "name"}  # nested serializers are not pruned
+    assert _main_select(ctx, "inventory_stockline").count("JOIN") == 1  # batch is not joined
+
+
+@pytest.mark.django_db
+def test_unknown_fields_and_writes(setup):
+    client, container = setup["client"], setup["container"]
+
+    resp = client.get("/api/v1/containers/?fields=id,colour")
+    assert resp.status_code == 400
+    assert resp.json() == {"fields": ["Champs inconnus: colour."]}
+    assert client.get("/api/v1/structures/?omit=slug").status_code == 400
+
+    resp = client.patch(
+        f"/api/v1/containers/{container.id}/?fields=id", {"label": "Sac bleu"}, format="json"
+    )
+    assert resp.status_code == 200
+    assert resp.json()["label"] == "Sac bleu"
@@ -0,0 +1,115 @@
+from decimal import Decimal
+
+import pytest
+
+from apps.inventory.models import (
+    Container,
+    Item,
+    LotInstance,
+    LotTemplate,
+    StockLine,
+    StockMovement,
+)
+from apps.organizations.models import Structure
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    bag = Container.objects.create(structure=ul, type="BAG_INTERVENTION", identifier="B1")
+    reserve = Container.objects.create(structure=ul, type="RESERVE_CASE", identifier="R1")
+    item = Item.objects.create(organization=org, name="Gants nitrile")
+    return {
+        "client": api_client,
+        "structure": ul,
+        "item": item,
+        "bag": LotInstance.objects.create(template=template, container=bag),
+        "reserve": LotInstance.objects.create(template=template, container=reserve),
+    }
+
+
+def _post(setup, **payload):
+    payload = {"structure": setup["structure"].id, "item": setup["item"].id, **payload}
+    return setup["client"].post("/api/v1/stock-movements/", payload, format="json")
+
+
+def _quantity(lot, item):
+    return StockLine.objects.get(lot_instance=lot, item=item, batch=None).quantity
+
+
+@pytest.mark.django_db
+def test_in_out_and_transfer_update_stock_lines(setup):
+    bag, reserve, item = setup["bag"], setup["reserve"], setup["item"]
+
+    assert _post(setup, type="IN", to_lot=reserve.id, quantity="10").status_code == 201
+    assert _quantity(reserve, item) == Decimal("10")
+
+    resp = _post(setup, type="TRANSFER", from_lot=reserve.id, to_lot=bag.id, quantity="4")
+    assert resp.status_code == 201
+    assert _quantity(reserve, item) == Decimal("6")
+    assert _quantity(bag, item) == Decimal("4")
+
+    assert _post(setup, type="CONSUME", from_lot=bag.id, quantity="1").status_code == 201
+    assert _post(setup, type="ADJUST", to_lot=bag.id, quantity="2").status_code == 201
+    assert _quantity(bag, item) == Decimal("5")
+
+
+@pytest.mark.django_db
+def test_posting_below_zero_is_rejected_and_rolled_back(setup):
+    bag, item = setup["bag"], setup["item"]
+    _post(setup, type="IN", to_lot=bag.id, quantity="3")
+
+    resp = _post(setup, type="OUT", from_lot=bag.id, quantity="5")
+
+    assert resp.status_code == 400
+    assert "quantity" in resp.json()
+    assert StockMovement.objects.count() == 1
+    assert _quantity(bag, item) == Decimal("3")
+
+
+@pytest.mark.django_db
+def test_update_and_delete_repost_the_movement(setup):
+    client, bag, item = setup["client"], setup["bag"], setup["item"]
+    movement_id = _post(setup, type="IN", to_lot=bag.id, quantity="3").json()["id"]
+
+    resp = client.patch(f"/api/v1/stock-movements/{movement_id}/", {"quantity": "8"}, format="json")
+    assert resp.status_code == 200
+    assert _quantity(bag, item) == Decimal("8")
+
+    assert client.delete(f"/api/v1/stock-movements/{movement_id}/").status_code == 204
+    assert _quantity(bag, item) == Decimal("0")
+
+
+@pytest.mark.django_db
+def test_lots_of_another_structure_are_rejected(setup):
+    client, bag, item = setup["client"], setup["bag"], setup["item"]
+    other = Structure.objects.create(
+        organization=setup["structure"].organization, level="LOCAL", name="UL 02"
+    )
+    container = Container.objects.create(structure=other, type="BAG_INTERVENTION", identifier="X")
+    foreign = LotInstance.objects.create(template=bag.template, container=container)
+    StockLine.objects.create(lot_instance=foreign, item=item, quantity=Decimal("10"))
+
+    resp = _post(setup, type="OUT", from_lot=foreign.id, quantity="10")
+    assert resp.status_code == 400
+    assert "from_lot" in resp.json()
+
+    movement_id = _post(setup, type="IN", to_lot=bag.id, quantity="3").json()["id"]
+    resp = client.patch(
+        f"/api/v1/stock-movements/{movement_id}/", {"to_lot": foreign.id}, format="json"
+    )
+    assert resp.status_code == 400
+    assert "to_lot" in resp.json()
+    assert _quantity(foreign, item) == Decimal("10")
+    assert _quantity(bag, item) == Decimal("3")
+
+
+@pytest.mark.django_db
+def test_batchless_lines_are_unique(setup):
+    bag, item = setup["bag"], setup["item"]
+    StockLine.objects.bulk_create(
+        [StockLine(lot_instance=bag, item=item), StockLine(lot_instance=bag, item=item)],
+        ignore_conflicts=True,
+    )
+
+    assert StockLine.objects.filter(lot_instance=bag, item=item, batch=None).count() == 1
@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.models import (
+    Container,
+    InventoryLine,
+    InventorySession,
+    Item,
+    LotInstance,
+    LotTemplate,
+    StockLine,
+)
+from apps.organizations.models import Structure
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    other = Structure.objects.create(organization=org, level="LOCAL", name="UL 02")
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    item = Item.objects.create(organization=org, name="Gants nitrile")
+    container = Container.objects.create(structure=ul, type="BAG_INTERVENTION", identifier="B1")
+    lot = LotInstance.objects.create(template=template, container=container)
+    line = StockLine.objects.create(lot_instance=lot, item=item, quantity=Decimal("3"))
+    session = InventorySession.objects.create(structure=ul, container=container)
+    inventory_line = InventoryLine.objects.create(session=session, item=item)
+    return {
+        "client": api_client,
+        "ul": ul,
+        "other": other,
+        "container": container,
+        "lot": lot,
+        "line": line,
+        "session": session,
+        "inventory_line": inventory_line,
+        "item": item,
+    }
+
+
+def _structures(setup):
+    return {
+        name: type(setup[name])
+        .objects.values_list("structure_id", flat=True)
+        .get(pk=setup[name].pk)
+        for name in ("lot", "line", "inventory_line")
+    }
+
+
+@pytest.mark.django_db
+def test_structure_copies_follow_container_and_session_moves(setup):
+    ul, other = setup["ul"], setup["other"]
+    assert set(_structures(setup).values()) == {ul.id}
+
+    setup["container"].structure = other
+    setup["container"].save()
+    setup["session"].structure = other
+    setup["session"].save(update_fields=["structure"])
+
+    assert set(_structures(setup).values()) == {other.id}
+
+
+@pytest.mark.django_db
+def test_lot_moved_to_another_container_takes_its_structure(setup):
+    container = Container.objects.create(
+        structure=setup["other"], type="RESERVE_CASE", identifier="R1"
+    )
+    setup["lot"].container = container
+    setup["lot"].save()
+
+    structures = _structures(setup)
+    assert (structures["lot"], structures["line"]) == (setup["other"].id, setup["other"].id)
+
+
+@pytest.mark.django_db
+def test_bulk_counts_copy_the_session_structure(setup):
+    item = Item.objects.create(organization=setup["ul"].organization, name="Compresses")
+    resp = setup["client"].post(
+        f"/api/v1/inventory-sessions/{setup['session'].id}/lines/bulk/",
+        [{"item": item.id, "counted_qty": "2"}],
+        format="json",
+    )
+
+    assert resp.status_code == 200, resp.content
+    assert InventoryLine.objects.get(item=item).structure_id == setup["ul"].id
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("url", "table"),
+    [
+        ("/api/v1/lot-instances/", "inventory_lotinstance"),
+        ("/api/v1/stock-lines/", "inventory_stockline"),
+        ("/api/v1/inventory-lines/", "inventory_inventoryline"),
+    ],
+)
+def test_list_is_scoped_on_its_own_structure_column(setup, url, table):
+    with CaptureQueriesContext(connection) as queries:
+        resp = setup["client"].get(url)
+
+    assert resp.status_code == 200
+    assert len(resp.json()["results"]) == 1
+    assert any(f'"{table}"."structure_id" IN' in q["sql"] for q in queries.captured_queries)
@@ -0,0 +1,231 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from apps.inventory.models import (
+    Container,
+    Item,
+    LotInstance,
+    LotTemplate,
+    StockLine,
+    Tombstone,
+)
+from apps.inventory.sync import decode_watermark, encode_watermark
+from apps.organizations.models import Membership, Structure
+
+
+@pytest.fixture
+def role():
+    return Membership.Role.VIEWER
+
+
+@pytest.fixture(autouse=True)
+def no_safety_lag(settings):
+    # Rows written by the test itself are seconds old: hand them out right away.
+    settings.SYNC_SAFETY_LAG_SECONDS = 0
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    other = Structure.objects.create(organization=org, level="LOCAL", name="UL 02")
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    lots = {}
+    for structure in (ul, other):
+        container = Container.objects.create(
+            structure=structure, type="BAG_INTERVENTION", identifier="SAC-1"
+        )
+        lots[structure.id] = LotInstance.objects.create(template=template, container=container)
+    items = [Item.objects.create(organization=org, name=f"Article {n}") for n in range(3)]
+    for item in items:
+        for lot in lots.values():
+            StockLine.objects.create(lot_instance=lot, item=item, quantity=Decimal("1"))
+    return {"client": api_client, "ul": ul, "other": other, "lots": lots, "items": items}
+
+
+def _sync(client, **params):
+    resp = client.get("/api/v1/sync/", params)
+    assert resp.status_code == 200
+    assert resp.streaming
+    return json.loads(b"".join(resp.streaming_content))
+
+
+def _watermarks(body):
+    marks = {name: section["watermark"] for name, section in body["changes"].items()}
+    marks["tombstones"] = body["tombstones"]["watermark"]
+    return {name: mark for name, mark in marks.items() if mark}
+
+
+@pytest.mark.django_db
+def test_first_sync_returns_scoped_rows_then_nothing(setup):
+    client, ul = setup["client"], setup["ul"]
+
+    body = _sync(client)
+
+    lines = body["changes"]["stock_lines"]["rows"]
+    assert len(lines) == 3
+    assert {row["structure"] for row in lines} == {ul.id}
+    assert len(body["changes"]["items"]["rows"]) == 3
+    assert [row["id"] for row in body["changes"]["containers"]["rows"]] == [
+        setup["lots"][ul.id].container_id
+    ]
+
+    again = _sync(client, **_watermarks(body))
+    assert all(not section["rows"] for section in again["changes"].values())
+    assert not again["tombstones"]["rows"]
+
+
+@pytest.mark.django_db
+def test_sync_returns_only_changes_and_deletions(setup):
+    client, ul = setup["client"], setup["ul"]
+    marks = _watermarks(_sync(client))
+    lines = list(StockLine.objects.filter(structure=ul).order_by("id"))
+    lines[0].quantity = Decimal("4")
+    lines[0].save()
+    deleted_id = lines[1].id
+    lines[1].delete()
+    StockLine.objects.filter(structure=setup["other"]).first().delete()
+
+    body = _sync(client, **marks)
+
+    assert [row["id"] for row in body["changes"]["stock_lines"]["rows"]] == [lines[0].id]
+    assert body["changes"]["stock_lines"]["rows"][0]["quantity"] == "4.00"
+    assert [(row["model"], row["id"]) for row in body["tombstones"]["rows"]] == [
+        ("stock_lines", deleted_id)
+    ]
+
+
+@pytest.mark.django_db
+def test_sync_sends_rows_of_a_container_moved_into_the_structure(setup):
+    client, ul, other = setup["client"], setup["ul"], setup["other"]
+    marks = _watermarks(_sync(client))
+    moved = setup["lots"][other.id]
+    moved.container.structure = ul
+    moved.container.identifier = "SAC-2"
+    moved.container.save()
+
+    changes = _sync(client, **marks)["changes"]
+
+    assert [row["id"] for row in changes["containers"]["rows"]] == [moved.container_id]
+    assert [row["id"] for row in changes["lot_instances"]["rows"]] == [moved.id]
+    lines = changes["stock_lines"]["rows"]
+    assert len(lines) == 3
+    assert {(row["lot_instance"], row["structure"]) for row in lines} == {(moved.id, ul.id)}
+
+
+@pytest.mark.django_db
+def test_sync_removes_rows_moved_out_of_the_structure(setup, user):
+    client, ul, other = setup["client"], setup["ul"], setup["other"]
+    marks = _watermarks(_sync(client))
+    moved = setup["lots"][ul.id]
+    line_ids = set(moved.stock_lines.values_list("id", flat=True))
+    moved.container.structure = other
+    moved.container.identifier = "SAC-2"
+    moved.container.save()
+
+    body = _sync(client, **marks)
+
+    assert not body["changes"]["stock_lines"]["rows"]
+    assert {(row["model"], row["id"]) for row in body["tombstones"]["rows"]} == {
+        ("containers", moved.container_id),
+        ("lot_instances", moved.id),
+        *(("stock_lines", line_id) for line_id in line_ids),
+    }
+
+    # A member of the destination keeps the rows: they only come back as changes.
+    Membership.objects.create(user=user, structure=other, role=Membership.Role.VIEWER)
+    body = _sync(client, **marks)
+    assert not body["tombstones"]["rows"]
+    assert {row["id"] for row in body["changes"]["stock_lines"]["rows"]} == line_ids
+
+    # Moving back withdraws the removals a client scoped to ul has not applied yet.
+    moved.container.structure = ul
+    moved.container.identifier = "SAC-1"
+    moved.container.save()
+    assert not Tombstone.objects.filter(structure=ul).exists()
+
+
+@pytest.mark.django_db
+def test_change_committed_after_a_sync_it_predates_is_not_skipped(setup, settings):
+    client, ul = setup["client"], setup["ul"]
+    settings.SYNC_SAFETY_LAG_SECONDS = 60
+    lines = list(StockLine.objects.filter(structure=ul).order_by("id"))
+    started_at = timezone.now()
+    StockLine.objects.filter(pk=lines[1].pk).update(
+        updated_at=started_at - timedelta(milliseconds=500)
+    )
+    body = _sync(client, models="stock_lines")
+    assert lines[1].id not in {row["id"] for row in body["changes"]["stock_lines"]["rows"]}
+
+    # An update stamped before that sync whose transaction commits after it.
+    StockLine.objects.filter(pk=lines[0].pk).update(
+        quantity=Decimal("9"), updated_at=started_at - timedelta(seconds=1)
+    )
+
+    settings.SYNC_SAFETY_LAG_SECONDS = 0  # the lag has elapsed
+    mark = body["changes"]["stock_lines"]["watermark"]
+    rows = _sync(client, models="stock_lines", stock_lines=mark)["changes"]["stock_lines"]["rows"]
+    assert {lines[0].id, lines[1].id} <= {row["id"] for row in rows}
+
+
+@pytest.mark.django_db
+def test_sync_pages_with_limit(setup):
+    client = setup["client"]
+    first = _sync(client, models="items", limit=2)
+    assert len(first["changes"]["items"]["rows"]) == 2
+    assert first["changes"]["items"]["has_more"] is True
+    assert "tombstones" not in first
+
+    second = _sync(client, models="items", limit=2, items=first["changes"]["items"]["watermark"])
+
+    assert [row["id"] for row in second["changes"]["items"]["rows"]] == [setup["items"][2].id]
+    assert second["changes"]["items"]["has_more"] is False
+
+
+@pytest.mark.django_db
+def test_tombstone_watermark_is_always_returned_and_drives_reset(setup):
+    client = setup["client"]
+    body = _sync(client)
+    assert body["reset"] is False
+    mark = body["tombstones"]["watermark"]
+    assert mark is not None
+    assert decode_watermark(mark)[0] <= timezone.now()
+
+    # Without deletions the watermark still advances, so it never ages into a reset.
+    again = _sync(client, **_watermarks(body))
+    assert again["reset"] is False
+    assert decode_watermark(again["tombstones"]["watermark"]) > decode_watermark(mark)
+
+    items = _sync(client, models="items")["changes"]["items"]["watermark"]
+    assert _sync(client, models="items", items=items)["reset"] is False
+    stale = encode_watermark((timezone.now() - timedelta(days=365), 0))
+    assert _sync(client, **{**_watermarks(body), "tombstones": stale})["reset"] is True
+
+
+@pytest.mark.django_db
+def test_tombstone_committed_after_a_sync_it_predates_is_not_skipped(setup, settings):
+    client, ul = setup["client"], setup["ul"]
+    settings.SYNC_SAFETY_LAG_SECONDS = 60
+    started_at = timezone.now()
+    body = _sync(client)
+    assert decode_watermark(body["tombstones"]["watermark"])[0] < started_at
+
+    # A delete stamped just before that sync whose transaction commits after it.
+    late = Tombstone.objects.create(
+        model="stock_lines", object_id=123, structure=ul, deleted_at=started_at
+    )
+    assert not _sync(client, **_watermarks(body))["tombstones"]["rows"]
+
+    settings.SYNC_SAFETY_LAG_SECONDS = 0  # the lag has elapsed
+    rows = _sync(client, **_watermarks(body))["tombstones"]["rows"]
+    assert [row["id"] for row in rows] == [late.object_id]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params", [{"models": "unknown"}, {"items": "not-a-watermark"}, {"limit": 0}]
+)
+def test_sync_rejects_invalid_parameters(setup, params):
+    assert setup["client"].get("/api/v1/sync/", params).status_code == 400
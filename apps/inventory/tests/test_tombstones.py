@@ -0,0 +1,105 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.inventory.models import (
+    Container,
+    Item,
+    Location,
+    LotInstance,
+    LotTemplate,
+    Site,
+    StockLine,
+    Tombstone,
+)
+from apps.inventory.sync import encode_watermark
+from apps.organizations.models import Membership
+
+
+@pytest.fixture
+def role():
+    return Membership.Role.ADMIN
+
+
+@pytest.fixture(autouse=True)
+def no_safety_lag(settings):
+    settings.SYNC_SAFETY_LAG_SECONDS = 0
+
+
+@pytest.fixture
+def setup(org, ul, membership, api_client):
+    template = LotTemplate.objects.create(organization=org, code="LOT_A", name="Lot A")
+    container = Container.objects.create(structure=ul, type="BAG_INTERVENTION", identifier="S1")
+    lot = LotInstance.objects.create(template=template, container=container)
+    for n in range(5):
+        item = Item.objects.create(organization=org, name=f"Article {n}")
+        StockLine.objects.create(lot_instance=lot, item=item, quantity=Decimal("1"))
+    return {"client": api_client, "ul": ul, "container": container, "lot": lot}
+
+
+def _tombstone_inserts(queries):
+    return [
+        q
+        for q in queries.captured_queries
+        if q["sql"].startswith('INSERT INTO "inventory_tombstone"')
+    ]
+
+
+@pytest.mark.django_db
+def test_cascaded_delete_records_every_row_in_one_insert(setup):
+    container, lot = setup["container"], setup["lot"]
+    line_ids = set(lot.stock_lines.values_list("id", flat=True))
+
+    with CaptureQueriesContext(connection) as queries:
+        resp = setup["client"].delete(f"/api/v1/containers/{container.id}/")
+
+    assert resp.status_code == 204
+    assert len(_tombstone_inserts(queries)) == 1
+    recorded = set(Tombstone.objects.values_list("model", "object_id", "structure_id"))
+    assert recorded == {
+        ("containers", container.id, setup["ul"].id),
+        ("lot_instances", lot.id, setup["ul"].id),
+        *(("stock_lines", line_id, setup["ul"].id) for line_id in line_ids),
+    }
+
+
+@pytest.mark.django_db
+def test_queryset_delete_is_captured(setup):
+    site = Site.objects.create(structure=setup["ul"], name="Garage")
+    locations = [Location.objects.create(site=site, name=f"Armoire {n}") for n in range(3)]
+
+    with CaptureQueriesContext(connection) as queries:
+        Location.objects.filter(site=site).delete()
+
+    assert len(_tombstone_inserts(queries)) == 1
+    assert set(Tombstone.objects.values_list("object_id", "structure_id")) == {
+        (location.id, setup["ul"].id) for location in locations
+    }
+
+
+@pytest.mark.django_db
+def test_prune_keeps_recent_tombstones_and_sync_requests_reset(setup):
+    now = timezone.now()
+    old = Tombstone.objects.create(
+        model="stock_lines", object_id=1, deleted_at=now - timedelta(days=200)
+    )
+    recent = Tombstone.objects.create(model="stock_lines", object_id=2)
+
+    call_command("prune_tombstones", days=90, batch_size=1)
+
+    assert list(Tombstone.objects.values_list("id", flat=True)) == [recent.id]
+
+    stale = encode_watermark((old.deleted_at, old.id))
+    resp = setup["client"].get("/api/v1/sync/", {"models": "tombstones", "tombstones": stale})
+    assert json.loads(b"".join(resp.streaming_content))["reset"] is True
+    fresh = encode_watermark((recent.deleted_at, 0))
+    resp = setup["client"].get("/api/v1/sync/", {"models": "tombstones", "tombstones": fresh})
+    body = json.loads(b"".join(resp.streaming_content))
+    assert body["reset"] is False
+    assert [row["id"] for row in body["tombstones"]["rows"]] == [2]
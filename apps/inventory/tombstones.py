@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Q
+
+# Tombstones recorded while a delete is running, flushed in one bulk insert.
+_pending: ContextVar[list | None] = ContextVar("pending_tombstones", default=None)
+_suppressed: ContextVar[bool] = ContextVar("suppressed_tombstones", default=False)
+
+
+@contextmanager
+def capture_tombstones():
+    """
+    Buffer tombstones of every row deleted in the block, cascades included,
+    and write them with bulk_create in the same transaction. Nested blocks
+    share the outermost buffer.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+    token = _pending.set([])
+    try:
+        with transaction.atomic():
+            yield
+            _flush(_pending.get())
+    finally:
+        _pending.reset(token)
+
+
+@contextmanager
+def suppress_tombstones():
+    """
+    Record no tombstone for rows deleted in the block: for throwaway data
+    that no client is expected to have synced.
+    """
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def record_tombstone(name: str, instance) -> None:
+    if _suppressed.get():
+        return
+    # The deletion collector clears instance.pk once the block is done: keep it now.
+    entry = (name, instance.pk, instance)
+    pending = _pending.get()
+    if pending is None:
+        _flush([entry])
+    else:
+        pending.append(entry)
+
+
+def _flush(pending) -> None:
+    if not pending:
+        return
+    Site = apps.get_model("inventory", "Site")
+    Tombstone = apps.get_model("inventory", "Tombstone")
+    # Locations only know their site: resolve all of them in one query.
+    site_ids = {
+        instance.site_id for _, _, instance in pending if instance._meta.model_name == "location"
+    }
+    site_structures = (
+        dict(Site.objects.filter(id__in=site_ids).values_list("id", "structure_id"))
+        if site_ids
+        else {}
+    )
+    Tombstone.objects.bulk_create(
+        [
+            Tombstone(
+                model=name,
+                object_id=pk,
+                structure_id=(
+                    site_structures.get(instance.site_id)
+                    if instance._meta.model_name == "location"
+                    else getattr(instance, "structure_id", None)
+                ),
+            )
+            for name, pk, instance in pending
+        ],
+        batch_size=1000,
+    )
+
+
+def record_scope_exit(from_structure_id, to_structure_id, rows: dict[str, list]) -> None:
+    """
+    Tombstones for rows moved out of `from_structure_id`, keyed by sync name:
+    clients that cannot see `to_structure_id` must drop them. Moving rows back
+    into a structure withdraws the exits recorded there, so a client that
+    missed both moves does not drop rows it can see again.
+    """
+    Tombstone = apps.get_model("inventory", "Tombstone")
+    rows = {name: list(ids) for name, ids in rows.items()}
+    returning = Q()
+    for name, ids in rows.items():
+        returning |= Q(model=name, object_id__in=ids)
+    Tombstone.objects.filter(
+        returning, structure_id=to_structure_id, moved_to__isnull=False
+    ).delete()
+    if from_structure_id is None:
+        return
+    Tombstone.objects.bulk_create(
+        [
+            Tombstone(
+                model=name,
+                object_id=pk,
+                structure_id=from_structure_id,
+                moved_to_id=to_structure_id,
+            )
+            for name, ids in rows.items()
+            for pk in ids
+        ],
+        batch_size=1000,
+    )
+
+
+class TombstoneQuerySet(models.QuerySet):
+    def delete(self):
+        with capture_tombstones():
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class TombstoneModel(models.Model):
+    """
+    Deleting an instance or a queryset records tombstones in bulk.
+    """
+
+    objects = TombstoneQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def delete(self, *args, **kwargs):
+        with capture_tombstones():
+            return super().delete(*args, **kwargs)
+
+
+def prune_tombstones(before, batch_size=5000) -> int:
+    """
+    Delete tombstones older than `before`, oldest first, `batch_size` rows per
+    statement so the (deleted_at, id) index is walked in short transactions.
+    """
+    Tombstone = apps.get_model("inventory", "Tombstone")
+    deleted = 0
+    while True:
+        ids = list(
+            Tombstone.objects.filter(deleted_at__lt=before)
+            .order_by("deleted_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += Tombstone.objects.filter(id__in=ids).delete()[0]
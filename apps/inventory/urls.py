@@ -1,8 +1,10 @@
+from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
     BatchViewSet,
     ContainerViewSet,
+    ExpiryDigestViewSet,
     InventoryLineViewSet,
     InventorySessionViewSet,
     ItemViewSet,
@@ -10,9 +12,11 @@ from .views import (
     LotInstanceViewSet,
     LotTemplateItemViewSet,
     LotTemplateViewSet,
+    ScanView,
     SiteViewSet,
     StockLineViewSet,
     StockMovementViewSet,
+    SyncView,
 )
 
 router = DefaultRouter()
@@ -28,5 +32,10 @@ router.register("stock-lines", StockLineViewSet, basename="stock-line")
 router.register("stock-movements", StockMovementViewSet, basename="stock-movement")
 router.register("inventory-sessions", InventorySessionViewSet, basename="inventory-session")
 router.register("inventory-lines", InventoryLineViewSet, basename="inventory-line")
+router.register("expiry-digests", ExpiryDigestViewSet, basename="expiry-digest")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("scan/<str:identifier>/", ScanView.as_view(), name="scan"),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("", include(router.urls)),
+]
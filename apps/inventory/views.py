@@ -1,14 +1,46 @@
-from rest_framework import viewsets
+import codecs
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import generics, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from apps.core.conditional import ConditionalGetMixin, conditional_response
+from apps.core.export import StreamingExportMixin
+from apps.core.querysets import ShapedQuerysetMixin
+from apps.organizations.models import Structure
 from apps.organizations.permissions import (
     StructureScopedPermission,
-    get_user_structure_ids,
+    get_structure_roles,
 )
-
+from apps.organizations.serializers import OrganizationSerializer, StructureSerializer
+
+from .compliance import compute_compliance, recompute_lot_compliance, track_compliance
+from .filters import (
+    BatchFilter,
+    ContainerFilter,
+    ExpiryDigestFilter,
+    InventoryLineFilter,
+    InventorySessionFilter,
+    LotInstanceFilter,
+    StockLineFilter,
+    StockMovementFilter,
+)
+from .importers import ImportFormatError, import_items, import_lot_templates
 from .models import (
     Batch,
     Container,
+    ExpiryDigest,
     InventoryLine,
     InventorySession,
     Item,
@@ -22,11 +54,17 @@ from .models import (
 )
 from .serializers import (
     BatchSerializer,
+    CatalogueImportSerializer,
+    ContainerScanSerializer,
     ContainerSerializer,
+    ExpiringStockQuerySerializer,
+    ExpiryDigestSerializer,
+    InventoryCountSerializer,
     InventoryLineSerializer,
     InventorySessionSerializer,
     ItemSerializer,
     LocationSerializer,
+    LotComplianceSerializer,
     LotInstanceSerializer,
     LotTemplateItemSerializer,
     LotTemplateSerializer,
@@ -34,6 +72,19 @@ from .serializers import (
     StockLineSerializer,
     StockMovementSerializer,
 )
+from .services import (
+    InsufficientStockError,
+    StockPostingError,
+    apply_stock_deltas,
+    merge_deltas,
+    movement_deltas,
+    post_movement,
+    prefill_expected_lines,
+    revert_movement,
+    upsert_inventory_counts,
+    validate_inventory_session,
+)
+from .sync import SyncQuerySerializer, stream_sync
 
 
 def _resolve_attr_path(obj, attr_path):
@@ -45,6 +96,17 @@ def _resolve_attr_path(obj, attr_path):
     return current
 
 
+@contextmanager
+def _posting_errors_as_validation():
+    try:
+        with transaction.atomic():
+            yield
+    except InsufficientStockError as exc:
+        raise serializers.ValidationError({"quantity": [str(exc)]}) from exc
+    except StockPostingError as exc:
+        raise serializers.ValidationError(str(exc)) from exc
+
+
 class StructureScopedQuerysetMixin:
     structure_path = None
     structure_request_field = None
@@ -54,39 +116,73 @@ class StructureScopedQuerysetMixin:
         user = self.request.user
         if user.is_superuser:
             return queryset
-        structure_ids = get_user_structure_ids(user)
         if not self.structure_path:
             return queryset.none()
+        structure_ids = list(get_structure_roles(self.request))
         return queryset.filter(**{f"{self.structure_path}__in": structure_ids})
 
-    def get_structure_from_obj(self, obj):
+    def get_structure_id_from_obj(self, obj):
         if not self.structure_path:
             return None
-        return _resolve_attr_path(obj, self.structure_path)
+        *path, field = self.structure_path.split("__")
+        parent = _resolve_attr_path(obj, "__".join(path)) if path else obj
+        if parent is None:
+            return None
+        return getattr(parent, f"{field}_id", None)
 
     def get_structure_id_from_request(self, request):
-        if not self.structure_request_field:
+        # Bulk actions post a list: their structure comes from the detail object.
+        if not self.structure_request_field or not isinstance(request.data, Mapping):
             return None
         return request.data.get(self.structure_request_field)
 
 
-class ItemViewSet(viewsets.ModelViewSet):
+def _import_csv(request, importer):
+    """
+    Run a catalogue importer on an uploaded CSV; the file is decoded as it is read.
+    """
+    serializer = CatalogueImportSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    try:
+        report = importer(
+            data["organization"],
+            codecs.iterdecode(data["file"], "utf-8-sig"),
+            delimiter=data["delimiter"],
+        )
+    except (ImportFormatError, UnicodeDecodeError) as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report.as_dict())
+
+
+class ItemViewSet(ConditionalGetMixin, ShapedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Item.objects.all()
     serializer_class = ItemSerializer
     permission_classes = [IsAuthenticated]
+    expandable_fields = {"organization": OrganizationSerializer}
 
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_csv(self, request):
+        return _import_csv(request, import_items)
 
-class SiteViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
-    queryset = Site.objects.select_related("structure")
+
+class SiteViewSet(
+    ConditionalGetMixin, ShapedQuerysetMixin, StructureScopedQuerysetMixin, viewsets.ModelViewSet
+):
+    queryset = Site.objects.all()
     serializer_class = SiteSerializer
+    expandable_fields = {"structure": StructureSerializer}
     permission_classes = [StructureScopedPermission]
     structure_path = "structure"
     structure_request_field = "structure"
 
 
-class LocationViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
-    queryset = Location.objects.select_related("site")
+class LocationViewSet(
+    ConditionalGetMixin, ShapedQuerysetMixin, StructureScopedQuerysetMixin, viewsets.ModelViewSet
+):
+    queryset = Location.objects.all()
     serializer_class = LocationSerializer
+    expandable_fields = {"site": SiteSerializer}
     permission_classes = [StructureScopedPermission]
     structure_path = "site__structure"
 
@@ -97,54 +193,141 @@ class LocationViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
         return Site.objects.filter(id=site_id).values_list("structure_id", flat=True).first()
 
 
-class ContainerViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
-    queryset = Container.objects.select_related("structure", "location")
+class ContainerViewSet(
+    ConditionalGetMixin, ShapedQuerysetMixin, StructureScopedQuerysetMixin, viewsets.ModelViewSet
+):
+    queryset = Container.objects.all()
     serializer_class = ContainerSerializer
+    expandable_fields = {"structure": StructureSerializer, "location": LocationSerializer}
+    filterset_class = ContainerFilter
     permission_classes = [StructureScopedPermission]
     structure_path = "structure"
     structure_request_field = "structure"
 
 
-class LotTemplateViewSet(viewsets.ModelViewSet):
-    queryset = LotTemplate.objects.select_related("organization")
+class LotTemplateViewSet(ConditionalGetMixin, ShapedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = LotTemplate.objects.all()
     serializer_class = LotTemplateSerializer
+    expandable_fields = {"organization": OrganizationSerializer}
     permission_classes = [IsAuthenticated]
 
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_csv(self, request):
+        return _import_csv(request, import_lot_templates)
+
 
-class LotTemplateItemViewSet(viewsets.ModelViewSet):
-    queryset = LotTemplateItem.objects.select_related("template", "item")
+class LotTemplateItemViewSet(ConditionalGetMixin, ShapedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = LotTemplateItem.objects.all()
     serializer_class = LotTemplateItemSerializer
+    expandable_fields = {"template": LotTemplateSerializer, "item": ItemSerializer}
     permission_classes = [IsAuthenticated]
 
+    # Expectations changed: every lot built from the template(s) is recomputed.
+    def _recompute_instances(self, *template_ids):
+        recompute_lot_compliance(LotInstance.objects.filter(template_id__in=template_ids))
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            template_item = serializer.save()
+            self._recompute_instances(template_item.template_id)
 
-class LotInstanceViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
-    queryset = LotInstance.objects.select_related("template", "container")
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            previous_template_id = serializer.instance.template_id
+            template_item = serializer.save()
+            self._recompute_instances(previous_template_id, template_item.template_id)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            self._recompute_instances(instance.template_id)
+
+
+class LotInstanceViewSet(
+    ConditionalGetMixin, ShapedQuerysetMixin, StructureScopedQuerysetMixin, viewsets.ModelViewSet
+):
+    queryset = LotInstance.objects.all()
     serializer_class = LotInstanceSerializer
+    expandable_fields = {"template": LotTemplateSerializer, "container": ContainerSerializer}
+    filterset_class = LotInstanceFilter
     permission_classes = [StructureScopedPermission]
-    structure_path = "container__structure"
+    structure_path = "structure"
 
     def get_structure_id_from_request(self, request):
         container_id = request.data.get("container")
         if not container_id:
             return None
         return (
-            Container.objects.filter(id=container_id)
-            .values_list("structure_id", flat=True)
-            .first()
+            Container.objects.filter(id=container_id).values_list("structure_id", flat=True).first()
         )
 
-
-class BatchViewSet(viewsets.ModelViewSet):
-    queryset = Batch.objects.select_related("item")
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            lot = serializer.save()
+            recompute_lot_compliance(LotInstance.objects.filter(pk=lot.pk))
+            lot.refresh_from_db(fields=["status", "missing_count", "expired_count", "updated_at"])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            lot = serializer.save()
+            recompute_lot_compliance(LotInstance.objects.filter(pk=lot.pk))
+            lot.refresh_from_db(fields=["status", "missing_count", "expired_count", "updated_at"])
+
+    @action(detail=True, methods=["get"])
+    def compliance(self, request, pk=None):
+        """
+        Missing and over-stocked items of the lot compared with its template.
+        """
+        lot = self.get_object()
+        return Response(LotComplianceSerializer(compute_compliance([lot.id])[lot.id]).data)
+
+
+class BatchViewSet(ConditionalGetMixin, ShapedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Batch.objects.all()
     serializer_class = BatchSerializer
+    expandable_fields = {"item": ItemSerializer}
+    filterset_class = BatchFilter
     permission_classes = [IsAuthenticated]
 
-
-class StockLineViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
-    queryset = StockLine.objects.select_related("lot_instance", "item", "batch")
+    def perform_update(self, serializer):
+        # A new expiry date can flip the expired state of every lot holding the batch.
+        pairs = StockLine.objects.filter(batch=serializer.instance).values_list(
+            "lot_instance_id", "item_id"
+        )
+        with transaction.atomic(), track_compliance(pairs):
+            serializer.save()
+
+
+class StockLineViewSet(
+    ConditionalGetMixin,
+    ShapedQuerysetMixin,
+    StreamingExportMixin,
+    StructureScopedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = StockLine.objects.all()
     serializer_class = StockLineSerializer
+    expandable_fields = {
+        "lot_instance": LotInstanceSerializer,
+        "item": ItemSerializer,
+        "batch": BatchSerializer,
+    }
+    filterset_class = StockLineFilter
     permission_classes = [StructureScopedPermission]
-    structure_path = "lot_instance__container__structure"
+    structure_path = "structure"
+    cursor_ordering = None  # set per action
+    export_columns = {
+        "id": "id",
+        "structure": "structure_id",
+        "lot_instance": "lot_instance_id",
+        "container": "lot_instance__container__identifier",
+        "item": "item_id",
+        "item_name": "item__name",
+        "lot_number": "batch__lot_number",
+        "expires_at": "expires_at",
+        "quantity": "quantity",
+        "updated_at": "updated_at",
+    }
 
     def get_structure_id_from_request(self, request):
         lot_instance_id = request.data.get("lot_instance")
@@ -156,30 +339,180 @@ class StockLineViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
             .first()
         )
 
-
-class StockMovementViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
-    queryset = StockMovement.objects.select_related(
-        "structure", "created_by", "from_lot", "to_lot", "item", "batch"
-    )
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        with transaction.atomic(), track_compliance([(data["lot_instance"].id, data["item"].id)]):
+            serializer.save()
+
+    def perform_update(self, serializer):
+        line = serializer.instance
+        data = serializer.validated_data
+        pairs = [
+            (line.lot_instance_id, line.item_id),
+            (
+                data["lot_instance"].id if "lot_instance" in data else line.lot_instance_id,
+                data["item"].id if "item" in data else line.item_id,
+            ),
+        ]
+        with transaction.atomic(), track_compliance(pairs):
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic(), track_compliance([(instance.lot_instance_id, instance.item_id)]):
+            instance.delete()
+
+    @action(detail=False, methods=["get"], cursor_ordering=("expires_at", "id"))
+    def expiring(self, request):
+        """
+        Stock lines whose batch expires within `?days=`, soonest first.
+
+        Served from the (structure, expires_at, id) index of StockLine, without
+        joining lots or containers.
+        """
+        params = ExpiringStockQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        today = timezone.localdate()
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            quantity__gt=0,
+            expires_at__lte=today + timedelta(days=params.validated_data["days"]),
+        )
+        if not params.validated_data["include_expired"]:
+            queryset = queryset.filter(expires_at__gte=today)
+        structure_id = params.validated_data.get("structure")
+        if structure_id is not None:
+            queryset = queryset.filter(
+                structure_id__in=Structure.objects.descendants_of(structure_id).values("id")
+            )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class StockMovementViewSet(
+    ConditionalGetMixin,
+    ShapedQuerysetMixin,
+    StreamingExportMixin,
+    StructureScopedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = StockMovement.objects.all()
     serializer_class = StockMovementSerializer
+    expandable_fields = {
+        "structure": StructureSerializer,
+        "from_lot": LotInstanceSerializer,
+        "to_lot": LotInstanceSerializer,
+        "item": ItemSerializer,
+        "batch": BatchSerializer,
+    }
+    filterset_class = StockMovementFilter
     permission_classes = [StructureScopedPermission]
     structure_path = "structure"
     structure_request_field = "structure"
-
-
-class InventorySessionViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
-    queryset = InventorySession.objects.select_related("structure", "container", "validated_by")
+    export_columns = {
+        "id": "id",
+        "created_at": "created_at",
+        "structure": "structure_id",
+        "type": "type",
+        "from_lot": "from_lot_id",
+        "to_lot": "to_lot_id",
+        "item": "item_id",
+        "item_name": "item__name",
+        "lot_number": "batch__lot_number",
+        "quantity": "quantity",
+        "reason": "reason",
+        "created_by": "created_by_id",
+    }
+
+    def perform_create(self, serializer):
+        with _posting_errors_as_validation():
+            post_movement(serializer.save())
+
+    def perform_update(self, serializer):
+        with _posting_errors_as_validation():
+            reverted = movement_deltas(serializer.instance, sign=-1)
+            movement = serializer.save()
+            apply_stock_deltas(merge_deltas(reverted, movement_deltas(movement)))
+
+    def perform_destroy(self, instance):
+        with _posting_errors_as_validation():
+            revert_movement(instance)
+            instance.delete()
+
+
+class InventorySessionViewSet(
+    ConditionalGetMixin, ShapedQuerysetMixin, StructureScopedQuerysetMixin, viewsets.ModelViewSet
+):
+    queryset = InventorySession.objects.all()
     serializer_class = InventorySessionSerializer
+    expandable_fields = {"structure": StructureSerializer, "container": ContainerSerializer}
+    # InventorySessionSerializer.validate compares both on partial updates.
+    write_select_related = ("structure", "container")
+    filterset_class = InventorySessionFilter
     permission_classes = [StructureScopedPermission]
     structure_path = "structure"
     structure_request_field = "structure"
 
-
-class InventoryLineViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
-    queryset = InventoryLine.objects.select_related("session", "item")
+    @action(detail=False, methods=["post"])
+    def open(self, request):
+        """
+        Create a session and prefill its lines from the container's lot templates.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            session = serializer.save()
+            lines = prefill_expected_lines(session)
+        data = {**serializer.data, "lines": InventoryLineSerializer(lines, many=True).data}
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"])
+    def validate(self, request, pk=None):
+        """
+        Close the session and reconcile its counts into stock with ADJUST movements.
+        """
+        session = self.get_object()
+        with _posting_errors_as_validation():
+            movements = validate_inventory_session(session, request.user)
+        data = {**self.get_serializer(session).data, "adjustments": len(movements)}
+        return Response(data)
+
+    @action(detail=True, methods=["post"], url_path="lines/bulk")
+    def bulk_lines(self, request, pk=None):
+        """
+        Upsert many `{item, counted_qty}` counts with one permission check.
+        """
+        session = self.get_object()
+        if session.validated_at is not None:
+            raise serializers.ValidationError("Cette session d'inventaire est déjà validée.")
+        serializer = InventoryCountSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        lines = upsert_inventory_counts(session, serializer.validated_data)
+        return Response(InventoryLineSerializer(lines, many=True).data)
+
+
+class InventoryLineViewSet(
+    ConditionalGetMixin,
+    ShapedQuerysetMixin,
+    StreamingExportMixin,
+    StructureScopedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = InventoryLine.objects.all()
     serializer_class = InventoryLineSerializer
+    expandable_fields = {"session": InventorySessionSerializer, "item": ItemSerializer}
+    filterset_class = InventoryLineFilter
     permission_classes = [StructureScopedPermission]
-    structure_path = "session__structure"
+    structure_path = "structure"
+    export_columns = {
+        "id": "id",
+        "session": "session_id",
+        "structure": "structure_id",
+        "container": "session__container__identifier",
+        "item": "item_id",
+        "item_name": "item__name",
+        "expected_qty": "expected_qty",
+        "counted_qty": "counted_qty",
+        "updated_at": "updated_at",
+    }
 
     def get_structure_id_from_request(self, request):
         session_id = request.data.get("session")
@@ -190,3 +523,95 @@ class InventoryLineViewSet(StructureScopedQuerysetMixin, viewsets.ModelViewSet):
             .values_list("structure_id", flat=True)
             .first()
         )
+
+
+class ExpiryDigestViewSet(
+    ConditionalGetMixin,
+    ShapedQuerysetMixin,
+    StructureScopedQuerysetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    """
+    Digests written by the build_expiry_digest command; nothing is computed per request.
+    """
+
+    queryset = ExpiryDigest.objects.all()
+    serializer_class = ExpiryDigestSerializer
+    filterset_class = ExpiryDigestFilter
+    permission_classes = [StructureScopedPermission]
+    structure_path = "structure"
+
+
+class ScanView(generics.RetrieveAPIView):
+    """
+    Container snapshot for a scanned QR/barcode: lots, expectations, stock and expiry.
+
+    Four queries whatever the size of the container. The identifier is unique
+    per structure, so `?structure=` disambiguates when the user sees several
+    structures using the same code. Responses carry an ETag of the payload.
+    """
+
+    serializer_class = ContainerScanSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Container.objects.filter(identifier=self.kwargs["identifier"]).prefetch_related(
+            Prefetch(
+                "lots",
+                queryset=LotInstance.objects.select_related("template")
+                .prefetch_related(
+                    Prefetch(
+                        "template__items",
+                        queryset=LotTemplateItem.objects.select_related("item").order_by(
+                            "group", "item__name", "id"
+                        ),
+                    ),
+                    Prefetch(
+                        "stock_lines",
+                        queryset=StockLine.objects.select_related("item", "batch").order_by(
+                            "item__name", "expires_at", "id"
+                        ),
+                    ),
+                )
+                .order_by("id"),
+            )
+        )
+        structure_id = self.request.query_params.get("structure")
+        if structure_id:
+            if not structure_id.isdigit():
+                raise serializers.ValidationError({"structure": "Identifiant invalide."})
+            queryset = queryset.filter(structure_id=int(structure_id))
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(structure_id__in=list(get_structure_roles(self.request)))
+        return queryset
+
+    def get_object(self):
+        containers = list(self.get_queryset()[:2])
+        if not containers:
+            raise NotFound("Aucun conteneur ne correspond à cet identifiant.")
+        if len(containers) > 1:
+            raise serializers.ValidationError(
+                {
+                    "structure": "Identifiant présent dans plusieurs structures, précisez ?structure=."
+                }
+            )
+        return containers[0]
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(request, self.get_serializer(self.get_object()).data)
+
+
+class SyncView(APIView):
+    """
+    Delta sync for offline clients: rows changed since each per-model watermark
+    plus tombstones, streamed as one JSON document.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = SyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return StreamingHttpResponse(
+            stream_sync(request, params.validated_data), content_type="application/json"
+        )
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .permissions import PROCESS_LOCAL_CACHES
+
+
+@register()
+def check_structure_roles_cache(app_configs, **kwargs):
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.STRUCTURE_ROLES_CACHE_TIMEOUT and backend in PROCESS_LOCAL_CACHES:
+        return [
+            Error(
+                "STRUCTURE_ROLES_CACHE_TIMEOUT needs a cache shared by every worker.",
+                hint=f"{backend} is private to each process: configure CACHE_BACKEND.",
+                id="organizations.E001",
+            )
+        ]
+    return []
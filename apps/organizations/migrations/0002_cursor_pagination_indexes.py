@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("organizations", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="membership",
+            index=models.Index(fields=["created_at", "id"], name="organizatio_created_b22a20_idx"),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    Structure = apps.get_model("organizations", "Structure")
+    StructureClosure = apps.get_model("organizations", "StructureClosure")
+    parents = dict(Structure.objects.values_list("id", "parent_id"))
+    links = []
+    for structure_id in parents:
+        ancestor_id, depth = structure_id, 0
+        while ancestor_id is not None:
+            links.append(
+                StructureClosure(ancestor_id=ancestor_id, descendant_id=structure_id, depth=depth)
+            )
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+    StructureClosure.objects.bulk_create(links, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("organizations", "0002_cursor_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StructureClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("depth", models.PositiveSmallIntegerField()),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="organizations.structure",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="organizations.structure",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "depth"], name="organizatio_descend_b02bf3_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ancestor", "descendant"), name="uniq_structure_closure_pair"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
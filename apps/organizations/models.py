@@ -1,6 +1,7 @@
 # apps/organizations/models.py
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 
 
 class Organization(models.Model):
@@ -9,6 +10,23 @@ class Organization(models.Model):
     is_active = models.BooleanField(default=True)
 
 
+class StructureQuerySet(models.QuerySet):
+    def descendants_of(self, structure_id, include_self=True):
+        """
+        Subtree of `structure_id`, resolved with one join on the closure table.
+        """
+        lookups = {"ancestor_links__ancestor_id": structure_id}
+        if not include_self:
+            lookups["ancestor_links__depth__gt"] = 0
+        return self.filter(**lookups)
+
+    def ancestors_of(self, structure_id, include_self=True):
+        lookups = {"descendant_links__descendant_id": structure_id}
+        if not include_self:
+            lookups["descendant_links__depth__gt"] = 0
+        return self.filter(**lookups)
+
+
 class Structure(models.Model):
     class Level(models.TextChoices):
         NATIONAL = "NATIONAL", "National"
@@ -32,12 +50,120 @@ class Structure(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    objects = StructureQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=["organization", "level"]),
             models.Index(fields=["parent"]),
         ]
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        moved = False
+        if not adding and (update_fields is None or "parent" in update_fields):
+            previous_parent_id = (
+                Structure.objects.filter(pk=self.pk).values_list("parent_id", flat=True).first()
+            )
+            moved = previous_parent_id != self.parent_id
+            if moved and self.parent_id is not None:
+                if StructureClosure.objects.filter(
+                    ancestor_id=self.pk, descendant_id=self.parent_id
+                ).exists():
+                    raise ValidationError(
+                        "Une structure ne peut pas être rattachée à l'une de ses sous-structures."
+                    )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                StructureClosure.objects.attach(self)
+            elif moved:
+                StructureClosure.objects.move(self)
+
+
+class StructureClosureManager(models.Manager):
+    def attach(self, structure):
+        """
+        Index a new leaf: one row per ancestor of its parent, plus itself.
+        """
+        links = [StructureClosure(ancestor=structure, descendant=structure, depth=0)]
+        if structure.parent_id is not None:
+            links += [
+                StructureClosure(ancestor_id=ancestor_id, descendant=structure, depth=depth + 1)
+                for ancestor_id, depth in self.filter(
+                    descendant_id=structure.parent_id
+                ).values_list("ancestor_id", "depth")
+            ]
+        self.bulk_create(links)
+
+    def move(self, structure):
+        """
+        Re-link the subtree rooted at `structure` under its new parent.
+        """
+        subtree = list(self.filter(ancestor=structure).values_list("descendant_id", "depth"))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        self.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        if structure.parent_id is None:
+            return
+        ancestors = self.filter(descendant_id=structure.parent_id).values_list(
+            "ancestor_id", "depth"
+        )
+        self.bulk_create(
+            StructureClosure(
+                ancestor_id=ancestor_id,
+                descendant_id=descendant_id,
+                depth=ancestor_depth + descendant_depth + 1,
+            )
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, descendant_depth in subtree
+        )
+
+    def rebuild(self, batch_size=5000):
+        """
+        Recompute the whole table from `Structure.parent`, e.g. after a bulk load.
+        """
+        parents = dict(Structure.objects.values_list("id", "parent_id"))
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(closure_links(parents), batch_size=batch_size)
+
+
+def closure_links(parents):
+    """
+    Yield closure rows for a {structure_id: parent_id} mapping.
+    """
+    for structure_id in parents:
+        ancestor_id, depth = structure_id, 0
+        while ancestor_id is not None:
+            yield StructureClosure(ancestor_id=ancestor_id, descendant_id=structure_id, depth=depth)
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+
+
+class StructureClosure(models.Model):
+    """
+    Fermeture transitive de l'arbre des structures: une ligne par couple
+    (ancêtre, descendant), y compris (structure, structure) à profondeur 0.
+    """
+
+    ancestor = models.ForeignKey(
+        Structure, on_delete=models.CASCADE, related_name="descendant_links"
+    )
+    descendant = models.ForeignKey(
+        Structure, on_delete=models.CASCADE, related_name="ancestor_links"
+    )
+    depth = models.PositiveSmallIntegerField()
+
+    objects = StructureClosureManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="uniq_structure_closure_pair"
+            ),
+        ]
+        indexes = [models.Index(fields=["descendant", "depth"])]
+
 
 class Membership(models.Model):
     class Role(models.TextChoices):
@@ -76,4 +202,5 @@ class Membership(models.Model):
         indexes = [
             models.Index(fields=["structure", "role"]),
             models.Index(fields=["structure", "is_active"]),
+            models.Index(fields=["created_at", "id"]),
         ]
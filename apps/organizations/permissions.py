@@ -1,18 +1,109 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
-from .models import Membership
+from .models import Membership, StructureClosure
+
+ROLE_RANK = {
+    Membership.Role.VIEWER: 0,
+    Membership.Role.REFERENT: 1,
+    Membership.Role.ADMIN: 2,
+}
 
+STRUCTURE_TREE_VERSION_KEY = "structure-tree-version"
+# Backends private to the worker process: invalidations would not reach the others.
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+}
 
-def get_user_structure_ids(user):
-    return Membership.objects.filter(user=user, is_active=True).values_list(
-        "structure_id", flat=True
-    )
 
+def structure_roles_cache_key(user_id):
+    return f"structure-roles:{user_id}"
 
-def user_has_structure_role(user, structure_id, roles):
-    return Membership.objects.filter(
-        user=user, structure_id=structure_id, is_active=True, role__in=roles
-    ).exists()
+
+def structure_roles_cache_timeout():
+    """
+    STRUCTURE_ROLES_CACHE_TIMEOUT, or 0 when the default cache is not shared.
+    """
+    if settings.CACHES["default"]["BACKEND"] in PROCESS_LOCAL_CACHES:
+        return 0
+    return settings.STRUCTURE_ROLES_CACHE_TIMEOUT
+
+
+def bump_structure_tree_version():
+    """
+    Invalidate every cached role mapping after the structure tree changed.
+
+    Versions are timestamps, never counters: a counter restarted after the
+    key was evicted could hand out a version some stale mapping still carries.
+    """
+    cache.set(STRUCTURE_TREE_VERSION_KEY, time.time_ns(), None)
+
+
+def _structure_tree_version(cached):
+    version = cached.get(STRUCTURE_TREE_VERSION_KEY)
+    if version is None:
+        # Never set or evicted: start a version no cached mapping carries.
+        cache.add(STRUCTURE_TREE_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(STRUCTURE_TREE_VERSION_KEY)
+    return version
+
+
+def load_structure_roles(user):
+    """
+    Effective roles of `user` as {structure_id: role}.
+
+    A membership grants its role on the structure and on every descendant
+    (DT admin -> all its UL); the closure table expands it in one query.
+    When several memberships cover a structure the highest role wins.
+    """
+    roles = {}
+    links = StructureClosure.objects.filter(
+        ancestor__memberships__user=user, ancestor__memberships__is_active=True
+    ).values_list("descendant_id", "ancestor__memberships__role")
+    for structure_id, role in links:
+        if structure_id not in roles or ROLE_RANK[role] > ROLE_RANK[roles[structure_id]]:
+            roles[structure_id] = role
+    return roles
+
+
+def get_structure_roles(request):
+    """
+    Structure roles of the request user, resolved once per request.
+
+    The mapping is memoized on the request so the queryset mixin and both
+    permission hooks share a single query. When STRUCTURE_ROLES_CACHE_TIMEOUT
+    is set and the cache is shared it is also cached across requests, keyed
+    by user id, dropped on Membership save/delete and ignored once the
+    structure tree changed.
+    """
+    roles = getattr(request, "_structure_roles", None)
+    if roles is not None:
+        return roles
+    user = request.user
+    timeout = structure_roles_cache_timeout()
+    if timeout:
+        key = structure_roles_cache_key(user.pk)
+        cached = cache.get_many([key, STRUCTURE_TREE_VERSION_KEY])
+        tree_version = _structure_tree_version(cached)
+        version, roles = cached.get(key, (None, None))
+        if roles is None or version != tree_version:
+            roles = load_structure_roles(user)
+            cache.set(key, (tree_version, roles), timeout)
+    else:
+        roles = load_structure_roles(user)
+    request._structure_roles = roles
+    return roles
+
+
+def _as_structure_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
 
 class StructurePermission(BasePermission):
@@ -29,7 +120,7 @@ class StructurePermission(BasePermission):
             return True
         if request.method not in SAFE_METHODS:
             return False
-        return Membership.objects.filter(user=request.user, structure=obj, is_active=True).exists()
+        return obj.id in get_structure_roles(request)
 
 
 class MembershipPermission(BasePermission):
@@ -75,19 +166,20 @@ class StructureScopedPermission(BasePermission):
             structure_id = view.get_structure_id_from_request(request)
         if structure_id is None:
             return True
-        return user_has_structure_role(request.user, structure_id, self.write_roles)
+        role = get_structure_roles(request).get(_as_structure_id(structure_id))
+        return role in self.write_roles
 
     def has_object_permission(self, request, view, obj):
         if request.user.is_superuser:
             return True
-        if not hasattr(view, "get_structure_from_obj"):
+        if not hasattr(view, "get_structure_id_from_obj"):
             return False
-        structure = view.get_structure_from_obj(obj)
-        if structure is None:
+        structure_id = view.get_structure_id_from_obj(obj)
+        if structure_id is None:
+            return False
+        role = get_structure_roles(request).get(structure_id)
+        if role is None:
             return False
-        membership_qs = Membership.objects.filter(
-            user=request.user, structure=structure, is_active=True
-        )
         if request.method in SAFE_METHODS:
-            return membership_qs.exists()
-        return membership_qs.filter(role__in=self.write_roles).exists()
+            return True
+        return role in self.write_roles
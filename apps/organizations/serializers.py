@@ -1,26 +1,37 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from .models import Membership, Organization, Structure
+from apps.core.serializers import SparseFieldsetMixin
+
+from .models import Membership, Organization, Structure, StructureClosure
 
 User = get_user_model()
 
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Organization
         fields = ("id", "name", "slug", "is_active")
         read_only_fields = ("id",)
 
 
-class StructureSerializer(serializers.ModelSerializer):
+class StructureSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Structure
         fields = ("id", "organization", "level", "name", "parent", "code", "is_active")
         read_only_fields = ("id",)
 
+    def validate_parent(self, value):
+        if self.instance is None or value is None:
+            return value
+        if StructureClosure.objects.filter(ancestor=self.instance, descendant=value).exists():
+            raise serializers.ValidationError(
+                "Une structure ne peut pas être rattachée à l'une de ses sous-structures."
+            )
+        return value
+
 
-class MembershipSerializer(serializers.ModelSerializer):
+class MembershipSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Membership
         fields = (
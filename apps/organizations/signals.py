@@ -0,0 +1,18 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Membership, Structure
+from .permissions import bump_structure_tree_version, structure_roles_cache_key
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def invalidate_structure_roles(sender, instance, **kwargs):
+    cache.delete(structure_roles_cache_key(instance.user_id))
+
+
+@receiver(post_save, sender=Structure)
+@receiver(post_delete, sender=Structure)
+def invalidate_structure_tree(sender, instance, **kwargs):
+    bump_structure_tree_version()
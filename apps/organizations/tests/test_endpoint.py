@@ -21,7 +21,7 @@ def test_organization_crud():
 
     list_resp = client.get("/api/v1/organizations/")
     assert list_resp.status_code == 200
-    assert len(list_resp.json()) == 1
+    assert len(list_resp.json()["results"]) == 1
 
     update_resp = client.patch(f"/api/v1/organizations/{org_id}/", {"name": "CRF"}, format="json")
     assert update_resp.status_code == 200
@@ -53,7 +53,7 @@ def test_structure_and_membership_crud():
 
     structure_list = client.get("/api/v1/structures/")
     assert structure_list.status_code == 200
-    assert len(structure_list.json()) == 1
+    assert len(structure_list.json()["results"]) == 1
 
     structure_update = client.patch(
         f"/api/v1/structures/{structure_id}/", {"code": "UL01"}, format="json"
@@ -71,7 +71,7 @@ def test_structure_and_membership_crud():
 
     membership_list = client.get("/api/v1/memberships/")
     assert membership_list.status_code == 200
-    assert len(membership_list.json()) == 1
+    assert len(membership_list.json()["results"]) == 1
 
     membership_update = client.patch(
         f"/api/v1/memberships/{membership_id}/", {"is_fc_up_to_date": True}, format="json"
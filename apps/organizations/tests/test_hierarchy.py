@@ -0,0 +1,99 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.organizations.models import Organization, Structure, StructureClosure
+
+
+@pytest.fixture
+def tree():
+    org = Organization.objects.create(name="Organisation", slug="org")
+
+    def make(name, level, parent=None):
+        return Structure.objects.create(organization=org, level=level, name=name, parent=parent)
+
+    national = make("CRF", "NATIONAL")
+    dt01 = make("DT01", "TERRITORIAL", national)
+    dt02 = make("DT02", "TERRITORIAL", national)
+    return {
+        "national": national,
+        "dt01": dt01,
+        "dt02": dt02,
+        "ul01": make("UL01", "LOCAL", dt01),
+        "ul02": make("UL02", "LOCAL", dt01),
+        "ul03": make("UL03", "LOCAL", dt02),
+    }
+
+
+def _names(queryset):
+    return sorted(queryset.values_list("name", flat=True))
+
+
+@pytest.mark.django_db
+def test_descendants_and_ancestors_resolve_in_one_query(tree, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert _names(Structure.objects.descendants_of(tree["dt01"].id)) == [
+            "DT01",
+            "UL01",
+            "UL02",
+        ]
+    assert len(Structure.objects.descendants_of(tree["national"].id)) == 6
+    assert _names(Structure.objects.descendants_of(tree["dt01"].id, include_self=False)) == [
+        "UL01",
+        "UL02",
+    ]
+    assert _names(Structure.objects.ancestors_of(tree["ul03"].id)) == ["CRF", "DT02", "UL03"]
+
+
+@pytest.mark.django_db
+def test_moving_a_subtree_updates_the_closure(tree):
+    ul02 = tree["ul02"]
+    ul02.parent = tree["dt02"]
+    ul02.save()
+
+    assert _names(Structure.objects.descendants_of(tree["dt01"].id)) == ["DT01", "UL01"]
+    assert _names(Structure.objects.descendants_of(tree["dt02"].id)) == ["DT02", "UL02", "UL03"]
+
+    dt02 = tree["dt02"]
+    dt02.parent = tree["dt01"]
+    dt02.save()
+
+    assert _names(Structure.objects.descendants_of(tree["dt01"].id)) == [
+        "DT01",
+        "DT02",
+        "UL01",
+        "UL02",
+        "UL03",
+    ]
+    assert StructureClosure.objects.get(ancestor=tree["national"], descendant=ul02).depth == 3
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental_maintenance(tree):
+    tree["ul01"].parent = tree["dt02"]
+    tree["ul01"].save()
+    incremental = set(StructureClosure.objects.values_list("ancestor_id", "descendant_id", "depth"))
+
+    StructureClosure.objects.rebuild()
+
+    assert set(StructureClosure.objects.values_list("ancestor_id", "descendant_id", "depth")) == (
+        incremental
+    )
+
+
+@pytest.mark.django_db
+def test_structure_cannot_move_under_its_own_subtree(tree):
+    national = tree["national"]
+    national.parent = tree["ul01"]
+    with pytest.raises(ValidationError):
+        national.save()
+
+    admin = get_user_model().objects.create_superuser(email="a@example.com", password="passw0rd!")
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    resp = client.patch(
+        f"/api/v1/structures/{tree['dt01'].id}/", {"parent": tree["ul02"].id}, format="json"
+    )
+    assert resp.status_code == 400
+    assert "parent" in resp.json()
@@ -0,0 +1,132 @@
+import pytest
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.models import Container
+from apps.organizations.models import Membership, Structure
+from apps.organizations.permissions import STRUCTURE_TREE_VERSION_KEY
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        }
+    }
+
+
+@pytest.fixture
+def setup(ul, membership, api_client):
+    cache.clear()
+    container = Container.objects.create(structure=ul, type="BAG_FIRST_AID", identifier="SAC-01")
+    return {"client": api_client, "membership": membership, "container": container}
+
+
+def _membership_queries(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = getattr(client, method)(url, data, format="json")
+    return resp, [q for q in ctx.captured_queries if "organizations_membership" in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_patch_resolves_memberships_once(setup):
+    url = f"/api/v1/containers/{setup['container'].id}/"
+
+    resp, queries = _membership_queries(setup["client"], "patch", url, {"label": "Sac A"})
+
+    assert resp.status_code == 200
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_viewer_cannot_write(setup):
+    setup["membership"].role = Membership.Role.VIEWER
+    setup["membership"].save()
+    url = f"/api/v1/containers/{setup['container'].id}/"
+
+    assert setup["client"].get(url).status_code == 200
+    assert setup["client"].patch(url, {"label": "Sac A"}, format="json").status_code == 403
+
+
+@pytest.mark.django_db
+@override_settings(STRUCTURE_ROLES_CACHE_TIMEOUT=60)
+def test_cross_request_cache_is_invalidated_on_membership_change(shared_cache, setup):
+    client, membership = setup["client"], setup["membership"]
+    url = f"/api/v1/containers/{setup['container'].id}/"
+
+    _membership_queries(client, "get", url)
+    resp, queries = _membership_queries(client, "get", url)
+    assert resp.status_code == 200
+    assert queries == []
+
+    membership.is_active = False
+    membership.save()
+
+    resp, queries = _membership_queries(client, "get", url)
+    assert resp.status_code == 404
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+@override_settings(STRUCTURE_ROLES_CACHE_TIMEOUT=60)
+def test_cached_roles_are_reloaded_when_the_tree_version_is_evicted(shared_cache, setup):
+    client = setup["client"]
+    url = f"/api/v1/containers/{setup['container'].id}/"
+    _membership_queries(client, "get", url)
+    assert _membership_queries(client, "get", url)[1] == []
+
+    cache.delete(STRUCTURE_TREE_VERSION_KEY)
+
+    resp, queries = _membership_queries(client, "get", url)
+    assert resp.status_code == 200
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+@override_settings(STRUCTURE_ROLES_CACHE_TIMEOUT=60)
+def test_cross_request_cache_is_refused_without_a_shared_backend(setup):
+    client = setup["client"]
+    url = f"/api/v1/containers/{setup['container'].id}/"
+
+    _membership_queries(client, "get", url)
+    assert len(_membership_queries(client, "get", url)[1]) == 1
+    assert "organizations.E001" in {error.id for error in run_checks()}
+
+
+@pytest.mark.django_db
+@override_settings(STRUCTURE_ROLES_CACHE_TIMEOUT=60)
+def test_roles_cascade_to_descendant_structures(shared_cache, user, org, api_client):
+    cache.clear()
+    national = Structure.objects.create(organization=org, level="NATIONAL", name="CRF")
+    dt = Structure.objects.create(
+        organization=org, level="TERRITORIAL", name="DT01", parent=national
+    )
+    ul = Structure.objects.create(organization=org, level="LOCAL", name="UL01", parent=dt)
+    Membership.objects.create(user=user, structure=national, role=Membership.Role.VIEWER)
+    Membership.objects.create(user=user, structure=dt, role=Membership.Role.REFERENT)
+    bag = Container.objects.create(structure=ul, type="BAG_FIRST_AID", identifier="SAC-01")
+
+    listed = api_client.get("/api/v1/containers/").json()["results"]
+    assert [row["id"] for row in listed] == [bag.id]
+    resp = api_client.patch(f"/api/v1/containers/{bag.id}/", {"label": "Sac"}, format="json")
+    assert resp.status_code == 200
+    structures = api_client.get("/api/v1/structures/").json()["results"]
+    assert sorted(row["name"] for row in structures) == ["CRF", "DT01", "UL01"]
+
+    # A structure created later under the DT is visible despite the cached mapping.
+    ul02 = Structure.objects.create(organization=org, level="LOCAL", name="UL02", parent=dt)
+    assert api_client.get(f"/api/v1/structures/{ul02.id}/").status_code == 200
+
+    # The national VIEWER role only grants read access outside the DT.
+    other = Structure.objects.create(organization=org, level="LOCAL", name="UL99", parent=national)
+    resp = api_client.post(
+        "/api/v1/containers/",
+        {"structure": other.id, "type": "BAG_OXY", "identifier": "OXY-01"},
+        format="json",
+    )
+    assert resp.status_code == 403
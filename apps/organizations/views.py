@@ -1,40 +1,47 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 
+from apps.core.querysets import ShapedQuerysetMixin
+
 from .models import Membership, Organization, Structure
 from .permissions import (
     MembershipPermission,
     StructurePermission,
-    get_user_structure_ids,
+    get_structure_roles,
 )
 from .serializers import MembershipSerializer, OrganizationSerializer, StructureSerializer
 
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+class OrganizationViewSet(ShapedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ("id",)
 
 
-class StructureViewSet(viewsets.ModelViewSet):
+class StructureViewSet(ShapedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Structure.objects.all()
     serializer_class = StructureSerializer
     permission_classes = [StructurePermission]
+    cursor_ordering = ("id",)
+    expandable_fields = {"organization": OrganizationSerializer, "parent": StructureSerializer}
 
     def get_queryset(self):
-        queryset = Structure.objects.select_related("organization", "parent")
+        queryset = super().get_queryset()
         user = self.request.user
         if user.is_superuser:
             return queryset
-        structure_ids = get_user_structure_ids(user)
-        return queryset.filter(id__in=structure_ids)
+        return queryset.filter(id__in=list(get_structure_roles(self.request)))
 
 
-class MembershipViewSet(viewsets.ModelViewSet):
+class MembershipViewSet(ShapedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Membership.objects.all()
     serializer_class = MembershipSerializer
     permission_classes = [MembershipPermission]
+    expandable_fields = {"structure": StructureSerializer}
 
     def get_queryset(self):
-        queryset = Membership.objects.select_related("user", "structure")
+        queryset = super().get_queryset()
         user = self.request.user
         if user.is_superuser:
             return queryset
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "corsheaders",
+    "django_filters",
     "drf_spectacular",
     "rest_framework",
     "rest_framework.authtoken",
@@ -63,6 +64,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "apps.core.middleware.QueryShapeMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -103,6 +105,16 @@ DATABASES = {
     }
 }
 
+# Shared cache for cross-request data (e.g.
+# django.core.cache.backends.db.DatabaseCache after `manage.py createcachetable`).
+# The default local-memory cache is private to each worker process.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -149,8 +161,33 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
+    "DEFAULT_PAGINATION_CLASS": "apps.core.pagination.CreatedAtCursorPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", "50")),
 }
 
+# Upper bound for the `page_size` query parameter on paginated endpoints.
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "500"))
+
+# Seconds a user's {structure_id: role} mapping stays in the cache between
+# requests (0 = resolve once per request only). Needs a shared CACHES backend:
+# with a per-process one the mapping is resolved once per request only.
+STRUCTURE_ROLES_CACHE_TIMEOUT = int(os.getenv("STRUCTURE_ROLES_CACHE_TIMEOUT", "0"))
+
+# Days deletion tombstones are kept for offline sync; clients older than that
+# are told to resynchronise from scratch.
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "90"))
+
+# Sync only hands out rows older than this many seconds: a write stamped just
+# before a sync but committed after it must still be ahead of the watermark.
+# Keep it above the longest write transaction.
+SYNC_SAFETY_LAG_SECONDS = int(os.getenv("SYNC_SAFETY_LAG_SECONDS", "60"))
+
+# N+1 detector: "log" or "raise" when a request repeats the same statement
+# QUERY_SHAPE_THRESHOLD times; off by default.
+QUERY_SHAPE_DETECTOR = os.getenv("QUERY_SHAPE_DETECTOR", "")
+QUERY_SHAPE_THRESHOLD = int(os.getenv("QUERY_SHAPE_THRESHOLD", "5"))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "DRF API Boilerplate",
     "DESCRIPTION": "Boilerplate Django DRF JWT",
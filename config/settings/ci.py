@@ -13,3 +13,6 @@ ALLOWED_HOSTS = ["localhost", "127.0.0.1", "testserver"]
 
 CORS_ALLOWED_ORIGINS = []
 CORS_ALLOW_CREDENTIALS = False
+
+# The N+1 detector stays opt-in (QUERY_SHAPE_DETECTOR=raise): list endpoints are
+# gated by apps/core/tests/test_queries.py instead of failing unrelated tests.
@@ -1,3 +1,5 @@
+import os
+
 from .base import *
 
 DEBUG = True
@@ -6,6 +8,7 @@ CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
+QUERY_SHAPE_DETECTOR = os.getenv("QUERY_SHAPE_DETECTOR", "log")
 
 LOGGING = {
     "version": 1,